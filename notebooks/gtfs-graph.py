@@ -124,9 +124,22 @@ def _constants():
     K_HUBS_TARGET = 24            # top-K by PageRank for Austria;
                                   # bump to ~200 for Europe scale.
     K_HUBS_MAX = 60               # absolute cap after connectivity pass
+    # PageRank for the ranking (station_pagerank): NetworkX / cuGraph
+    # defaults; converged once the L1 change < n × tol. Its top
+    # K_HUBS_TARGET is the hub set whenever the DAG's cuGraph
+    # selection did not run. The backend is
+    # "cpu", "gpu" (cuGraph) or "auto" (cuGraph when present); env
+    # HUB_RANK_BACKEND overrides. PAGERANK_BENCH_STATIONS sizes the
+    # synthetic Europe-scale timing run (0 skips it).
+    PAGERANK_ALPHA = 0.85
+    PAGERANK_TOL = 1e-6
+    PAGERANK_MAX_ITER = 100
+    HUB_RANK_BACKEND = "auto"
+    PAGERANK_BENCH_STATIONS = 50_000
 
     # Partial Hub-Labeling: per non-hub station, store the K_LOCAL nearest
-    # hubs. JS planner intersects origin's K_LOCAL labels with dest's to
+    # hubs (the CPU bake also stores them per nTr layer, both ways).
+    # JS planner intersects origin's K_LOCAL labels with dest's to
     # find a viable hub-pair without scanning all K² combinations.
     K_LOCAL_HUBS = 8              # Austria: 8 × 1129 = 9k labels; Europe:
                                   # bump to 20 if needed for coverage.
@@ -135,6 +148,20 @@ def _constants():
     TEG_MAX_TRANSFERS = 4         # → 5 layers (nTr ∈ [0..4])
     TEG_TRANSFER_MIN_WAIT_S = 60  # plausible interchange floor
     TEG_TRANSFER_MAX_WAIT_S = 3600
+    TEG_HORIZON_S = 12 * 3600     # labels / hub pairs: arrivals ≤ 12h
+                                  # after the window start
+
+    # Hub-bake backend for hub_pair_routes / hub_labels (env
+    # GRAPH_BAKE_BACKEND overrides): "gpu" keeps the DAG's tables,
+    # "cpu" re-bakes them in the notebook (TegBakeCPU), "verify"
+    # CPU-bakes into transit/cpu-bake/ and diffs against the GPU
+    # tables, "auto" bakes on CPU unless the DAG run succeeded with
+    # them. The DAG's own bake task reads the same variable through
+    # notebook_austria_graph_bake: "auto" there is TegBakeCPU whenever
+    # cugraph does not import.
+    GRAPH_BAKE_BACKEND = "auto"
+    GRAPH_BAKE_WORKERS = 0        # forked (weekday, window) workers;
+                                  # 0 → os.cpu_count()
 
     # Pattern-group compression: trips with same (route_id, runs_dow,
     # stop_seq_hash) collapse to one representative. Austria expects
@@ -150,6 +177,12 @@ def _constants():
     SOFTFLAG_PCT = 20             # ±20% travel-time soft-flag band
     SOFTFLAG_TR_DELTA = 1
     VAL_MOTIS_OFFSETS_MIN = 20    # below this is a MOTIS OSM gap, not us
+    # MotisClient pacing for live runs: test groups fan out over a
+    # thread pool, the token bucket keeps the aggregate rate polite.
+    R10_MOTIS_RATE_PER_S = 2.0    # sustained requests / second (AUP)
+    R10_MOTIS_BURST = 4           # back-to-back requests allowed
+    R10_MOTIS_WORKERS = 4         # concurrent (origin, dest, weekday) groups
+    R10_MOTIS_RETRIES = 3         # 429 / 5xx / timeout retries (jittered)
 
     # 3 representative 1h windows for the default gate run. Set env
     # R10_FULL_WINDOWS=1 to expand to all 24.
@@ -158,9 +191,17 @@ def _constants():
     # MOTIS prod endpoint by default.
     MOTIS_BASE_PROD = "https://api.transitous.org/api/v5"
     MOTIS_BASE_STAGING = "https://staging.api.transitous.org/api/v5"
+    # TRANSITOUS_ENV=local: gtfs-austria.py's on-demand transit service
+    # answers /api/v5/plan from our own timetable — offline gate runs
+    # (R10_CACHE_ONLY does not apply) and a load-test target.
+    MOTIS_BASE_LOCAL = "http://localhost:8095/api/v5"
 
     # Cache + corpus paths (graph-suffixed so gtfs-austria.py's gate's
     # files don't collide during the validation window).
+    # R10_CACHE_STORE is the single-file response store the gate reads
+    # and writes; R10_CACHE_DIR (one `<sha1>.json` per response) is only
+    # read on a store miss, to import responses cached before it.
+    R10_CACHE_STORE = "/workspace/.r10/transitous-cache-graph.sqlite"
     R10_CACHE_DIR = "/workspace/.r10/transitous-cache-graph"
     R10_CORPUS_FILE = "/workspace/.r10/hardfail-corpus-graph.json"
     R10_CACHE_SCHEMA_VERSION = 7  # bumped from gtfs-austria.py's v=6
@@ -354,6 +395,1178 @@ def with_theme(theme: str, layers: list) -> list:
     return result
 
 
+@app.function
+# KEEP IN SYNC with notebooks/gpu-libraries-demo.py (its CPU-vs-cuGraph
+# PageRank cell runs this same kernel).
+def csr_pagerank(indptr, indices, weights=None, *, alpha: float = 0.85,
+                 personalization=None, tol: float = 1e-6,
+                 max_iter: int = 100):
+    """PageRank by power iteration over a CSR adjacency: row u's
+    out-edges are `indices[indptr[u]:indptr[u+1]]` with `weights`
+    (default 1). Each step is one weighted scatter-add (`np.bincount`)
+    over the edges; dangling mass and the teleport go to
+    `personalization` (default uniform). Stops early once the L1
+    change drops below n × tol — NetworkX's / cuGraph's criterion.
+    Returns (scores summing to 1, iterations run)."""
+    import numpy as np
+
+    indptr = np.asarray(indptr, np.int64)
+    indices = np.asarray(indices, np.int64)
+    n = indptr.size - 1
+    w = (np.ones(indices.size) if weights is None
+         else np.asarray(weights, np.float64))
+    src = np.repeat(np.arange(n), np.diff(indptr))
+    strength = np.bincount(src, weights=w, minlength=n)
+    dangling = strength == 0
+    step = w / np.where(dangling, 1.0, strength)[src]
+    if personalization is None:
+        p = np.full(n, 1.0 / n)
+    else:
+        p = np.asarray(personalization, np.float64)
+        p = p / p.sum()
+    x = np.full(n, 1.0 / n)
+    it = 0
+    for it in range(1, max_iter + 1):
+        last = x
+        x = alpha * np.bincount(indices, weights=step * last[src],
+                                minlength=n)
+        x += (alpha * last[dangling].sum() + 1.0 - alpha) * p
+        if np.abs(x - last).sum() < n * tol:
+            break
+    return x, it
+
+
+@app.function
+def station_pagerank(rail_stop_times, stations, *, alpha: float = 0.85,
+                     tol: float = 1e-6, max_iter: int = 100,
+                     personalized: bool = False, backend: str = "auto"):
+    """PageRank over the station transfer graph, for hub selection.
+
+    Edges join consecutive calls of every trip, weighted by the trip's
+    departures per day (runs_dow bits / 7), collapsed per station pair
+    into a CSR by source station_idx. `personalized` teleports in
+    proportion to each station's departures per day instead of
+    uniformly. `backend`: "cpu" runs `csr_pagerank`; "gpu" runs
+    cugraph.pagerank; "auto" takes cuGraph when it imports and a
+    device answers, else the CPU path — hub selection never needs a
+    GPU. Returns (scores indexed by station_idx, backend, iterations;
+    None when cuGraph does not report them)."""
+    import numpy as np
+    import polars as pl
+
+    n = int(stations["station_idx"].max()) + 1
+    calls = (
+        rail_stop_times
+        .join(stations.select("station_feature_id",
+                              pl.col("station_idx").cast(pl.Int64)),
+              on="station_feature_id", how="inner")
+        .sort("trip_id", "stop_sequence")
+        .select(
+            "trip_id", "station_idx",
+            (pl.col("runs_dow").fill_null(127).cast(pl.Int64)
+             .bitwise_count_ones() / 7).alias("per_day"),
+        )
+        .with_columns(
+            pl.col("station_idx").shift(-1).over("trip_id").alias("dst"))
+    )
+    edges = (
+        calls.drop_nulls("dst")
+        .filter(pl.col("station_idx") != pl.col("dst"))
+        .group_by(pl.col("station_idx").alias("src"), "dst")
+        .agg(pl.col("per_day").sum().alias("w"))
+        .sort("src", "dst")
+    )
+    src = edges["src"].to_numpy()
+    dst = edges["dst"].to_numpy()
+    w = edges["w"].to_numpy()
+    pers = None
+    if personalized:
+        pers = np.bincount(src, weights=w, minlength=n)
+
+    if backend in ("auto", "gpu"):
+        try:
+            import cudf
+            import cugraph
+
+            G = cugraph.Graph(directed=True)
+            G.from_cudf_edgelist(
+                cudf.DataFrame({"src": src, "dst": dst, "w": w}),
+                source="src", destination="dst", edge_attr="w",
+            )
+            kw = {}
+            if pers is not None:
+                nz = np.flatnonzero(pers)
+                kw["personalization"] = cudf.DataFrame(
+                    {"vertex": nz, "values": pers[nz] / pers.sum()})
+            pr = cugraph.pagerank(G, alpha=alpha, tol=tol,
+                                  max_iter=max_iter, **kw).to_pandas()
+            scores = np.zeros(n)
+            scores[pr["vertex"].to_numpy()] = pr["pagerank"].to_numpy()
+            return scores, "gpu", None
+        except Exception:
+            if backend == "gpu":
+                raise
+    indptr = np.r_[0, np.cumsum(np.bincount(src, minlength=n))]
+    scores, iters = csr_pagerank(indptr, dst, w, alpha=alpha,
+                                 personalization=pers, tol=tol,
+                                 max_iter=max_iter)
+    return scores, "cpu", iters
+
+
+@app.function
+def top_k_hubs(stations, scores, k: int):
+    """The hub set from a station ranking: the `k` best-scored
+    stations (`scores` indexed by station_idx, ties by station_idx)
+    as an optimal_hubs frame — station_idx in the stations table's
+    dtype, station_feature_id, station_name, pagerank."""
+    import numpy as np
+    import polars as pl
+
+    top = np.argsort(-np.asarray(scores), kind="stable")[:k]
+    pick = pl.DataFrame({"station_idx": top, "pagerank": scores[top]})
+    return (
+        stations
+        .select("station_idx", "station_feature_id", "station_name")
+        .join(pick.with_columns(pl.col("station_idx").cast(
+                  stations.schema["station_idx"])),
+              on="station_idx", how="inner")
+        .sort("pagerank", "station_idx", descending=[True, False])
+    )
+
+
+@app.class_definition
+# KEEP IN SYNC with notebooks/gtfs-austria.py — the R10 Transitous gates
+# in both notebooks share this client.
+class MotisClient:
+    """Concurrent, rate-limited client for MOTIS /api/v5/plan.
+
+    * Token bucket: on average at most `rate_per_s` requests per
+      second, at most `burst` back-to-back — the Transitous AUP asks
+      for polite request rates, so concurrency never means more load.
+    * Coalescing: concurrent `plan()` calls with the same cache key
+      share ONE in-flight request.
+    * Retries: timeouts, connection errors, HTTP 429 and 5xx are
+      retried up to `retries` times with exponential backoff and full
+      jitter (a 429's Retry-After is honoured); other 4xx fail at once.
+
+    Caching stays with the caller: `plan()` only does HTTP and raises
+    on the final failure. `map(fn, items)` runs `fn` over `items` on
+    `workers` threads and returns the results in input order."""
+
+    def __init__(self, base_url: str, user_agent: str, *,
+                 rate_per_s: float = 2.0, burst: int = 4,
+                 workers: int = 4, timeout: float = 25,
+                 retries: int = 3, backoff_s: float = 1.0):
+        import threading
+
+        self.base_url = base_url.rstrip("/")
+        self.user_agent = user_agent
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self.workers = workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.stats = {"requests": 0, "retries": 0, "coalesced": 0}
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._stamp = None
+        self._inflight = {}
+
+    def _acquire(self):
+        # Refill by elapsed time, take one token, or sleep until the
+        # next one is due. The lock is never held while sleeping.
+        import time
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self._stamp is not None:
+                    self._tokens = min(
+                        float(self.burst),
+                        self._tokens + (now - self._stamp) * self.rate_per_s,
+                    )
+                self._stamp = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate_per_s
+            time.sleep(wait)
+
+    def _fetch(self, params):
+        import json
+        import random
+        import time
+        import urllib.error
+        import urllib.parse
+        import urllib.request
+
+        url = f"{self.base_url}/plan?" + urllib.parse.urlencode(params)
+        req = urllib.request.Request(url, headers={
+            "User-Agent": self.user_agent, "Accept": "application/json"})
+        for attempt in range(self.retries + 1):
+            self._acquire()
+            retry_after = None
+            try:
+                with self._lock:
+                    self.stats["requests"] += 1
+                with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                    return json.loads(resp.read().decode())
+            except urllib.error.HTTPError as exc:
+                if exc.code != 429 and exc.code < 500:
+                    raise
+                if attempt == self.retries:
+                    raise
+                try:
+                    retry_after = float(exc.headers.get("Retry-After") or "")
+                except ValueError:
+                    retry_after = None
+            except (urllib.error.URLError, TimeoutError, ConnectionError):
+                if attempt == self.retries:
+                    raise
+            with self._lock:
+                self.stats["retries"] += 1
+            time.sleep(retry_after if retry_after is not None
+                       else random.uniform(0, self.backoff_s * 2 ** attempt))
+
+    def plan(self, key: str, params: list) -> dict:
+        """MOTIS /plan response for `params` (urlencode pairs). Callers
+        asking for the same `key` while a request is in flight wait for
+        it instead of issuing their own."""
+        from concurrent.futures import Future
+
+        with self._lock:
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+        if not owner:
+            return fut.result()
+        try:
+            fut.set_result(self._fetch(params))
+        except BaseException as exc:  # noqa: BLE001 — re-raised below
+            fut.set_exception(exc)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return fut.result()
+
+    def map(self, fn, items) -> list:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(fn, items))
+
+
+@app.class_definition
+# KEEP IN SYNC with notebooks/gtfs-austria.py — the R10 Transitous gates
+# in both notebooks share this store.
+class MotisResponseStore:
+    """Single-file SQLite store for R10 MOTIS responses.
+
+    One row per canonical request tuple (the JSON-serialised request
+    dict, keys sorted): the zlib-compressed response body next to the
+    gate's pre-extracted `summary` (a small JSON dict) and its
+    duration / transfers / trip-id columns for ad-hoc SQL. `get()`
+    returns only the summary, so a warm gate run is one indexed lookup
+    per test — no per-response file stat / read / full JSON parse.
+
+    Rows carry the `schema_version` they were written under. A store
+    opened with a different version drops the stale rows and VACUUMs
+    (`compact()`), so a version bump invalidates instead of orphaning.
+    Thread-safe: one connection behind a lock (the gates look up from
+    MotisClient's worker threads)."""
+
+    def __init__(self, path, schema_version: int):
+        import sqlite3
+        import threading
+        from pathlib import Path
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.schema_version = int(schema_version)
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "compacted": 0}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            str(self.path), check_same_thread=False, isolation_level=None,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " request TEXT PRIMARY KEY,"
+            " schema_version INTEGER NOT NULL,"
+            " fetched_utc TEXT NOT NULL,"
+            " is_error INTEGER NOT NULL,"
+            " duration_s INTEGER,"
+            " n_transfers INTEGER,"
+            " trip_ids TEXT,"
+            " summary TEXT NOT NULL,"
+            " body BLOB NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_version"
+            " ON responses (schema_version)"
+        )
+        stale = self._db.execute(
+            "SELECT 1 FROM responses WHERE schema_version <> ? LIMIT 1",
+            (self.schema_version,),
+        ).fetchone()
+        if stale:
+            self.compact()
+
+    @staticmethod
+    def request_key(request: dict) -> str:
+        import json
+
+        return json.dumps(request, sort_keys=True, separators=(",", ":"))
+
+    def get(self, request: dict):
+        """Summary dict stored for `request`, or None on a miss."""
+        import json
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT summary FROM responses"
+                " WHERE request = ? AND schema_version = ?",
+                (self.request_key(request), self.schema_version),
+            ).fetchone()
+            self.stats["hits" if row else "misses"] += 1
+        return json.loads(row[0]) if row else None
+
+    def response(self, request: dict):
+        """The full stored response for `request` (decompressed), or
+        None. Not on the gate's hot path — for digging into a verdict."""
+        import json
+        import zlib
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body FROM responses"
+                " WHERE request = ? AND schema_version = ?",
+                (self.request_key(request), self.schema_version),
+            ).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def put(self, request: dict, response: dict, summary: dict):
+        """Store `response` under `request`. `summary` is what `get()`
+        returns; its `best` entry (duration_s / n_transfers / trip_ids)
+        is also written to the indexed columns."""
+        import json
+        import zlib
+        from datetime import datetime, timezone
+
+        best = summary.get("best") or {}
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?,?,?,?,?,?,?,?,?)",
+                (
+                    self.request_key(request), self.schema_version,
+                    datetime.now(timezone.utc).isoformat(),
+                    int("_error" in summary),
+                    best.get("duration_s"), best.get("n_transfers"),
+                    json.dumps(best.get("trip_ids")) if best else None,
+                    json.dumps(summary),
+                    zlib.compress(json.dumps(response).encode(), 6),
+                ),
+            )
+            self.stats["writes"] += 1
+
+    def compact(self, drop_errors: bool = False) -> int:
+        """Delete rows from other schema versions (and, optionally,
+        cached errors so they are re-fetched), then VACUUM. Returns the
+        number of rows removed."""
+        with self._lock:
+            n = self._db.execute(
+                "DELETE FROM responses WHERE schema_version <> ?"
+                + (" OR is_error = 1" if drop_errors else ""),
+                (self.schema_version,),
+            ).rowcount
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._db.execute("VACUUM")
+            self.stats["compacted"] += n
+        return n
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM responses WHERE schema_version = ?",
+                (self.schema_version,),
+            ).fetchone()[0]
+
+
+@app.class_definition
+class TegBakeCPU:
+    """CPU backend for the graph DAG's hub bake: the hub-pair table
+    (hub_pair_routes) and the per-station hub labels (hub_labels) from
+    rail_stop_times, without cuDF / cuGraph.
+
+    The GPU bake runs `cugraph.sssp` over the time-expanded graph
+    (TEG): event nodes per call, ride edges along each trip, transfer
+    edges between an arrival and the departures at the same station
+    TEG_TRANSFER_MIN_WAIT_S..TEG_TRANSFER_MAX_WAIT_S later, one layer
+    per transfer count (nTr = 0..TEG_MAX_TRANSFERS). Here the same
+    graph is searched implicitly, trip-based: round r holds the trip
+    boardings reachable with r transfers; riding a boarding yields the
+    trip's onward arrival events, and transfer edges are a
+    `searchsorted` range into the departure index sorted by (station,
+    dep_s). Every hub of a chunk is a source of the same pass (multi-
+    source), and a trip already boarded at an earlier call in an
+    earlier round is only ridden up to that call — each (hub, call)
+    arrival event is produced once, so a (weekday, window) costs one
+    linear sweep per round instead of one SSSP per hub.
+
+    Per (weekday bit, 1h window) and hub, sources board at the hub in
+    [window start, window end); a hub pair's route is the destination
+    hub's earliest arrival, the Pareto frontier on (travel_s, nTr) the
+    SSSP's node identity gives. hub_labels keep the GPU table's
+    meaning: each station's `k_local` nearest hubs by best travel_s,
+    with every Pareto layer of those hubs, read off the same per-hub
+    search. The per-layer labels come from one K-bounded pass over all
+    hubs per direction (`_label_search`): per nTr layer, each
+    station's `k_local` nearest hubs — hub → station on the timetable
+    (hub_labels_layered, travel_s from the window start) and station
+    → hub on the reversed one (hub_labels_backward, the window being
+    the hub arrival's). `bake()` fans the (weekday, window) tasks out
+    over forked worker processes."""
+
+    _T_BITS = 20                        # dep_s < 2**20 s (~12 days)
+
+    def __init__(self, rail_stop_times, stations, hubs, *,
+                 max_transfers: int = 4, min_wait_s: int = 60,
+                 max_wait_s: int = 3600, horizon_s: int = 12 * 3600,
+                 k_local: int = 8):
+        import numpy as np
+        import polars as pl
+
+        idx_of = stations.select(
+            "station_feature_id", pl.col("station_idx").cast(pl.Int64))
+        calls = (
+            rail_stop_times
+            .join(idx_of, on="station_feature_id", how="inner")
+            .sort("trip_id", "stop_sequence")
+            .select(
+                "trip_id", "station_feature_id", "station_idx",
+                pl.col("arr_s").cast(pl.Int64),
+                pl.col("dep_s").cast(pl.Int64),
+                pl.col("runs_dow").fill_null(127).cast(pl.Int64),
+            )
+        )
+        trips = calls.group_by("trip_id", maintain_order=True).agg(
+            pl.len().alias("n"), pl.col("runs_dow").first())
+        self.trip_ids = trips["trip_id"].to_list()
+        self.trip_dow = trips["runs_dow"].to_numpy()
+        n = trips["n"].cast(pl.Int64).to_numpy()
+        self.off = np.r_[0, np.cumsum(n)]
+        self.c_trip = np.repeat(np.arange(n.size), n)
+        self.c_st = calls["station_idx"].to_numpy()
+        self.c_arr = calls["arr_s"].to_numpy()
+        self.c_dep = calls["dep_s"].to_numpy()
+        self.n_st = int(max(idx_of["station_idx"].max(),
+                            self.c_st.max(initial=0))) + 1
+        self.sfid_of = dict(zip(idx_of["station_idx"].to_list(),
+                                idx_of["station_feature_id"].to_list()))
+        self.hubs = np.array(sorted(
+            hubs["station_idx"].cast(pl.Int64).to_list()), np.int64)
+        self._index()
+        self.max_transfers = max_transfers
+        self.min_wait_s = min_wait_s
+        self.max_wait_s = max_wait_s
+        self.horizon_s = horizon_s
+        self.k_local = k_local
+        self.t_rev = None               # set on the reversed copy
+        self._rev = None
+
+    def _index(self):
+        """Departure index over boardable calls (a trip's last call has
+        no onward ride), sorted by (station, dep_s)."""
+        import numpy as np
+
+        last = np.zeros(self.c_st.size, bool)
+        last[self.off[1:] - 1] = True
+        bi = np.flatnonzero(~last)
+        key = (self.c_st[bi] << self._T_BITS) | self.c_dep[bi]
+        order = np.argsort(key, kind="stable")
+        self.d_key = key[order]
+        self.d_call = bi[order]
+
+    def backward(self):
+        """The timetable reversed in time (cached): t → t_rev − t, calls
+        of each trip in reverse order, arrivals and departures swapped.
+        A forward search on it from the hubs is a search *to* the hubs
+        on the real timetable — transfer windows are symmetric, so the
+        same TEG edges exist in both."""
+        import copy
+        import numpy as np
+
+        if self._rev is None:
+            rev = copy.copy(self)
+            span = int(max(self.c_arr.max(initial=0), self.c_dep.max(initial=0)))
+            rev.t_rev = max(24, span // 3600 + 1) * 3600
+            i = np.arange(self.c_st.size)
+            j = self.off[self.c_trip] + self.off[self.c_trip + 1] - 1 - i
+            rev.c_st = self.c_st[j]
+            rev.c_arr = rev.t_rev - self.c_dep[j]
+            rev.c_dep = rev.t_rev - self.c_arr[j]
+            rev._index()
+            self._rev = rev
+        return self._rev
+
+    @staticmethod
+    def _expand(starts, ends):
+        """Row index + position for every i in [starts[r], ends[r])."""
+        import numpy as np
+
+        n = np.maximum(ends - starts, 0)
+        rows = np.repeat(np.arange(n.size), n)
+        first = np.cumsum(n) - n
+        return rows, starts[rows] + np.arange(rows.size) - first[rows]
+
+    def _search(self, wd_bit, win_lo, win_hi, hubs):
+        """One multi-source pass. Returns (labels, reach, boards):
+        labels[r] is the (len(hubs), n_st) earliest arrival with ≤ r
+        transfers; reach[r] the arrival event (boarding id, call)
+        behind each label; boards the (trip, call, parent) of every
+        boarding id, for backtracking."""
+        import numpy as np
+
+        T, INF = self._T_BITS, np.iinfo(np.int64).max
+        h = hubs.size
+        n_trips = len(self.trip_ids)
+        boarded = np.full((h, n_trips), INF, np.int64)   # min call
+        best = np.full((h, self.n_st), INF, np.int64)
+        via = np.full((h, self.n_st, 2), -1, np.int64)
+        labels, reach = [], []
+        bt = bc = bp = np.zeros(0, np.int64)
+        cap = win_lo + self.horizon_s
+
+        # Round 0: depart the hub inside the window.
+        s = np.searchsorted(self.d_key, (hubs << T) + win_lo)
+        e = np.searchsorted(self.d_key, (hubs << T) + win_hi)
+        k, p = self._expand(s, e)
+        call = self.d_call[p]
+        parent = np.full(k.size, -1, np.int64)
+        for rnd in range(self.max_transfers + 1):
+            trip = self.c_trip[call]
+            ok = (self.trip_dow[trip] & wd_bit) != 0
+            k, call, trip, parent = k[ok], call[ok], trip[ok], parent[ok]
+            if not k.size:
+                break
+            # Earliest call per (source, trip); earlier rounds win.
+            order = np.lexsort((call, trip, k))
+            k, call, trip, parent = (x[order] for x in (k, call, trip, parent))
+            first = np.r_[True, (k[1:] != k[:-1]) | (trip[1:] != trip[:-1])]
+            k, call, trip, parent = (x[first] for x in (k, call, trip, parent))
+            prev = boarded[k, trip]
+            new = call < prev
+            k, call, trip, parent, prev = (
+                x[new] for x in (k, call, trip, parent, prev))
+            if not k.size:
+                break
+            boarded[k, trip] = call
+            bid = bt.size + np.arange(k.size)
+            bt, bc, bp = np.r_[bt, trip], np.r_[bc, call], np.r_[bp, parent]
+
+            # Ride to the onward calls not already ridden from an
+            # earlier boarding of the same trip (fewer transfers).
+            end = np.minimum(prev, self.off[trip + 1] - 1)
+            r, c = self._expand(call + 1, end + 1)
+            ek, est, ea, eb = k[r], self.c_st[c], self.c_arr[c], bid[r]
+            live = (ea >= 0) & (ea <= cap)
+            ek, est, ea, eb, c = (x[live] for x in (ek, est, ea, eb, c))
+            # Labels: earliest arrival per (source, station).
+            if ek.size:
+                g = ek * self.n_st + est
+                order = np.lexsort((ea, g))
+                g_s, a_s = g[order], ea[order]
+                head = order[np.r_[True, g_s[1:] != g_s[:-1]]]
+                better = ea[head] < best.ravel()[g[head]]
+                head = head[better]
+                best.ravel()[g[head]] = ea[head]
+                via.reshape(-1, 2)[g[head]] = np.c_[eb[head], c[head]]
+            labels.append(best.copy())
+            reach.append(via.copy())
+            if rnd == self.max_transfers or not ek.size:
+                break
+
+            # Transfer edges: departures at the same station
+            # [a + min_wait, a + max_wait] after each arrival. Merge
+            # each (source, station)'s windows first so a departure
+            # is expanded once, then board it from the latest arrival
+            # that reaches it.
+            a_lo, a_hi = ea[order] + self.min_wait_s, ea[order] + self.max_wait_s
+            gid = np.cumsum(np.r_[True, g_s[1:] != g_s[:-1]])
+            run = np.maximum.accumulate((gid << 42) + a_hi) - (gid << 42)
+            start = np.r_[True, (g_s[1:] != g_s[:-1]) | (a_lo[1:] > run[:-1])]
+            stop = np.r_[start[1:], True]
+            st_s = est[order]
+            s1 = np.searchsorted(self.d_key, (st_s[start] << T) + a_lo[start])
+            e1 = np.searchsorted(self.d_key, (st_s[stop] << T) + run[stop],
+                                 side="right")
+            r2, p2 = self._expand(s1, e1)
+            dcall = self.d_call[p2]
+            dkey_g = g_s[start][r2]
+            # Latest arrival in the group with a ≤ dep − min_wait.
+            ev_key = (g_s << T) + a_s
+            j = np.searchsorted(
+                ev_key, (dkey_g << T) + self.c_dep[dcall] - self.min_wait_s,
+                side="right",
+            ) - 1
+            src = order[j]
+            keep = self.c_trip[dcall] != self.c_trip[c[src]]
+            k, call, parent = ek[src][keep], dcall[keep], eb[src][keep]
+        return labels, reach, (bt, bc, bp)
+
+    def _chain(self, boards, b):
+        """Trip ids + first departure of boarding `b`'s journey."""
+        bt, bc, bp = boards
+        trips = []
+        while True:
+            trips.append(self.trip_ids[int(bt[b])])
+            if bp[b] < 0:
+                return trips[::-1], int(self.c_dep[bc[b]])
+            b = int(bp[b])
+
+    @staticmethod
+    def _topk(grp, key, hub, cand, top_k, top_h, top_x, x):
+        """Merge candidate (grp, key, hub, x) rows into the bounded
+        per-group lists top_k / top_h / top_x — each group's K best
+        (key, hub) pairs with one entry per hub, sorted — in place.
+        Returns which candidates entered their list and, for those,
+        the key the same hub held there before (INF if none)."""
+        import numpy as np
+
+        INF = np.iinfo(np.int64).max
+        K = top_k.shape[1]
+        ug = np.unique(grp)
+        old = top_h[ug] >= 0
+        og = np.repeat(ug, K)[old.ravel()]
+        g = np.r_[og, grp]
+        k = np.r_[top_k[ug][old], key]
+        h = np.r_[top_h[ug][old], hub]
+        xx = np.r_[top_x[ug][old], x]
+        new = np.r_[np.zeros(og.size, bool), cand]
+        idx = np.r_[np.full(og.size, -1), np.arange(grp.size)]
+        # One row per (group, hub): the smaller key, the old entry on a
+        # tie; the loser's key is the hub's previous one.
+        order = np.lexsort((new, -xx, k, h, g))
+        g, k, h, xx, new, idx = (v[order] for v in (g, k, h, xx, new, idx))
+        head = np.r_[True, (g[1:] != g[:-1]) | (h[1:] != h[:-1])]
+        prev = np.where(np.r_[~head[1:], False], np.r_[k[1:], INF], INF)
+        g, k, h, xx, new, idx, prev = (
+            v[head] for v in (g, k, h, xx, new, idx, prev))
+        # Keep each group's K best.
+        order = np.lexsort((h, k, g))
+        g, k, h, xx, new, idx, prev = (
+            v[order] for v in (g, k, h, xx, new, idx, prev))
+        start = np.r_[0, np.flatnonzero(g[1:] != g[:-1]) + 1]
+        rank = np.arange(g.size) - np.repeat(start, np.diff(np.r_[start, g.size]))
+        keep = rank < K
+        top_k[ug], top_h[ug], top_x[ug] = INF, -1, -1
+        top_k[g[keep], rank[keep]] = k[keep]
+        top_h[g[keep], rank[keep]] = h[keep]
+        top_x[g[keep], rank[keep]] = xx[keep]
+        entered = np.zeros(grp.size, bool)
+        was = np.full(grp.size, INF, np.int64)
+        sel = keep & new
+        entered[idx[sel]] = True
+        was[idx[sel]] = prev[sel]
+        return entered, was
+
+    def _label_search(self, wd_bit, win_lo, win_hi):
+        """K-bounded multi-source pass from every hub at once, boarding
+        at the hub in [win_lo, win_hi). Returns the seed and one
+        snapshot per round r of (arrival, hub, origin) per station:
+        its `k_local` earliest arrivals with ≤ r transfers from
+        distinct hubs, and the hub departure each journey started with.
+
+        Two bounded lists prune the search, both exactly:
+          - per trip, the K earliest boardings (call, hub). A boarding
+            with K other hubs on the same trip at an earlier call only
+            repeats their arrivals, so it is not ridden; each trip
+            segment is ridden by at most K hubs.
+          - per station, the K best labels. An arrival with K other
+            hubs there no later is no label, and only transfers to the
+            departures none of them can still wait for (past the
+            earliest one's max-wait) are expanded.
+        A round with no boarding left ends the search, so the cost
+        follows K rather than the number of hubs."""
+        import numpy as np
+
+        T, K = self._T_BITS, self.k_local
+        INF = np.iinfo(np.int64).max
+        n_trips = len(self.trip_ids)
+        cap = win_lo + self.horizon_s
+        top_a = np.full((self.n_st, K), INF, np.int64)
+        top_h = np.full((self.n_st, K), -1, np.int64)
+        top_o = np.full((self.n_st, K), -1, np.int64)
+        top_a[self.hubs, 0] = win_lo                  # source itself
+        top_h[self.hubs, 0] = self.hubs
+        top_o[self.hubs, 0] = win_lo
+        tb_c = np.full((n_trips, K), INF, np.int64)
+        tb_h = np.full((n_trips, K), -1, np.int64)
+        tb_o = np.full((n_trips, K), -1, np.int64)
+        snaps = [(top_a.copy(), top_h.copy(), top_o.copy())]
+
+        # Round 0: depart a hub inside the window.
+        s = np.searchsorted(self.d_key, (self.hubs << T) + win_lo)
+        e = np.searchsorted(self.d_key, (self.hubs << T) + win_hi)
+        k, p = self._expand(s, e)
+        h = self.hubs[k]
+        call = self.d_call[p]
+        o = self.c_dep[call]
+        for rnd in range(self.max_transfers + 1):
+            trip = self.c_trip[call]
+            # Only a boarding no later than the trip's K-th can enter
+            # its list.
+            ok = (((self.trip_dow[trip] & wd_bit) != 0)
+                  & (call <= tb_c[trip, K - 1]))
+            h, call, trip, o = h[ok], call[ok], trip[ok], o[ok]
+            if not h.size:
+                break
+            # Earliest call per (hub, trip), then the trip's K list.
+            order = np.lexsort((-o, call, trip, h))
+            h, call, trip, o = (x[order] for x in (h, call, trip, o))
+            first = np.r_[True, (h[1:] != h[:-1]) | (trip[1:] != trip[:-1])]
+            h, call, trip, o = (x[first] for x in (h, call, trip, o))
+            go, prev = self._topk(trip, call, h, np.ones(h.size, bool),
+                                  tb_c, tb_h, tb_o, o)
+            h, call, trip, o, prev = (x[go] for x in (h, call, trip, o, prev))
+            if not h.size:
+                break
+
+            # Ride up to the hub's own earlier boarding of the trip.
+            end = np.minimum(prev, self.off[trip + 1] - 1)
+            r, c = self._expand(call + 1, end + 1)
+            eh, est, ea, eo = h[r], self.c_st[c], self.c_arr[c], o[r]
+            live = (ea >= 0) & (ea <= cap)
+            eh, est, ea, eo = (x[live] for x in (eh, est, ea, eo))
+            if not eh.size:
+                snaps.append((top_a.copy(), top_h.copy(), top_o.copy()))
+                break
+            # Earliest arrival per (hub, station) into the station lists;
+            # only arrivals no later than a list's K-th can enter it.
+            g = eh * self.n_st + est
+            u = np.flatnonzero(ea <= top_a[est, K - 1])
+            u = u[np.lexsort((-eo[u], (g[u] << T) + ea[u]))]
+            if u.size:
+                u = u[np.r_[True, g[u][1:] != g[u][:-1]]]
+                self._topk(est[u], ea[u], eh[u], np.ones(u.size, bool),
+                           top_a, top_h, top_o, eo[u])
+            snaps.append((top_a.copy(), top_h.copy(), top_o.copy()))
+            if rnd == self.max_transfers:
+                break
+
+            # Transfer windows [a + min_wait, a + max_wait], cut below
+            # when K other hubs reached the station no later.
+            ta, th = top_a[est], top_h[est]
+            before = ((ta < ea[:, None])
+                      | ((ta == ea[:, None]) & (th < eh[:, None])))
+            dom = (before & (th >= 0) & (th != eh[:, None])).sum(1) == K
+            lo = ea + self.min_wait_s
+            lo[dom] = np.maximum(lo[dom], ta[dom, 0] + self.max_wait_s + 1)
+            hi = ea + self.max_wait_s
+            # Merge each (hub, station)'s windows so a departure is
+            # expanded once; board it with the origin of the latest
+            # arrival that reaches it.
+            live = np.flatnonzero(lo <= hi)
+            live = live[np.argsort((g[live] << T) + lo[live])]
+            gi, li, hi_i = g[live], lo[live], hi[live]
+            if gi.size:
+                gid = np.cumsum(np.r_[True, gi[1:] != gi[:-1]])
+                run = np.maximum.accumulate((gid << 42) + hi_i) - (gid << 42)
+                start = np.r_[True, (gi[1:] != gi[:-1]) | (li[1:] > run[:-1])]
+                stop = np.r_[start[1:], True]
+                st_i = gi % self.n_st
+                s1 = np.searchsorted(self.d_key, (st_i[start] << T) + li[start])
+                e1 = np.searchsorted(self.d_key, (st_i[stop] << T) + run[stop],
+                                     side="right")
+                r2, p2 = self._expand(s1, e1)
+            else:
+                r2 = p2 = np.zeros(0, np.int64)
+            if not r2.size:
+                break
+            dcall = self.d_call[p2]
+            dg = gi[start][r2]
+            ev_key = (g << T) + ea
+            order = np.argsort(ev_key)
+            ev_key = ev_key[order]
+            j = np.searchsorted(
+                ev_key, (dg << T) + self.c_dep[dcall] - self.min_wait_s,
+                side="right",
+            ) - 1
+            src = order[j]
+            h, call, o = eh[src], dcall, eo[src]
+        return snaps
+
+    def _label_rows(self, snaps):
+        """(hub, station, arrival, origin, nTr) rows of a label search:
+        the seeds, then per round the entries that are new in it — a
+        hub that entered a station's list, or improved its arrival."""
+        import numpy as np
+
+        seed_a, seed_h, seed_o = snaps[0]
+        st = np.flatnonzero(seed_h[:, 0] >= 0)
+        rows = [(seed_h[st, 0], st, seed_a[st, 0], seed_o[st, 0],
+                 np.zeros(st.size, np.int64))]
+        for ntr in range(1, len(snaps)):
+            (pa, ph, _), (ca, ch, co) = snaps[ntr - 1], snaps[ntr]
+            same = ((ch[:, :, None] == ph[:, None, :])
+                    & (ca[:, :, None] == pa[:, None, :])).any(2)
+            v, j = np.nonzero((ch >= 0) & ~same)
+            rows.append((ch[v, j], v, ca[v, j], co[v, j],
+                         np.full(v.size, ntr - 1)))
+        return tuple(np.concatenate(c).astype(np.int64) for c in zip(*rows))
+
+    def window(self, wd_bit, win_idx, hub_chunk=8):
+        """(hub-pair rows, label rows, forward layer rows, backward
+        layer rows) of one (weekday, window). Label rows are every
+        hub's Pareto layers at every station, from the hub-pair search.
+        Forward layer rows run hub → station with the hub departure in
+        the window; backward ones station → hub with the hub *arrival*
+        in it, from the same bounded search on the reversed
+        timetable."""
+        import numpy as np
+
+        win_lo = win_idx * 3600
+        INF = np.iinfo(np.int64).max
+        hp, lab = [], []
+        for i in range(0, self.hubs.size, hub_chunk):
+            hubs = self.hubs[i:i + hub_chunk]
+            labels, reach, boards = self._search(
+                wd_bit, win_lo, win_lo + 3600, hubs)
+            # Pareto layers: a layer's label only where it improves
+            # on the layer below.
+            prev = np.full((hubs.size, self.n_st), INF, np.int64)
+            prev[np.arange(hubs.size), hubs] = win_lo    # source itself
+            lab.append((hubs, hubs, np.zeros(hubs.size, np.int64),
+                        np.zeros(hubs.size, np.int64)))
+            for ntr, cur in enumerate(labels):
+                hk, st = np.nonzero(cur < prev)
+                lab.append((hubs[hk], st, cur[hk, st] - win_lo,
+                            np.full(hk.size, ntr)))
+                prev = np.minimum(prev, cur)
+            # Hub pairs: each destination hub's earliest arrival, on
+            # the lowest layer that reaches it, traced to its trips.
+            final = labels[-1] if labels else prev
+            for hk, o in enumerate(hubs.tolist()):
+                for d in self.hubs.tolist():
+                    if d == o or final[hk, d] == INF:
+                        continue
+                    ntr = next(n for n, l in enumerate(labels)
+                               if l[hk, d] == final[hk, d])
+                    b, _ = reach[ntr][hk, d]
+                    chain, first_dep = self._chain(boards, int(b))
+                    arr = int(final[hk, d])
+                    hp.append({
+                        "origin_hub_idx": o, "dest_hub_idx": d,
+                        "origin_hub_sfid": self.sfid_of[o],
+                        "dest_hub_sfid": self.sfid_of[d],
+                        "window_idx": win_idx, "weekday_mask": wd_bit,
+                        "first_dep_s": first_dep, "arr_s": arr,
+                        "travel_min": round((arr - first_dep) / 60),
+                        "n_transfers": len(chain) - 1,
+                        "trip_chain": chain,
+                    })
+        fwd = self._label_rows(
+            self._label_search(wd_bit, win_lo, win_lo + 3600))
+        rev = self.backward()
+        r_lo = rev.t_rev - win_lo - 3600
+        bwd = rev._label_rows(rev._label_search(wd_bit, r_lo, r_lo + 3600))
+        return hp, lab, fwd, bwd
+
+    def _labels(self, lab, wd_bit, win_idx):
+        """hub_labels rows of one window, each station's `k_local`
+        nearest hubs (by best travel_s over the nTr layers) only."""
+        import numpy as np
+        import polars as pl
+
+        h, s, t, n = (np.concatenate(col).astype(np.int64)
+                      for col in zip(*lab))
+        df = pl.DataFrame({"hub_idx": h, "station_idx": s,
+                           "travel_s": t, "n_transfers": n})
+        near = (
+            df.group_by("station_idx", "hub_idx")
+            .agg(pl.col("travel_s").min().alias("_best"))
+            .sort("station_idx", "_best", "hub_idx")
+            .group_by("station_idx", maintain_order=True)
+            .head(self.k_local)
+            .drop("_best")
+        )
+        return df.join(near, on=["station_idx", "hub_idx"]).select(
+            pl.col("hub_idx").cast(pl.Int32),
+            pl.col("station_idx").cast(pl.Int32),
+            pl.lit(wd_bit, pl.Int32).alias("weekday_mask"),
+            pl.lit(win_idx, pl.Int32).alias("window_idx"),
+            pl.col("travel_s").cast(pl.Int32),
+            pl.col("n_transfers").cast(pl.Int32),
+        )
+
+    def _layer_labels(self, rows, wd_bit, win_idx, t_rev=None):
+        """hub_labels_layered / hub_labels_backward rows of one window.
+        Forward: travel_s from the window start. Backward (`t_rev` given): back on the real clock,
+        dep_s the departure from the station and travel_s the ride to
+        the hub."""
+        import polars as pl
+
+        h, s, a, o, n = rows
+        cols = {"hub_idx": h, "station_idx": s}
+        if t_rev is None:
+            cols["travel_s"] = a - win_idx * 3600
+        else:
+            cols["dep_s"] = t_rev - a
+            cols["travel_s"] = a - o
+        return pl.DataFrame({**cols, "n_transfers": n}).select(
+            pl.col("hub_idx").cast(pl.Int32),
+            pl.col("station_idx").cast(pl.Int32),
+            pl.lit(wd_bit, pl.Int32).alias("weekday_mask"),
+            pl.lit(win_idx, pl.Int32).alias("window_idx"),
+            *([] if t_rev is None else [pl.col("dep_s").cast(pl.Int32)]),
+            pl.col("travel_s").cast(pl.Int32),
+            pl.col("n_transfers").cast(pl.Int32),
+        )
+
+    def _frames(self, wd_bit, win_idx, hp, lab, fwd, bwd):
+        """(hub_pair_routes, hub_labels, hub_labels_layered,
+        hub_labels_backward) frames of one window's rows."""
+        import polars as pl
+
+        i32 = pl.Int32
+        hp_df = pl.DataFrame(hp, schema={
+            "origin_hub_idx": i32, "dest_hub_idx": i32,
+            "origin_hub_sfid": pl.Utf8, "dest_hub_sfid": pl.Utf8,
+            "window_idx": i32, "weekday_mask": i32,
+            "first_dep_s": i32, "arr_s": i32, "travel_min": i32,
+            "n_transfers": i32, "trip_chain": pl.List(pl.Utf8),
+        })
+        return (hp_df, self._labels(lab, wd_bit, win_idx),
+                self._layer_labels(fwd, wd_bit, win_idx),
+                self._layer_labels(bwd, wd_bit, win_idx,
+                                   self.backward().t_rev))
+
+    def bake(self, tasks, workers=None):
+        """Run `tasks` [(weekday bit, window idx)] over `workers`
+        forked processes and return the (hub_pair_routes, hub_labels,
+        hub_labels_layered, hub_labels_backward) frames in a
+        deterministic row order.
+        Workers inherit the timetable arrays, reversed copy included
+        (nothing is pickled in), and stay numpy-only —
+        polars' thread pool does not survive a fork — so frames are
+        built here from the rows they send back."""
+        import multiprocessing as mp
+        import os
+        import queue
+        import polars as pl
+
+        tasks = list(tasks)
+        workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+        self.backward()
+        if workers == 1:
+            rows = [(t, self.window(*t)) for t in tasks]
+        else:
+            ctx = mp.get_context("fork")
+            done = ctx.Queue()
+
+            def run(mine):
+                for t in mine:
+                    try:
+                        done.put((t, self.window(*t), None))
+                    except Exception as e:
+                        done.put((t, None, repr(e)))
+
+            procs = [ctx.Process(target=run, args=(tasks[i::workers],),
+                                 daemon=True)
+                     for i in range(workers)]
+            for p in procs:
+                p.start()
+            rows = []
+            try:
+                while len(rows) < len(tasks):
+                    # Bounded wait: a worker that is OOM-killed (or dies
+                    # hard) never reports, so check on the processes
+                    # instead of blocking on the queue forever.
+                    try:
+                        t, out, err = done.get(timeout=5)
+                    except queue.Empty:
+                        codes = [p.exitcode for p in procs]
+                        if (any(c not in (None, 0) for c in codes)
+                                or not any(p.is_alive() for p in procs)):
+                            raise RuntimeError(
+                                f"TEG bake workers exited with "
+                                f"{len(tasks) - len(rows)} task(s) "
+                                f"unreported (exit codes {codes}; -9 is "
+                                "usually the OOM killer — lower "
+                                "GRAPH_BAKE_WORKERS)") from None
+                        continue
+                    if err is not None:
+                        raise RuntimeError(f"TEG bake task {t} failed: {err}")
+                    rows.append((t, out))
+            finally:
+                failed = len(rows) < len(tasks)
+                for p in procs:
+                    if failed:
+                        p.terminate()
+                    p.join()
+        parts = [self._frames(*t, *out) for t, out in rows]
+        hp = pl.concat([p[0] for p in parts]).sort(
+            "origin_hub_idx", "dest_hub_idx", "weekday_mask", "window_idx")
+        hl, hll, hlb = (
+            pl.concat([p[i] for p in parts]).sort(
+                "station_idx", "hub_idx", "weekday_mask", "window_idx",
+                "n_transfers")
+            for i in (1, 2, 3)
+        )
+        return hp, hl, hll, hlb
+
+
+@app.class_definition
+class HubPairIndex:
+    """Window-free hub-pair lookup over hub_pair_routes: per (origin
+    hub, dest hub, weekday) one run of entries sorted by first_dep_s,
+    so the composers' "first departure at/after t" and "latest
+    arrival by t" are a binary search each instead of 24 per-window
+    probes. Entries another one dominates (leaves no earlier, arrives
+    no later) are dropped — neither query can prefer them — which
+    leaves arr_s rising along with first_dep_s, so both columns are
+    searchable.
+
+    `to_bytes()` packs it for the route builder page (gzip; a
+    Uint32[8] header — magic, version, nHub, nKey, nEnt — then hubIdx
+    Int32[nHub], key Uint32[nKey], keyOff Uint32[nKey + 1], dep /
+    arr Int32[nEnt], travelMin Uint16[nEnt], nTr Int8[nEnt], each
+    section on a 4-byte boundary). A run's key is (origin position ×
+    nHub + dest position) × 7 + weekday bit position, positions being
+    ranks in hubIdx."""
+
+    MAGIC = 0x48505849                  # 'HPXI'
+    VERSION = 1
+
+    def __init__(self, hub_idx, key, key_off, dep, arr, travel_min, n_tr,
+                 dropped=0):
+        self.hub_idx = hub_idx
+        self.key = key
+        self.key_off = key_off
+        self.dep = dep
+        self.arr = arr
+        self.travel_min = travel_min
+        self.n_tr = n_tr
+        self.dropped = dropped
+        # Plain lists for the per-call bisects (numpy scalar calls
+        # cost more than the search itself).
+        self._hubs = hub_idx.tolist()
+        self._keys = key.tolist()
+        self._off = key_off.tolist()
+        self._dep = dep.tolist()
+        self._arr = arr.tolist()
+
+    @classmethod
+    def from_frame(cls, hp_df):
+        import numpy as np
+        import polars as pl
+
+        run = ["origin_hub_idx", "dest_hub_idx", "weekday_mask"]
+        df = (
+            hp_df.select(
+                *(pl.col(c).cast(pl.Int64) for c in run),
+                pl.col("first_dep_s").cast(pl.Int64),
+                pl.col("arr_s").cast(pl.Int64),
+                pl.col("travel_min").cast(pl.Int64),
+                pl.col("n_transfers").fill_null(-1).cast(pl.Int64),
+            )
+            # Equal departures: the one kept (last) arrives first, then
+            # with the fewest transfers.
+            .sort(*run, "first_dep_s", "arr_s", "n_transfers",
+                  descending=[False] * 4 + [True, True])
+        )
+        later = (pl.col("arr_s").reverse().cum_min().reverse()
+                 .shift(-1).over(run))
+        kept = df.filter(later.is_null() | (pl.col("arr_s") < later))
+        wd = kept["weekday_mask"].to_numpy()
+        if ((wd <= 0) | (wd >= 128) | (wd & (wd - 1) != 0)).any():
+            raise ValueError("hub_pair_routes.weekday_mask: expected one "
+                             "weekday bit per row")
+        o = kept["origin_hub_idx"].to_numpy()
+        d = kept["dest_hub_idx"].to_numpy()
+        hubs = np.unique(np.r_[o, d])
+        if hubs.size ** 2 * 7 >= 2 ** 32:
+            raise ValueError(f"{hubs.size} hubs: run keys overflow uint32")
+        key = ((np.searchsorted(hubs, o) * hubs.size
+                + np.searchsorted(hubs, d)) * 7
+               + np.log2(wd).astype(np.int64))
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        return cls(
+            hubs.astype(np.int32),
+            key[starts].astype(np.uint32),
+            np.r_[starts, key.size].astype(np.uint32),
+            kept["first_dep_s"].to_numpy().astype(np.int32),
+            kept["arr_s"].to_numpy().astype(np.int32),
+            kept["travel_min"].to_numpy().astype(np.uint16),
+            kept["n_transfers"].to_numpy().astype(np.int8),
+            dropped=df.height - kept.height,
+        )
+
+    def to_bytes(self) -> bytes:
+        import gzip
+        import numpy as np
+
+        head = np.array([self.MAGIC, self.VERSION, self.hub_idx.size,
+                         self.key.size, self.dep.size, 0, 0, 0], "<u4")
+        parts = []
+        for a in (head, self.hub_idx, self.key, self.key_off, self.dep,
+                  self.arr, self.travel_min, self.n_tr):
+            b = a.astype(a.dtype.newbyteorder("<")).tobytes()
+            parts.append(b + bytes(-len(b) % 4))
+        return gzip.compress(b"".join(parts), mtime=0)
+
+    def _run(self, o_idx, d_idx, wd_bit):
+        """[lo, hi) of the (o, d, weekday) run; (0, 0) when absent."""
+        import bisect
+
+        n = len(self._hubs)
+        op = bisect.bisect_left(self._hubs, o_idx)
+        dp = bisect.bisect_left(self._hubs, d_idx)
+        if (op == n or dp == n or self._hubs[op] != o_idx
+                or self._hubs[dp] != d_idx):
+            return 0, 0
+        key = (op * n + dp) * 7 + wd_bit.bit_length() - 1
+        k = bisect.bisect_left(self._keys, key)
+        if k == len(self._keys) or self._keys[k] != key:
+            return 0, 0
+        return self._off[k], self._off[k + 1]
+
+    def _entry(self, i):
+        return {
+            "travel_min": int(self.travel_min[i]),
+            "n_transfers": int(self.n_tr[i]),
+            "first_dep_s": self._dep[i],
+            "arr_s": self._arr[i],
+        }
+
+    def first_after(self, o_idx, d_idx, wd_bit, min_first_dep):
+        """Entry with the earliest first_dep_s ≥ min_first_dep — with
+        dominated entries gone, also the earliest arrival — or None."""
+        import bisect
+
+        lo, hi = self._run(o_idx, d_idx, wd_bit)
+        i = bisect.bisect_left(self._dep, min_first_dep, lo, hi)
+        return self._entry(i) if i < hi else None
+
+    def best_arriving_before(self, o_idx, d_idx, wd_bit, latest_arr,
+                             min_first_dep):
+        """Entry with arr_s ≤ latest_arr and first_dep_s ≥
+        min_first_dep maximising first_dep_s (least wait at the hub),
+        or None."""
+        import bisect
+
+        lo, hi = self._run(o_idx, d_idx, wd_bit)
+        i = bisect.bisect_right(self._arr, latest_arr, lo, hi) - 1
+        if i < lo or self._dep[i] < min_first_dep:
+            return None
+        return self._entry(i)
+
+
 @app.cell
 def _author_dag(Path, os, textwrap):
     # Verify the committed DAG file is present + has the right dag_id.
@@ -395,122 +1608,653 @@ def _author_dag(Path, os, textwrap):
     return graph_dag_file, graph_dag_id
 
 
-
 @app.cell
-def _trigger(graph_dag_file, graph_dag_id, os, requests, time):
-    # Adopt-or-trigger the graph DAG run, then poll to terminal state.
-    # Same shape as gtfs-austria.py's trigger cell (lines 4220-4347)
-    # scoped to ONE DAG.
-    _api = os.environ.get("AIRFLOW_API_INTERNAL_URL", "http://localhost:8080")
-    _pwd = os.environ["AIRFLOW_ADMIN_PASSWORD"]
-
-    def _http_with_retry(method, url, *, headers, json=None, timeout=10, retries=3):
-        # 5xx retry with 1/2/4s backoff — Airflow's SQLite serialises
-        # writes and a concurrent POST/GET can collide on the lock.
-        # Principled back-pressure, not a sleep-loop (R4 distinction).
-        _backoff = 1
-        for _attempt in range(retries):
-            _resp = requests.request(
-                method, url, headers=headers, json=json, timeout=timeout,
+def _author_bake_module(
+    K_HUBS_TARGET, K_LOCAL_HUBS, PAGERANK_ALPHA, PAGERANK_MAX_ITER,
+    PAGERANK_TOL, TEG_HORIZON_S, TEG_MAX_TRANSFERS, TEG_TRANSFER_MAX_WAIT_S,
+    TEG_TRANSFER_MIN_WAIT_S, Path, graph_dag_file, mo, textwrap,
+):
+    # CPU dispatch for the graph DAG's cuGraph tasks, written next to
+    # the DAG file as `notebook_austria_graph_bake.py` (the dags folder
+    # is on the workers' import path). Its hub-selection and hub-bake
+    # tasks ask graph_bake_backend() first — "auto" is "cpu" whenever
+    # cugraph does not import — and on "cpu" hand over to
+    # select_hubs_cpu / bake_hub_tables_cpu, which write the same
+    # transit/ tables the cuGraph path does, so the tasks downstream of
+    # the bake run on CPU workers too. The module carries copies of
+    # csr_pagerank, station_pagerank, top_k_hubs and TegBakeCPU taken
+    # from this notebook's source on every run (numpy + polars only),
+    # and the notebook's constants as its defaults.
+    import ast as _ast
+
+    _head = textwrap.dedent('''
+        """CPU dispatch for notebook_austria_graph_pipeline's cuGraph tasks.
+
+        Written by notebooks/gtfs-graph.py on every run — do not edit. The
+        functions and classes below the dispatch are copied from the
+        notebook. The DAG's hub-selection and hub-bake tasks dispatch on
+        graph_bake_backend():
+
+            from notebook_austria_graph_bake import (
+                bake_hub_tables_cpu, graph_bake_backend, select_hubs_cpu)
+
+            if graph_bake_backend() == "cpu":
+                return bake_hub_tables_cpu(cache_dir)
+        """
+        import os
+        from pathlib import Path
+
+        DEFAULTS = {}
+
+
+        def graph_bake_backend(requested=None):
+            """GRAPH_BAKE_BACKEND as the DAG's tasks act on it: "cpu" or
+            "gpu". "auto" (the default) is "gpu" when cugraph imports and
+            "cpu" otherwise; "verify" bakes on the GPU, the notebook diffs
+            its own CPU bake against that."""
+            backend = requested or os.environ.get("GRAPH_BAKE_BACKEND", "auto")
+            if backend not in ("auto", "gpu", "cpu", "verify"):
+                raise ValueError(f"GRAPH_BAKE_BACKEND={backend!r}: expected "
+                                 "auto / gpu / cpu / verify")
+            if backend != "auto":
+                return "cpu" if backend == "cpu" else "gpu"
+            try:
+                import cugraph  # noqa: F401
+            except Exception:
+                return "cpu"
+            return "gpu"
+
+
+        def select_hubs_cpu(cache_dir, *, k_hubs=None):
+            """Hub selection without cuGraph: station_pagerank over
+            teg/rail_stop_times, its top k_hubs (default K_HUBS_TARGET)
+            written as transit/optimal_hubs.parquet. Returns the hub
+            count."""
+            import polars as pl
+
+            cache = Path(cache_dir)
+            stations = pl.read_parquet(cache / "transit" / "stations.parquet")
+            scores, _, _ = station_pagerank(
+                pl.read_parquet(cache / "teg" / "rail_stop_times.parquet"),
+                stations, alpha=DEFAULTS["pagerank_alpha"],
+                tol=DEFAULTS["pagerank_tol"],
+                max_iter=DEFAULTS["pagerank_max_iter"], backend="cpu",
             )
-            if _resp.status_code < 500:
-                _resp.raise_for_status()
-                return _resp
-            if _attempt == retries - 1:
-                _resp.raise_for_status()
-            time.sleep(_backoff)
-            _backoff *= 2
-        return _resp  # unreachable
-
-    _token = _http_with_retry(
-        "POST",
-        f"{_api}/auth/token",
-        headers={},
-        json={"username": "admin", "password": _pwd},
-        timeout=10,
-    ).json()["access_token"]
-    _auth = {"Authorization": f"Bearer {_token}"}
-
-    from datetime import datetime, timezone
-    _now = datetime.now(timezone.utc)
-    _this_month = (_now.year, _now.month)
-
-    # Phase 1 — wait for scheduler registration + unpause if needed.
-    _reg_deadline = time.monotonic() + 90
-    while time.monotonic() < _reg_deadline:
-        _r = requests.get(
-            f"{_api}/api/v2/dags/{graph_dag_id}", headers=_auth, timeout=5,
-        )
-        if _r.status_code == 200:
-            if _r.json().get("is_paused"):
-                requests.patch(
-                    f"{_api}/api/v2/dags/{graph_dag_id}",
-                    headers=_auth, json={"is_paused": False}, timeout=5,
-                )
-                time.sleep(1)
+            hubs = top_k_hubs(stations, scores, k_hubs or DEFAULTS["k_hubs"])
+            hubs.write_parquet(cache / "transit" / "optimal_hubs.parquet")
+            return hubs.height
+
+
+        def bake_hub_tables_cpu(cache_dir, *, workers=None):
+            """The hub bake without cuGraph: TegBakeCPU over all 7
+            weekdays x 24 windows from teg/rail_stop_times and
+            transit/stations + optimal_hubs, writing hub_pair_routes,
+            hub_labels, hub_labels_layered and hub_labels_backward under
+            transit/. Returns the row counts."""
+            import polars as pl
+
+            cache = Path(cache_dir)
+            transit = cache / "transit"
+            bake = TegBakeCPU(
+                pl.read_parquet(cache / "teg" / "rail_stop_times.parquet"),
+                pl.read_parquet(transit / "stations.parquet"),
+                pl.read_parquet(transit / "optimal_hubs.parquet"),
+                max_transfers=DEFAULTS["max_transfers"],
+                min_wait_s=DEFAULTS["min_wait_s"],
+                max_wait_s=DEFAULTS["max_wait_s"],
+                horizon_s=DEFAULTS["horizon_s"],
+                k_local=DEFAULTS["k_local"],
+            )
+            tables = dict(zip(
+                ("hub_pair_routes", "hub_labels", "hub_labels_layered",
+                 "hub_labels_backward"),
+                bake.bake([(1 << d, w) for d in range(7) for w in range(24)],
+                          workers=workers),
+            ))
+            for name, df in tables.items():
+                df.write_parquet(transit / f"{name}.parquet")
+            return {name: df.height for name, df in tables.items()}
+    ''').lstrip()
+    _defaults = {
+        "k_hubs": K_HUBS_TARGET, "k_local": K_LOCAL_HUBS,
+        "pagerank_alpha": PAGERANK_ALPHA, "pagerank_tol": PAGERANK_TOL,
+        "pagerank_max_iter": PAGERANK_MAX_ITER,
+        "max_transfers": TEG_MAX_TRANSFERS,
+        "min_wait_s": TEG_TRANSFER_MIN_WAIT_S,
+        "max_wait_s": TEG_TRANSFER_MAX_WAIT_S, "horizon_s": TEG_HORIZON_S,
+    }
+    _head = _head.replace("DEFAULTS = {}", "DEFAULTS = {" + "".join(
+        f"\n    {k!r}: {v!r}," for k, v in _defaults.items()) + "\n}")
+    # The copies: each definition's own source (decorators and KEEP IN
+    # SYNC comments stay behind), in dependency order.
+    _nb_src = Path(__file__).read_text()
+    _defs = {n.name: _ast.get_source_segment(_nb_src, n)
+             for n in _ast.parse(_nb_src).body
+             if isinstance(n, (_ast.FunctionDef, _ast.ClassDef))}
+    _body = "\n\n\n".join(
+        [_head.rstrip()]
+        + [_defs[n] for n in ("csr_pagerank", "station_pagerank",
+                              "top_k_hubs", "TegBakeCPU")]
+    ) + "\n"
+    graph_bake_module = graph_dag_file.with_name(
+        "notebook_austria_graph_bake.py")
+    compile(_body, str(graph_bake_module), "exec")
+    graph_bake_module.write_text(_body)
+    _hooked = graph_bake_module.stem in graph_dag_file.read_text()
+    mo.md(
+        f"**Graph bake dispatch** — `{graph_bake_module}` written"
+        + ("" if _hooked else
+           f"; ⚠️ `{graph_dag_file.name}` does not import it yet, so its "
+           "cuGraph tasks still fail on CPU-only workers and the hub "
+           "bake below re-bakes in the notebook")
+    )
+    return (graph_bake_module,)
+
+
+@app.class_definition
+# KEEP IN SYNC with notebooks/gtfs-austria.py, gtfs-graph.py,
+# osm-austria.py and osm-monaco-viz.py (their trigger cells), and
+# `publish` with the publish_run_state hook in each self-authored DAG.
+class AirflowRuns:
+    """Orchestration client the trigger cells share: one JWT per kernel
+    (re-minted when it nears expiry or on a 401), 5xx back-off for
+    Airflow's SQLite write lock, and register → unpause →
+    adopt-or-trigger over all of a notebook's DAGs at once, one thread
+    per DAG.
+
+    Completion is pushed rather than polled. The self-authored DAGs
+    carry on_success / on_failure callbacks that drop
+    `<events_dir>/<dag_id>/<run_id>.json` (`{"state": ...}`, renamed
+    into place) the moment a run ends; the notebook watches that
+    directory with `mo.watch.directory` and re-reads `states()` when a
+    file lands, so the kernel sits idle while the pipelines run. A
+    daemon listener per run covers what no callback reports on — the
+    committed graph DAG, an events dir Airflow cannot reach — by
+    reading the run's state every `fallback_s` and publishing the same
+    file once it is terminal. Past `cap_s` it publishes "timeout" but
+    keeps listening, so a run that ends late still lands; a later
+    `start()` that adopts the still-running run clears the "timeout"
+    and restarts the cap."""
+
+    TERMINAL = ("success", "failed")
+
+    _token = None           # (jwt, exp) shared by every instance
+    _lock = None
+    _listening = {}         # (dag_id, run_id) → live listener's deadline
+
+    def __init__(self, api=None, events_dir=None, *, fallback_s=30):
+        import os
+        import threading
+        from pathlib import Path
+
+        if AirflowRuns._lock is None:
+            AirflowRuns._lock = threading.Lock()
+        self.api = api or os.environ.get(
+            "AIRFLOW_API_INTERNAL_URL", "http://localhost:8080")
+        self.events_dir = Path(events_dir or os.environ.get(
+            "AIRFLOW_RUN_EVENTS_DIR", "/workspace/run-events"))
+        self.fallback_s = fallback_s
+
+    def _auth(self, stale=None):
+        import base64
+        import json
+        import os
+        import time
+
+        with AirflowRuns._lock:
+            tok = AirflowRuns._token
+            if tok is None or tok[1] < time.time() + 60 or tok[0] == stale:
+                jwt = self.request(
+                    "POST", "/auth/token", auth=False,
+                    json={"username": "admin",
+                          "password": os.environ["AIRFLOW_ADMIN_PASSWORD"]},
+                ).json()["access_token"]
+                try:
+                    claims = jwt.split(".")[1]
+                    exp = json.loads(base64.urlsafe_b64decode(
+                        claims + "=" * (-len(claims) % 4)))["exp"]
+                except (IndexError, KeyError, ValueError):
+                    exp = time.time() + 600
+                tok = AirflowRuns._token = (jwt, exp)
+        return tok[0]
+
+    def request(self, method, path, *, json=None, timeout=10, retries=3,
+                auth=True, check=True):
+        """One REST call. 5xx is retried with 1/2/4 s back-off — a
+        concurrent POST/GET colliding on the SQLite lock comes back as
+        an empty 500 — and a 401 re-mints the shared token once."""
+        import time
+
+        import requests
+
+        backoff, reauthed = 1, False
+        for attempt in range(retries):
+            token = self._auth() if auth else None
+            resp = requests.request(
+                method, f"{self.api}{path}", json=json, timeout=timeout,
+                headers={"Authorization": f"Bearer {token}"} if auth else {},
+            )
+            if resp.status_code == 401 and auth and not reauthed:
+                self._auth(stale=token)
+                reauthed = True
                 continue
-            break
-        time.sleep(2)
-    else:
-        raise RuntimeError(
-            f"Airflow never registered DAG {graph_dag_id} from {graph_dag_file}"
-        )
-
-    # Phase 2 — adopt-or-trigger.
-    _runs = _http_with_retry(
-        "GET",
-        f"{_api}/api/v2/dags/{graph_dag_id}/dagRuns?limit=10&order_by=-logical_date",
-        headers=_auth,
-    ).json().get("dag_runs", [])
-    _adopt = None
-    for _r in _runs:
-        _state = _r.get("state")
-        if _state in ("running", "queued"):
-            _adopt = _r
-            break
-        if _state == "success":
-            _end = _r.get("end_date") or _r.get("logical_date")
-            if _end:
-                _dt = datetime.fromisoformat(_end.replace("Z", "+00:00"))
-                if (_dt.year, _dt.month) == _this_month:
-                    _adopt = _r
-                    break
-    if _adopt is None:
-        _new = _http_with_retry(
-            "POST",
-            f"{_api}/api/v2/dags/{graph_dag_id}/dagRuns",
-            headers=_auth,
-            json={"conf": {}, "logical_date": _now.isoformat()},
-            timeout=10,
+            if resp.status_code < 500 or attempt == retries - 1:
+                break
+            time.sleep(backoff)
+            backoff *= 2
+        if check:
+            resp.raise_for_status()
+        return resp
+
+    def _start(self, dag_id, dag_file, adopt, now, register_s):
+        import time
+        from datetime import datetime
+
+        # Registration: the dag-processor scans the dags folder every
+        # 10 s; `register_s` (90 s) gives ~9 scan opportunities.
+        deadline = time.monotonic() + register_s
+        while True:
+            r = self.request("GET", f"/api/v2/dags/{dag_id}", timeout=5,
+                             check=False)
+            if r.status_code == 200:
+                if r.json().get("is_paused"):
+                    self.request("PATCH", f"/api/v2/dags/{dag_id}",
+                                 json={"is_paused": False}, timeout=5)
+                break
+            if r.status_code != 404:
+                r.raise_for_status()
+            if time.monotonic() > deadline:
+                raise RuntimeError(
+                    f"Airflow never registered DAG {dag_id} from {dag_file}")
+            time.sleep(2)
+
+        # Adopt rules: a running/queued run (the scheduler is already
+        # on it; another trigger would only queue behind
+        # max_active_runs=1), else a success this calendar month (its
+        # artefacts are on disk), else trigger. Airflow 3 wants
+        # logical_date in the trigger payload.
+        if adopt:
+            for run in self.request(
+                "GET",
+                f"/api/v2/dags/{dag_id}/dagRuns?limit=10&order_by=-logical_date",
+            ).json().get("dag_runs", []):
+                state = run.get("state")
+                if state in ("running", "queued"):
+                    return run["dag_run_id"], state
+                end = run.get("end_date") or run.get("logical_date")
+                if state == "success" and end:
+                    dt = datetime.fromisoformat(end.replace("Z", "+00:00"))
+                    if (dt.year, dt.month) == (now.year, now.month):
+                        return run["dag_run_id"], state
+        run = self.request(
+            "POST", f"/api/v2/dags/{dag_id}/dagRuns",
+            json={"conf": {}, "logical_date": now.isoformat()},
         ).json()
-        _run_id = _new["dag_run_id"]
-    else:
-        _run_id = _adopt["dag_run_id"]
-
-    # Phase 3 — poll the target run until terminal state. 3600s (60 min)
-    # covers a cold-cache GPU build; warm-cache adopt is ~0s.
-    _poll_deadline = time.monotonic() + 3600
-    _state = None
-    while time.monotonic() < _poll_deadline:
-        _state = _http_with_retry(
-            "GET",
-            f"{_api}/api/v2/dags/{graph_dag_id}/dagRuns/{_run_id}",
-            headers=_auth,
-            timeout=5,
-        ).json()["state"]
-        if _state in ("success", "failed"):
-            break
-        time.sleep(3)
-    if _state not in ("success", "failed"):
-        raise TimeoutError(f"DAG {graph_dag_id} did not finish in 60 min")
-    if _state != "success":
-        raise RuntimeError(f"DAG {graph_dag_id} ended {_state}")
+        return run["dag_run_id"], run.get("state") or "queued"
+
+    def start(self, dag_files, *, adopt=True, cap_s=3600, register_s=90):
+        """Registers, unpauses and adopts-or-triggers every DAG in
+        `dag_files` ({dag_id: path}) concurrently; returns
+        {dag_id: run_id}. Adopted runs that already finished are
+        published straight away, the rest get a fallback listener."""
+        from concurrent.futures import ThreadPoolExecutor
+        from datetime import datetime, timezone
+
+        now = datetime.now(timezone.utc)
+        self._auth()                    # mint once, not once per thread
+        with ThreadPoolExecutor(max_workers=len(dag_files)) as pool:
+            started = dict(zip(dag_files, pool.map(
+                lambda d: self._start(d, dag_files[d], adopt, now,
+                                      register_s),
+                dag_files)))
+        for dag_id, (run_id, state) in started.items():
+            with AirflowRuns._lock:
+                seen = self.state(dag_id, run_id)
+                if state in self.TERMINAL:
+                    if seen is None:
+                        self.publish(dag_id, run_id, state)
+                elif seen is not None and seen not in self.TERMINAL:
+                    # A "timeout" from an earlier cap: Airflow says the
+                    # run is still going, so it reads "running" again.
+                    (self.events_dir / dag_id / f"{run_id}.json").unlink(
+                        missing_ok=True)
+            if state not in self.TERMINAL:
+                self._listen(dag_id, run_id, cap_s)
+        return {d: run_id for d, (run_id, _) in started.items()}
+
+    def _listen(self, dag_id, run_id, cap_s):
+        import threading
+        import time
+
+        import requests
+
+        key = (dag_id, run_id)
+        with AirflowRuns._lock:
+            live = key in AirflowRuns._listening
+            AirflowRuns._listening[key] = time.monotonic() + cap_s
+        if live:
+            return                      # the live one takes the new cap
+
+        def listen():
+            try:
+                while True:
+                    seen = self.state(dag_id, run_id)
+                    if seen in self.TERMINAL:
+                        break
+                    if (seen is None
+                            and time.monotonic() > AirflowRuns._listening[key]):
+                        self.publish(dag_id, run_id, "timeout")
+                    try:
+                        state = self.request(
+                            "GET", f"/api/v2/dags/{dag_id}/dagRuns/{run_id}",
+                            timeout=5,
+                        ).json()["state"]
+                    except requests.RequestException:
+                        state = None
+                    if state in self.TERMINAL:
+                        with AirflowRuns._lock:
+                            self.publish(dag_id, run_id, state)
+                        break
+                    time.sleep(self.fallback_s)
+            finally:
+                with AirflowRuns._lock:
+                    AirflowRuns._listening.pop(key, None)
+
+        threading.Thread(target=listen, name=f"airflow-run-{dag_id}",
+                         daemon=True).start()
+
+    def publish(self, dag_id, run_id, state):
+        import json
+
+        events = self.events_dir / dag_id
+        events.mkdir(parents=True, exist_ok=True)
+        tmp = events / f".{run_id}.tmp"
+        tmp.write_text(json.dumps(
+            {"dag_id": dag_id, "run_id": run_id, "state": state}))
+        tmp.replace(events / f"{run_id}.json")
+
+    def state(self, dag_id, run_id):
+        import json
+
+        try:
+            return json.loads(
+                (self.events_dir / dag_id / f"{run_id}.json").read_text()
+            )["state"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def states(self, dag_run_ids):
+        """{dag_id: state} for the runs `start` returned; "running"
+        until the run's event file lands."""
+        return {d: self.state(d, r) or "running"
+                for d, r in dag_run_ids.items()}
+
+    def watch_path(self, dag_ids):
+        """Directory the notebook hands to `mo.watch.directory`: the
+        DAG's own events dir when there is one DAG, so other
+        notebooks' runs don't re-run this one's cells."""
+        path = self.events_dir
+        if len(dag_ids) == 1:
+            path = path / dag_ids[0]
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+
+@app.cell
+def _trigger(graph_bake_module, graph_dag_file, graph_dag_id, mo):
+    # Adopt-or-trigger the graph DAG run through the shared AirflowRuns
+    # client, then hand completion to the run-events directory instead
+    # of holding the kernel in a poll loop. The graph DAG is committed
+    # under dags/ rather than authored here, so it carries no
+    # completion callback — its run is reported by the client's
+    # fallback listener (one state read every 30 s, off the kernel
+    # thread). 3600 s (60 min) cap covers a cold-cache GPU build;
+    # warm-cache adopt is ~0 s. Runs after the bake-dispatch module
+    # the DAG imports is written.
+    graph_bake_module
+    airflow = AirflowRuns()
+    dag_run_ids = airflow.start({graph_dag_id: graph_dag_file}, cap_s=3600)
+    run_events = mo.watch.directory(airflow.watch_path([graph_dag_id]))
+    return airflow, dag_run_ids, run_events
 
-    dag_run_states = {graph_dag_id: _state}
+
+@app.cell
+def _run_states(airflow, dag_run_ids, run_events):
+    # Re-runs each time a run-event file lands in the watched
+    # `run_events` directory; until then the graph DAG reads "running"
+    # and the gated cells below mo.stop on it.
+    run_events
+    dag_run_states = airflow.states(dag_run_ids)
+    _ended = {d: s for d, s in dag_run_states.items()
+              if s not in ("success", "running")}
+    if _ended:
+        raise RuntimeError(f"DAG(s) ended non-success: {_ended}")
     dag_run_states
     return (dag_run_states,)
 
 
+@app.cell
+def _hub_bake(
+    GRAPH_BAKE_BACKEND, GRAPH_BAKE_WORKERS, GRAPH_CACHE_DIR, K_LOCAL_HUBS,
+    Path, TEG_HORIZON_S, TEG_MAX_TRANSFERS, TEG_TRANSFER_MAX_WAIT_S,
+    TEG_TRANSFER_MIN_WAIT_S, airflow, dag_run_ids, hub_rank, mo, os, pl,
+    run_events, time,
+):
+    # CPU backend for the DAG's hub bake. Reads the DAG's
+    # rail_stop_times / stations and the hub set (optimal_hubs — the
+    # DAG's, or the hub-ranking cell's PageRank top-K) and re-derives
+    # hub_pair_routes + hub_labels with TegBakeCPU over all
+    # 7 weekdays × 24 windows — for hosts without cuGraph, and as the
+    # reference the GPU tables are diffed against ("verify"). The CPU
+    # bake also writes the per-nTr-layer labels, hub_labels_layered
+    # (hub → station) and hub_labels_backward (station → hub off the
+    # reversed timetable), which the GPU bake has no counterpart for;
+    # the R10 composer uses the backward ones for first-mile when
+    # present. Either way the kept hub_pair_routes is packed into
+    # hub_pair_index.bin.
+    #
+    # A DAG file that imports notebook_austria_graph_bake (see
+    # _author_bake_module) bakes on CPU workers itself and succeeds
+    # with the tables, which "auto" then keeps. For one that does not,
+    # this cell is gated on the DAG run having ENDED and on its inputs
+    # being on disk, not on the run succeeding: on a worker without a
+    # GPU its cuGraph tasks fail after rail_stop_times / stations are
+    # written, the hub-ranking cell picks the hubs, and this cell bakes
+    # the hub tables ("auto" → CPU whenever the run did not succeed
+    # with them); the cells gated on dag_run_states stay stopped.
+    run_events, hub_rank
+    _dag_state = airflow.states(dag_run_ids)[
+        "notebook_austria_graph_pipeline"]
+    mo.stop(
+        _dag_state not in AirflowRuns.TERMINAL,
+        mo.md(f"⏳ Hub bake waits for the DAG run to end "
+              f"(state={_dag_state})."),
+    )
+    _teg = Path(GRAPH_CACHE_DIR) / "teg"
+    _transit = Path(GRAPH_CACHE_DIR) / "transit"
+    _inputs = (_teg / "rail_stop_times.parquet",
+               _transit / "stations.parquet",
+               _transit / "optimal_hubs.parquet")
+    _missing = [p.name for p in _inputs if not p.exists()]
+    mo.stop(
+        bool(_missing),
+        mo.md(f"⚠️ Hub bake: the DAG run ({_dag_state}) left no "
+              f"`{'`, `'.join(_missing)}` — nothing to bake from."),
+    )
+    _tables = ("hub_pair_routes.parquet", "hub_labels.parquet")
+    _backend = os.environ.get("GRAPH_BAKE_BACKEND", GRAPH_BAKE_BACKEND)
+    if _backend not in ("auto", "gpu", "cpu", "verify"):
+        raise ValueError(f"GRAPH_BAKE_BACKEND={_backend!r}: expected "
+                         "auto / gpu / cpu / verify")
+    _gpu_tables = (_dag_state == "success"
+                   and all((_transit / t).exists() for t in _tables))
+    if _backend == "auto":
+        _backend = "gpu" if _gpu_tables else "cpu"
+    elif _backend in ("gpu", "verify") and not _gpu_tables:
+        raise RuntimeError(
+            f"GRAPH_BAKE_BACKEND={_backend!r} needs the DAG's GPU hub "
+            f"tables, but the run ended {_dag_state} without them; "
+            "use auto or cpu on a host without cuGraph")
+    graph_bake = {"backend": _backend}
+    if _backend != "gpu":
+        _t0 = time.perf_counter()
+        _bake = TegBakeCPU(
+            *(pl.read_parquet(p) for p in _inputs),
+            max_transfers=TEG_MAX_TRANSFERS,
+            min_wait_s=TEG_TRANSFER_MIN_WAIT_S,
+            max_wait_s=TEG_TRANSFER_MAX_WAIT_S,
+            horizon_s=TEG_HORIZON_S,
+            k_local=K_LOCAL_HUBS,
+        )
+        _hp, _hl, _hll, _hlb = _bake.bake(
+            [(1 << _d, _w) for _d in range(7) for _w in range(24)],
+            workers=GRAPH_BAKE_WORKERS or None,
+        )
+        _out = _transit / "cpu-bake" if _backend == "verify" else _transit
+        _out.mkdir(parents=True, exist_ok=True)
+        for _name, _df in zip(_tables, (_hp, _hl)):
+            _df.write_parquet(_out / _name)
+        _hll.write_parquet(_out / "hub_labels_layered.parquet")
+        _hlb.write_parquet(_out / "hub_labels_backward.parquet")
+        graph_bake.update(
+            seconds=round(time.perf_counter() - _t0, 1),
+            hub_pairs=_hp.height, labels=_hl.height,
+            labels_layered=_hll.height, labels_backward=_hlb.height,
+        )
+    if _backend == "verify":
+        # Row-level diff on the columns both bakes write (list columns
+        # like trip_chain excepted — equal-time alternatives may pick
+        # different trips): rows only one side has.
+        for _name, _cpu in zip(_tables, (_hp, _hl)):
+            _gpu = pl.read_parquet(_transit / _name)
+            _cols = [c for c, t in _cpu.schema.items()
+                     if c in _gpu.columns and not isinstance(t, pl.List)]
+            _gpu = _gpu.select(pl.col(c).cast(_cpu.schema[c]) for c in _cols)
+            _c = _cpu.select(_cols)
+            graph_bake[_name] = {
+                "gpu_rows": _gpu.height, "cpu_rows": _c.height,
+                "only_gpu": _gpu.join(_c, on=_cols, how="anti",
+                                      nulls_equal=True).height,
+                "only_cpu": _c.join(_gpu, on=_cols, how="anti",
+                                    nulls_equal=True).height,
+            }
+        graph_bake["identical"] = all(
+            graph_bake[t]["only_gpu"] == graph_bake[t]["only_cpu"] == 0
+            for t in _tables
+        )
+    # Window-free hub-pair index for the composers (HubPairIndex),
+    # packed from the hub_pair_routes this run kept.
+    _hpx = HubPairIndex.from_frame(pl.read_parquet(_transit / _tables[0]))
+    (_transit / "hub_pair_index.bin").write_bytes(_hpx.to_bytes())
+    graph_bake["hub_pair_index"] = {
+        "runs": int(_hpx.key.size), "entries": int(_hpx.dep.size),
+        "dominated": _hpx.dropped,
+    }
+    mo.md(f"**Hub bake** — `{graph_bake}`")
+    return (graph_bake,)
+
+
+@app.cell
+def _hub_rank(
+    GRAPH_CACHE_DIR, HUB_RANK_BACKEND, K_HUBS_TARGET, PAGERANK_ALPHA,
+    PAGERANK_BENCH_STATIONS, PAGERANK_MAX_ITER, PAGERANK_TOL, Path,
+    airflow, dag_run_ids, mo, os, pl, run_events, time,
+):
+    # Hub ranking without a GPU: station_pagerank over the DAG's
+    # rail_stop_times (plain + departures-weighted personalized), and
+    # the CPU kernel timed on a synthetic Europe-scale graph.
+    #
+    # Gated like the hub bake — on the DAG run having ENDED with
+    # rail_stop_times / stations on disk. When the run succeeded with
+    # its cuGraph-selected optimal_hubs, those stay the hub set and the
+    # ranking is only compared against them; otherwise (no cuGraph on
+    # the worker) the plain PageRank top-K_HUBS_TARGET is written as
+    # optimal_hubs.parquet, which TegBakeCPU and the composers read.
+    run_events
+    _dag_state = airflow.states(dag_run_ids)[
+        "notebook_austria_graph_pipeline"]
+    mo.stop(
+        _dag_state not in AirflowRuns.TERMINAL,
+        mo.md(f"⏳ Hub ranking waits for the DAG run to end "
+              f"(state={_dag_state})."),
+    )
+    import numpy as _np
+
+    _transit = Path(GRAPH_CACHE_DIR) / "transit"
+    _inputs = (Path(GRAPH_CACHE_DIR) / "teg" / "rail_stop_times.parquet",
+               _transit / "stations.parquet")
+    _missing = [p.name for p in _inputs if not p.exists()]
+    mo.stop(
+        bool(_missing),
+        mo.md(f"⚠️ Hub ranking: the DAG run ({_dag_state}) left no "
+              f"`{'`, `'.join(_missing)}` — nothing to rank."),
+    )
+    _rst, _stations = (pl.read_parquet(p) for p in _inputs)
+    _hubs_path = _transit / "optimal_hubs.parquet"
+    _dag_hubs = None
+    if _dag_state == "success" and _hubs_path.exists():
+        _dag_hubs = set(pl.read_parquet(_hubs_path)
+                        ["station_idx"].cast(pl.Int64).to_list())
+    _backend = os.environ.get("HUB_RANK_BACKEND", HUB_RANK_BACKEND)
+    _name = dict(zip(_stations["station_idx"].cast(pl.Int64).to_list(),
+                     _stations["station_name"].to_list()))
+    hub_rank = {"hubs": "dag" if _dag_hubs is not None else "pagerank"}
+    _top = {}
+    _scores_of = {}
+    for _label, _pers in (("pagerank", False), ("personalized", True)):
+        _t0 = time.perf_counter()
+        _scores, _used, _iters = station_pagerank(
+            _rst, _stations, alpha=PAGERANK_ALPHA, tol=PAGERANK_TOL,
+            max_iter=PAGERANK_MAX_ITER, personalized=_pers,
+            backend=_backend,
+        )
+        _scores_of[_label] = _scores
+        _top[_label] = _np.argsort(-_scores, kind="stable")[:K_HUBS_TARGET]
+        hub_rank[_label] = {
+            "backend": _used, "iterations": _iters,
+            "seconds": round(time.perf_counter() - _t0, 3),
+        }
+        if _dag_hubs is not None:
+            hub_rank[_label]["overlap_with_dag_hubs"] = len(
+                _dag_hubs & set(_top[_label].tolist()))
+
+    if _dag_hubs is None:
+        _hubs = top_k_hubs(_stations, _scores_of["pagerank"], K_HUBS_TARGET)
+        _hubs.write_parquet(_hubs_path)
+        hub_rank["hubs_written"] = _hubs.height
+
+    if PAGERANK_BENCH_STATIONS:
+        # Europe-scale stand-in: ~8 undirected links per station to
+        # stations up to 60 indices away (a corridor-like graph).
+        _rng = _np.random.default_rng(0)
+        _n = PAGERANK_BENCH_STATIONS
+        _a = _rng.integers(0, _n, 4 * _n)
+        _b = (_a + _rng.integers(1, 60, _a.size)) % _n
+        _src, _dst = _np.r_[_a, _b], _np.r_[_b, _a]
+        _w = _rng.random(_src.size) * 40
+        _o = _np.argsort(_src, kind="stable")
+        _indptr = _np.r_[0, _np.cumsum(_np.bincount(_src, minlength=_n))]
+        _t0 = time.perf_counter()
+        _, _iters = csr_pagerank(_indptr, _dst[_o], _w[_o],
+                                 alpha=PAGERANK_ALPHA, tol=PAGERANK_TOL,
+                                 max_iter=PAGERANK_MAX_ITER,
+                                 personalization=_rng.random(_n))
+        hub_rank["bench"] = {
+            "stations": _n, "edges": int(_src.size), "iterations": _iters,
+            "seconds": round(time.perf_counter() - _t0, 3),
+        }
+
+    mo.vstack([
+        mo.md(f"**Hub ranking** — `{hub_rank}`"),
+        pl.DataFrame({
+            "rank": list(range(1, K_HUBS_TARGET + 1)),
+            **{k: [_name.get(int(i), str(i)) for i in v]
+               for k, v in _top.items()},
+        }),
+    ])
+    return (hub_rank,)
+
+
 @app.cell
 def _styles():
     # Per-cell MapLibre layer lists. Layer IDs are stable across re-runs;
@@ -519,9 +2263,8 @@ def _styles():
     #
     # ROUTEBUILD_STYLE — for the route-builder map (RBUI). One vector
     # source (austria-graph-routes) provides theme='station' dots and
-    # theme='trip' background lines; a second vector source
-    # (austria-graph-hubpairs) provides the precomputed hub-pair
-    # contraction-hierarchy table that the JS planner consumes.
+    # theme='trip' background lines; the JS planner reads the hub-pair
+    # table from the packed hub_pair_index.bin, not from tiles.
 
     ROUTEBUILD_STYLE = [
         # Loader: always-false filter — forces MapLibre to fetch the
@@ -576,17 +2319,6 @@ def _styles():
                    "circle-stroke-width": 1.6,
                    "circle-radius": ["interpolate", ["linear"], ["zoom"],
                                      4, 3.2, 8, 5.0, 12, 8.0]}},
-        # Hub-pair LineStrings — JS sets filter + paint to surface
-        # selected route only.
-        {"id": "rb-hubpair-line",
-         "type": "line",
-         "source": "hubpairs-src",
-         "source-layer": "austria-graph-hubpairs",
-         "filter": ["==", ["get", "osm_id"], "__never__"],
-         "paint": {"line-color": ["interpolate", ["linear"], ["get", "travel_min"],
-                                  30, "#1a9850", 90, "#91cf60", 180, "#fee08b",
-                                  300, "#fc8d59", 600, "#d73027"],
-                   "line-width": 0.0, "line-opacity": 0.0}},
         # Client-injected selected route (FeatureCollection from JS)
         {"id": "route-leg-casing",
          "type": "line",
@@ -930,21 +2662,26 @@ def _fastest_connections_map(FASTLINK_STYLE, dag_run_states, martin, mo, versati
 
 
 @app.cell
-def _route_builder_map(ROUTEBUILD_STYLE, dag_run_states, martin, mo, versatiles_assets):
+def _route_builder_map(
+    GRAPH_CACHE_DIR, Path, ROUTEBUILD_STYLE, dag_run_states, graph_bake,
+    martin, mo, versatiles_assets,
+):
     # Route builder map (RBUI). PURE JS + PMTiles — no kernel callbacks.
     # Full first-mile + last-mile + hub-pair composer running in the
     # browser.
     #
     # Data sources:
     #   src           = austria-graph-routes  (theme='trip' + theme='station')
-    #   hubpairs-src  = austria-graph-hubpairs (theme='hubpair' precomputed table)
+    #   HUBPAIRS_URL  = transit/hub_pair_index.bin (HubPairIndex.to_bytes,
+    #                   inlined as a data: URL; decoded into typed arrays)
     #   route-src     = client-injected GeoJSON FeatureCollection (selected route LineStrings)
     #   route-pick-src= client-injected GeoJSON (origin/dest pick pins with numbered labels)
     #
     # In-memory dicts built at page load:
     #   STATION_INFO[sfid] = {idx, is_hub, name, lon, lat, near}
     #   TRIP_BY_SFID[sfid] = [{trip_id, stops: [[sfid, arr_s, dep_s, is_hub], ...], runs_dow}, ...]
-    #   HUBPAIRS[ohub_idx|dhub_idx|win_idx|weekday_bit] = {travel_min, n_transfers, first_dep_s, arr_s, trip_chain}
+    #   HP = {hubIdx, key, keyOff, dep, arr, travelMin, nTr} — per (ohub, dhub,
+    #        weekday) a first_dep_s-sorted run; lookups are binary searches
     #
     # findRoute(o_sfid, d_sfid, window_idx, weekday_bit) cases:
     #   - hub→hub direct lookup
@@ -956,26 +2693,20 @@ def _route_builder_map(ROUTEBUILD_STYLE, dag_run_states, martin, mo, versatiles_
         dag_run_states.get("notebook_austria_graph_pipeline") != "success",
         mo.md("⏳ Waiting for DAG"),
     )
+    import base64 as _b64
+    import json as _rb_json
 
-    # The hubpairs source is loaded as a SECOND vector source via the
-    # extra_sources kwarg (the helper's `src` slot remains the routes
-    # tile so the station-dot + trip-line layers can use the default).
-    extra_sources = {
-        "hubpairs-src": {
-            "type": "vector",
-            "url": f"{martin}/austria-graph-hubpairs",
-            "maxzoom": 0,
-        },
-    }
+    # The packed hub-pair index the hub-bake cell wrote (one fetch,
+    # no tile harvesting; the page stays self-contained).
+    _hpx = Path(GRAPH_CACHE_DIR) / "transit" / "hub_pair_index.bin"
+    mo.stop(not _hpx.exists(),
+            mo.md(f"⏳ `{_hpx.name}` missing — hub bake: `{graph_bake}`"))
+    _hpx_url = ("data:application/octet-stream;base64,"
+                + _b64.b64encode(_hpx.read_bytes()).decode())
 
     # Empty GeoJSON sources injected client-side for the selected
     # route's polyline + the origin/dest pick pins.
     extra_sources = {
-        "hubpairs-src": {
-            "type": "vector",
-            "url": f"{martin}/austria-graph-hubpairs",
-            "maxzoom": 0,
-        },
         "route-src": {
             "type": "geojson",
             "data": {"type": "FeatureCollection", "features": []},
@@ -1041,13 +2772,17 @@ def _route_builder_map(ROUTEBUILD_STYLE, dag_run_states, martin, mo, versatiles_
     </div>
     """
 
-    extra_js = """
+    extra_js = (
+        "const HUBPAIRS_URL = " + _rb_json.dumps(_hpx_url) + ";\n"
+        + "const HUBPAIRS_MAGIC = " + str(HubPairIndex.MAGIC)
+        + ", HUBPAIRS_VERSION = " + str(HubPairIndex.VERSION) + ";\n"
+    ) + """
     // =================================================================
     // STATE
     // =================================================================
     const STATION_INFO = {};       // sfid → {idx, is_hub, name, lon, lat, near[]}
     const TRIP_BY_SFID = {};       // sfid → [{trip_id, stops, runs_dow}, ...]
-    const HUBPAIRS = {};           // 'oidx|didx|window|weekday' → hp props
+    let HP = null;                 // decoded hub-pair index (typed arrays)
     const HUB_BY_IDX = {};         // hub_idx → sfid
     let LOAD_READY = false;
     let LOADED_STATIONS = false;
@@ -1127,27 +2862,47 @@ def _route_builder_map(ROUTEBUILD_STYLE, dag_run_states, martin, mo, versatiles_
       }
     }
 
-    function harvestHubpairs() {
-      const m = window.map_austria_graph_routes;
-      const feats = m.querySourceFeatures('hubpairs-src',
-                                          {sourceLayer: 'austria-graph-hubpairs'});
-      for (const f of feats) {
-        const p = f.properties;
-        const k = p.origin_hub_idx + '|' + p.dest_hub_idx + '|'
-                  + p.window_idx + '|' + p.weekday_mask;
-        if (!HUBPAIRS[k]) {
-          HUBPAIRS[k] = {
-            travel_min: p.travel_min, n_transfers: p.n_transfers,
-            first_dep_s: p.first_dep_s, arr_s: p.arr_s,
-            origin_hub_sfid: p.origin_hub_sfid, dest_hub_sfid: p.dest_hub_sfid,
-            origin_hub_idx: p.origin_hub_idx, dest_hub_idx: p.dest_hub_idx,
-          };
-        }
+    // Packed hub-pair index (HubPairIndex.to_bytes): a Uint32[8]
+    // header, then sections each on a 4-byte boundary.
+    function decodeHubPairs(buf) {
+      const h = new Uint32Array(buf, 0, 8);
+      if (h[0] !== HUBPAIRS_MAGIC || h[1] !== HUBPAIRS_VERSION) {
+        throw new Error('unsupported hub-pair index (magic ' + h[0]
+          + ', version ' + h[1] + ')');
       }
-      if (Object.keys(HUBPAIRS).length > 100) {
-        LOADED_HUBPAIRS = true;
-        maybeReady();
+      const nHub = h[2], nKey = h[3], nEnt = h[4];
+      let off = 32;
+      function take(Ctor, n) {
+        const a = new Ctor(buf, off, n);
+        off += Math.ceil(n * Ctor.BYTES_PER_ELEMENT / 4) * 4;
+        return a;
       }
+      return {
+        nHub: nHub, nEnt: nEnt,
+        hubIdx: take(Int32Array, nHub),
+        key: take(Uint32Array, nKey),
+        keyOff: take(Uint32Array, nKey + 1),
+        dep: take(Int32Array, nEnt),
+        arr: take(Int32Array, nEnt),
+        travelMin: take(Uint16Array, nEnt),
+        nTr: take(Int8Array, nEnt),
+      };
+    }
+
+    function loadHubpairs() {
+      fetch(HUBPAIRS_URL)
+        .then(r => r.arrayBuffer())
+        .then(gz => new Response(new Blob([gz]).stream().pipeThrough(
+          new DecompressionStream('gzip'))).arrayBuffer())
+        .then(buf => {
+          HP = decodeHubPairs(buf);
+          LOADED_HUBPAIRS = true;
+          maybeReady();
+        })
+        .catch(err => {
+          document.getElementById('rb-loading').textContent =
+            'hub-pair index: ' + err.message;
+        });
     }
 
     function maybeReady() {
@@ -1160,7 +2915,7 @@ def _route_builder_map(ROUTEBUILD_STYLE, dag_run_states, martin, mo, versatiles_
       } else {
         document.getElementById('rb-loading').textContent =
           'stations:' + Object.keys(STATION_INFO).length
-          + ' hubpairs:' + Object.keys(HUBPAIRS).length;
+          + ' hubpairs:' + (HP ? HP.nEnt : 0);
       }
     }
 
@@ -1214,32 +2969,46 @@ def _route_builder_map(ROUTEBUILD_STYLE, dag_run_states, martin, mo, versatiles_
                 board_seq: bi, alight_seq: ai};
       }
 
-      // Hub-pair scan helpers (window-locked lookups miss queries
-      // whose 1h window contains no train but a later window does;
-      // both the Python validator and the JS planner now scan ALL
-      // 24 windows for the earliest at-or-after / best-before
-      // hub-pair entry, matching MOTIS "earliest at or after the
-      // query window" semantics).
-      function findFirstHpAfter(oIdx, dIdx, wdBit, minFirstDep) {
-        let best = null;
-        for (let w = 0; w < 24; w++) {
-          const hp = HUBPAIRS[oIdx + '|' + dIdx + '|' + w + '|' + wdBit];
-          if (!hp) continue;
-          if (hp.first_dep_s < minFirstDep) continue;
-          if (best === null || hp.first_dep_s < best.first_dep_s) best = hp;
+      // Hub-pair lookups over every window (window-locked lookups
+      // miss queries whose 1h window contains no train but a later
+      // window does; MOTIS "earliest at or after the query window"
+      // semantics). One binary search for the (o, d, weekday) run,
+      // one inside it — dep and arr both ascend (dominated entries
+      // are not baked). Mirrors HubPairIndex in the Python validator.
+      function lowerBound(a, lo, hi, x) {      // first i with a[i] >= x
+        while (lo < hi) {
+          const mid = (lo + hi) >>> 1;
+          if (a[mid] < x) lo = mid + 1; else hi = mid;
         }
-        return best;
+        return lo;
+      }
+      function hpRun(oIdx, dIdx, wdBit) {
+        const n = HP.nHub;
+        const op = lowerBound(HP.hubIdx, 0, n, oIdx);
+        const dp = lowerBound(HP.hubIdx, 0, n, dIdx);
+        if (op === n || dp === n || HP.hubIdx[op] !== oIdx
+            || HP.hubIdx[dp] !== dIdx) return null;
+        const key = (op * n + dp) * 7 + (31 - Math.clz32(wdBit));
+        const k = lowerBound(HP.key, 0, HP.key.length, key);
+        if (k === HP.key.length || HP.key[k] !== key) return null;
+        return [HP.keyOff[k], HP.keyOff[k + 1]];
+      }
+      function hpEntry(i) {
+        return {travel_min: HP.travelMin[i], n_transfers: HP.nTr[i],
+                first_dep_s: HP.dep[i], arr_s: HP.arr[i]};
+      }
+      function findFirstHpAfter(oIdx, dIdx, wdBit, minFirstDep) {
+        const run = hpRun(oIdx, dIdx, wdBit);
+        if (!run) return null;
+        const i = lowerBound(HP.dep, run[0], run[1], minFirstDep);
+        return i < run[1] ? hpEntry(i) : null;
       }
       function findBestHpArrivingBefore(oIdx, dIdx, wdBit, latestArr, minFirstDep) {
-        let best = null;
-        for (let w = 0; w < 24; w++) {
-          const hp = HUBPAIRS[oIdx + '|' + dIdx + '|' + w + '|' + wdBit];
-          if (!hp) continue;
-          if (hp.arr_s > latestArr) continue;
-          if (hp.first_dep_s < minFirstDep) continue;
-          if (best === null || hp.first_dep_s > best.first_dep_s) best = hp;
-        }
-        return best;
+        const run = hpRun(oIdx, dIdx, wdBit);
+        if (!run) return null;
+        const i = lowerBound(HP.arr, run[0], run[1], latestArr + 1) - 1;
+        if (i < run[0] || HP.dep[i] < minFirstDep) return null;
+        return hpEntry(i);
       }
 
       // --- 1. Hub-Hub direct (scan-forward variant)
@@ -1585,13 +3354,12 @@ def _route_builder_map(ROUTEBUILD_STYLE, dag_run_states, martin, mo, versatiles_
     while (panelWrap.firstChild) mapContainer.appendChild(panelWrap.firstChild);
 
     const m = window.map_austria_graph_routes;
+    loadHubpairs();
     m.on('sourcedata', (e) => {
       if (e.sourceId === 'src' && e.isSourceLoaded) harvestStations();
-      if (e.sourceId === 'hubpairs-src' && e.isSourceLoaded) harvestHubpairs();
     });
     m.on('idle', () => {
       if (!LOADED_STATIONS) harvestStations();
-      if (!LOADED_HUBPAIRS) harvestHubpairs();
     });
 
     document.getElementById('rb-origin').addEventListener('change', runQuery);
@@ -1648,12 +3416,15 @@ def _route_builder_map(ROUTEBUILD_STYLE, dag_run_states, martin, mo, versatiles_
 
 @app.cell
 def _validate_routes_against_transitous(
-    HARDFAIL_MIN_AHEAD_MIN, MOTIS_BASE_PROD, MOTIS_BASE_STAGING,
+    HARDFAIL_MIN_AHEAD_MIN, MOTIS_BASE_LOCAL, MOTIS_BASE_PROD,
+    MOTIS_BASE_STAGING,
     R10_CACHE_DIR, R10_CACHE_ONLY, R10_CACHE_SCHEMA_VERSION,
-    R10_CORPUS_FILE, R10_FRESH_PAIRS,
+    R10_CACHE_STORE, R10_CORPUS_FILE, R10_FRESH_PAIRS,
+    R10_MOTIS_BURST, R10_MOTIS_RATE_PER_S, R10_MOTIS_RETRIES,
+    R10_MOTIS_WORKERS,
     SOFTFLAG_PCT, SOFTFLAG_TR_DELTA, VAL_MAX_TRANSFERS,
     VAL_MOTIS_OFFSETS_MIN, VAL_N, VAL_WINDOWS_DEFAULT_HOURS,
-    dag_run_states, mo, os, pl,
+    dag_run_states, graph_bake, mo, os, pl,
 ):
     # R10 Transitous gate. Compares our JS-mirror Python composer
     # against MOTIS /api/v5/plan for 60 fresh OD pairs (date-seeded)
@@ -1669,6 +3440,7 @@ def _validate_routes_against_transitous(
     import math
     import random
     import subprocess
+    import threading
     import urllib.parse
     import urllib.request
     # Private-prefix to avoid marimo's "Variable defined in multiple
@@ -1681,13 +3453,44 @@ def _validate_routes_against_transitous(
 
     import pyarrow.parquet as papq
 
+    _STORE = MotisResponseStore(R10_CACHE_STORE, R10_CACHE_SCHEMA_VERSION)
     _CACHE_DIR = _Path(R10_CACHE_DIR)
-    _CACHE_DIR.mkdir(parents=True, exist_ok=True)
     _CORPUS = _Path(R10_CORPUS_FILE)
     _CORPUS.parent.mkdir(parents=True, exist_ok=True)
 
     _MOTIS_BASE = os.environ.get("TRANSITOUS_ENV") == "staging" and MOTIS_BASE_STAGING or MOTIS_BASE_PROD
     _RUN_ALL_WINDOWS = os.environ.get("R10_FULL_WINDOWS") == "1"
+    # Local stand-in planner: no network, no AUP — live lookups even
+    # under R10_CACHE_ONLY, no pacing, R10_PAIRS may raise the fresh
+    # sample, its offset counts (stations in walking reach) are no
+    # coverage signal, and store keys carry the service version so a
+    # new timetable re-plans.
+    _MOTIS_LOCAL = os.environ.get("TRANSITOUS_ENV") == "local"
+    _MOTIS_EP = _MOTIS_BASE
+    _CACHE_ONLY = R10_CACHE_ONLY
+    _FRESH_PAIRS = R10_FRESH_PAIRS
+    _OFFSETS_MIN = VAL_MOTIS_OFFSETS_MIN
+    _RATE_PER_S, _BURST = R10_MOTIS_RATE_PER_S, R10_MOTIS_BURST
+    _TIMEOUT_S = 25
+    if _MOTIS_LOCAL:
+        _MOTIS_BASE = MOTIS_BASE_LOCAL
+        try:
+            with urllib.request.urlopen(
+                MOTIS_BASE_LOCAL.removesuffix("/api/v5") + "/health",
+                timeout=5,
+            ) as _resp:
+                _MOTIS_EP = f"{_MOTIS_BASE}#{_j.load(_resp)['version']}"
+        except OSError as _e:
+            mo.stop(True, mo.md(
+                f"⏳ R10 gate: no local planner at `{MOTIS_BASE_LOCAL}` "
+                f"({_e}) — start gtfs-austria.py's transit service."
+            ))
+        _CACHE_ONLY = False
+        _FRESH_PAIRS = int(os.environ.get("R10_PAIRS", R10_FRESH_PAIRS))
+        _OFFSETS_MIN = 0
+        _RATE_PER_S, _BURST = 1000.0, 64
+        # Planned on this host's CPU, queued behind the sample: longer.
+        _TIMEOUT_S = 120
 
     # User-Agent per Transitous AUP (contact info mandatory)
     try:
@@ -1697,8 +3500,16 @@ def _validate_routes_against_transitous(
     except Exception:
         _email = "unknown"
     _UA = f"ecovoyage-r10-gate/2026.05 ({_email})"
+    _motis_client = MotisClient(
+        _MOTIS_BASE, _UA,
+        rate_per_s=_RATE_PER_S, burst=_BURST,
+        workers=R10_MOTIS_WORKERS, timeout=_TIMEOUT_S,
+        retries=R10_MOTIS_RETRIES,
+    )
 
     # ---- Load post-DAG artifacts ----
+    # hub_pair_routes / hub_labels as the hub-bake cell left them
+    # (cuGraph or TegBakeCPU, per graph_bake["backend"]).
     _CACHE = _Path("/workspace/cache/austria-teg")
     stations_df = pl.from_arrow(papq.read_table(_CACHE / "transit" / "stations.parquet"))
     hubs_df = pl.from_arrow(papq.read_table(_CACHE / "transit" / "optimal_hubs.parquet"))
@@ -1719,38 +3530,41 @@ def _validate_routes_against_transitous(
         for r in stations_df.iter_rows(named=True)
         if r["is_rail_served"] == "true"
     }
-    # Build TRIP_BY_SFID once for the Python composer (instance-level)
-    rst_pd = rst_df.to_pandas()
-    rst_pd = rst_pd.sort_values(["trip_id", "stop_sequence"])
+    # Build TRIP_BY_SFID once for the Python composer (instance-level):
+    # one columnar group_by gives every trip's calls as lists, so the
+    # per-trip stop tuples are zipped, not built row by row.
+    trips_grouped = (
+        rst_df.sort("trip_id", "stop_sequence")
+        .group_by("trip_id", maintain_order=True)
+        .agg(
+            pl.col("station_feature_id"),
+            pl.col("arr_s").cast(pl.Int64),
+            pl.col("dep_s").cast(pl.Int64),
+            pl.col("station_feature_id").is_in(list(hub_sfids))
+            .cast(pl.Int8).alias("is_hub"),
+            pl.col("runs_dow").first().cast(pl.Int64),
+        )
+        .filter(pl.col("station_feature_id").list.len() >= 2)
+    )
     trips_at = {}    # sfid → list of {trip_id, stops, runs_dow}
-    for trip_id, grp in rst_pd.groupby("trip_id", sort=False):
-        stops = [(r.station_feature_id, int(r.arr_s), int(r.dep_s),
-                  1 if r.station_feature_id in hub_sfids else 0)
-                 for r in grp.itertuples()]
-        if len(stops) < 2:
-            continue
-        rd = int(grp.iloc[0]["runs_dow"])
-        for sfid, _, _, _ in stops:
-            trips_at.setdefault(sfid, []).append(
-                {"trip_id": trip_id, "stops": stops, "runs_dow": rd}
-            )
-    # Build HUBPAIRS lookup
-    HUBPAIRS = {}
-    for r in hp_df.iter_rows(named=True):
-        k = (int(r["origin_hub_idx"]), int(r["dest_hub_idx"]),
-             int(r["window_idx"]), int(r["weekday_mask"]))
-        HUBPAIRS[k] = {
-            "travel_min": int(r["travel_min"]),
-            "n_transfers": int(r["n_transfers"]) if r["n_transfers"] is not None else -1,
-            "first_dep_s": int(r["first_dep_s"]),
-            "arr_s": int(r["arr_s"]),
-        }
+    for trip_id, sfids, arrs, deps, hubs, rd in trips_grouped.iter_rows():
+        stops = list(zip(sfids, arrs, deps, hubs))
+        trip = {"trip_id": trip_id, "stops": stops, "runs_dow": rd}
+        for sfid in sfids:
+            trips_at.setdefault(sfid, []).append(trip)
+    # Hub-pair lookup: one first_dep_s-sorted run per (origin_hub,
+    # dest_hub, weekday) — the composer asks "earliest at/after"
+    # questions, not "which window". Same structure and searches as
+    # the route builder's packed index.
+    HUBPAIRS = HubPairIndex.from_frame(hp_df)
 
     # Build HUB_LABELS lookup — precomputed shortest path (travel_s,
     # n_transfers) FROM each hub TO each station per (window, weekday).
-    # The label table is "from_hub" direction only; we use it both
-    # ways: directly for last-mile (hub → d), approximately-inverted
-    # for first-mile (o → hub, by time symmetry of the rail graph).
+    # Used directly for last-mile (hub → d). First-mile (o → hub) reads
+    # HUB_LABELS_BWD — the CPU bake's station → hub labels, per hub
+    # arrival window — when hub_labels_backward.parquet exists, else
+    # the forward table approximately inverted (by time symmetry of
+    # the rail graph).
     hl_df = pl.from_arrow(papq.read_table(_CACHE / "transit" / "hub_labels.parquet"))
     sfid_by_idx = dict(zip(stations_df["station_idx"].cast(pl.Int64).to_list(),
                             stations_df["station_feature_id"].to_list()))
@@ -1765,41 +3579,102 @@ def _validate_routes_against_transitous(
         HUB_LABELS.setdefault(sfid, {}).setdefault(wd, {}).setdefault(w, []).append(
             (int(r["hub_idx"]), int(r["travel_s"]), int(r["n_transfers"]))
         )
+    # HUB_LABELS_BWD[sfid][wd_bit][arr_win_idx] = list of (hub_idx, dep_s, travel_s, n_transfers)
+    HUB_LABELS_BWD = {}
+    _hlb_path = _CACHE / "transit" / "hub_labels_backward.parquet"
+    if _hlb_path.exists():
+        for r in pl.read_parquet(_hlb_path).iter_rows(named=True):
+            sfid = sfid_by_idx.get(int(r["station_idx"]))
+            if sfid is None:
+                continue
+            HUB_LABELS_BWD.setdefault(sfid, {}).setdefault(
+                int(r["weekday_mask"]), {}).setdefault(int(r["window_idx"]), []).append(
+                (int(r["hub_idx"]), int(r["dep_s"]), int(r["travel_s"]),
+                 int(r["n_transfers"]))
+            )
 
     MIN_TRANSFER_S = 60
 
     def _find_first_hp_after(o_idx, d_idx, wd_bit, min_first_dep):
         """Earliest hub-pair (o→d, wd_bit) with first_dep_s ≥
-        min_first_dep. Scans all 24 windows. Returns None if no
+        min_first_dep (across all 24 windows; dominated entries
+        excluded, so also the earliest arrival). Returns None if no
         entry meets the constraint."""
-        best = None
-        for w in range(24):
-            hp = HUBPAIRS.get((o_idx, d_idx, w, wd_bit))
-            if hp is None:
-                continue
-            if hp["first_dep_s"] < min_first_dep:
-                continue
-            if best is None or hp["first_dep_s"] < best["first_dep_s"]:
-                best = hp
-        return best
+        return HUBPAIRS.first_after(o_idx, d_idx, wd_bit, min_first_dep)
 
     def _find_best_hp_arriving_before(o_idx, d_idx, wd_bit, latest_arr, min_first_dep):
         """Hub-pair (o→d, wd_bit) with arr_s ≤ latest_arr AND
         first_dep_s ≥ min_first_dep, maximising first_dep_s (= least
         wait at the hub before catching the connection). Returns None
         if no entry meets both constraints."""
-        best = None
-        for w in range(24):
-            hp = HUBPAIRS.get((o_idx, d_idx, w, wd_bit))
-            if hp is None:
-                continue
-            if hp["arr_s"] > latest_arr:
-                continue
-            if hp["first_dep_s"] < min_first_dep:
-                continue
-            if best is None or hp["first_dep_s"] > best["first_dep_s"]:
-                best = hp
-        return best
+        return HUBPAIRS.best_arriving_before(
+            o_idx, d_idx, wd_bit, latest_arr, min_first_dep)
+
+    # Window-independent halves of _find_route's first-/last-mile
+    # indexes, memoised per (station, weekday): a test group replays
+    # up to 24 windows and the corpus re-tests the same stations, so
+    # each station's trips_at scan runs once per gate run, not once
+    # per test. Entries keep trips_at order, so the per-window filter
+    # below reproduces the unmemoised index exactly.
+    _fm_memo, _lm_memo = {}, {}
+
+    def _first_mile_calls(o_sfid, wd_bit):
+        key = (o_sfid, wd_bit)
+        if key not in _fm_memo:
+            calls = []
+            for t in trips_at.get(o_sfid, []):
+                if (t["runs_dow"] & wd_bit) == 0:
+                    continue
+                stops = t["stops"]
+                bi = next((i for i, s in enumerate(stops) if s[0] == o_sfid), -1)
+                if bi < 0:
+                    continue
+                board_dep = stops[bi][2]
+                for j in range(bi + 1, len(stops)):
+                    sfid_X = stops[j][0]
+                    arr_X = stops[j][1]
+                    if arr_X <= board_dep:
+                        continue
+                    if sfid_X == o_sfid:
+                        continue
+                    calls.append({
+                        "trip_id": t["trip_id"],
+                        "board_sfid": o_sfid, "alight_sfid": sfid_X,
+                        "dep_s": board_dep, "arr_s": arr_X,
+                        "is_hub": stops[j][3] == 1,
+                        "hub_idx": station_info.get(sfid_X, {}).get("idx"),
+                    })
+            _fm_memo[key] = calls
+        return _fm_memo[key]
+
+    def _last_mile_index(d_sfid, wd_bit):
+        key = (d_sfid, wd_bit)
+        if key not in _lm_memo:
+            lm_by_board = {}
+            for t in trips_at.get(d_sfid, []):
+                if (t["runs_dow"] & wd_bit) == 0:
+                    continue
+                stops = t["stops"]
+                ai = next((i for i, s in enumerate(stops) if s[0] == d_sfid), -1)
+                if ai < 0:
+                    continue
+                alight_arr = stops[ai][1]
+                for i in range(0, ai):
+                    sfid_X = stops[i][0]
+                    dep_X = stops[i][2]
+                    if dep_X >= alight_arr:
+                        continue
+                    if sfid_X == d_sfid:
+                        continue
+                    lm_by_board.setdefault(sfid_X, []).append({
+                        "trip_id": t["trip_id"],
+                        "board_sfid": sfid_X, "alight_sfid": d_sfid,
+                        "dep_s": dep_X, "arr_s": alight_arr,
+                        "is_hub": stops[i][3] == 1,
+                        "hub_idx": station_info.get(sfid_X, {}).get("idx"),
+                    })
+            _lm_memo[key] = lm_by_board
+        return _lm_memo[key]
 
     def _find_route(o_sfid, d_sfid, win_idx, wd_bit):
         """Python mirror of the JS findRoute composer. Matches MOTIS
@@ -1846,63 +3721,19 @@ def _validate_routes_against_transitous(
                             "hub_hub")
                 return best
 
-        # Build first-mile-by-alight-station: for every trip calling
-        # at o_sfid (boarding at-or-after win_lo), index each onward
-        # stop as a candidate alight point. Hubs and non-hubs both
-        # get indexed — non-hub transfers (Path B) are how regional-
-        # rail composition picks up the short routes the hub-pair
-        # graph alone misses.
+        # First-mile-by-alight-station: every trip calling at o_sfid
+        # boarding at-or-after win_lo, each onward stop a candidate
+        # alight point. Hubs and non-hubs both get indexed — non-hub
+        # transfers (Path B) are how regional-rail composition picks
+        # up the short routes the hub-pair graph alone misses.
         fm_by_alight = {}
-        for t in trips_at.get(o_sfid, []):
-            if (t["runs_dow"] & wd_bit) == 0:
-                continue
-            stops = t["stops"]
-            bi = next((i for i, s in enumerate(stops) if s[0] == o_sfid), -1)
-            if bi < 0:
-                continue
-            board_dep = stops[bi][2]
-            if board_dep < win_lo:
-                continue
-            for j in range(bi + 1, len(stops)):
-                sfid_X = stops[j][0]
-                arr_X = stops[j][1]
-                if arr_X <= board_dep:
-                    continue
-                if sfid_X == o_sfid:
-                    continue
-                fm_by_alight.setdefault(sfid_X, []).append({
-                    "trip_id": t["trip_id"],
-                    "board_sfid": o_sfid, "alight_sfid": sfid_X,
-                    "dep_s": board_dep, "arr_s": arr_X,
-                    "is_hub": stops[j][3] == 1,
-                    "hub_idx": station_info.get(sfid_X, {}).get("idx"),
-                })
-
-        # Build last-mile-by-board-station: every trip calling at
-        # d_sfid; index each prior stop as a candidate board point.
-        lm_by_board = {}
-        for t in trips_at.get(d_sfid, []):
-            if (t["runs_dow"] & wd_bit) == 0:
-                continue
-            stops = t["stops"]
-            ai = next((i for i, s in enumerate(stops) if s[0] == d_sfid), -1)
-            if ai < 0:
-                continue
-            alight_arr = stops[ai][1]
-            for i in range(0, ai):
-                sfid_X = stops[i][0]
-                dep_X = stops[i][2]
-                if dep_X >= alight_arr:
-                    continue
-                if sfid_X == d_sfid:
-                    continue
-                lm_by_board.setdefault(sfid_X, []).append({
-                    "trip_id": t["trip_id"],
-                    "board_sfid": sfid_X, "alight_sfid": d_sfid,
-                    "dep_s": dep_X, "arr_s": alight_arr,
-                    "is_hub": stops[i][3] == 1,
-                    "hub_idx": station_info.get(sfid_X, {}).get("idx"),
-                })
+        for fm in _first_mile_calls(o_sfid, wd_bit):
+            if fm["dep_s"] >= win_lo:
+                fm_by_alight.setdefault(fm["alight_sfid"], []).append(fm)
+
+        # Last-mile-by-board-station: every trip calling at d_sfid,
+        # each prior stop a candidate board point (window-free).
+        lm_by_board = _last_mile_index(d_sfid, wd_bit)
 
         # --- Path A: direct single trip o → d ---
         for fm in fm_by_alight.get(d_sfid, []):
@@ -2099,9 +3930,10 @@ def _validate_routes_against_transitous(
         # whose optimal route requires a transfer at a hub the
         # composer doesn't see directly). Uses the precomputed
         # GPU-SSSP hub_labels.parquet — for the window of interest,
-        # it gives travel-time from each hub to the dest station
-        # (and, by approximate symmetry of the rail TEG, from the
-        # origin station to each hub). The total time is the sum of
+        # it gives travel-time from each hub to the dest station;
+        # origin → hub comes from the backward labels when the CPU
+        # bake wrote them (else, by approximate symmetry of the rail
+        # TEG, from the same forward table). The total time is the sum of
         # (o → hub_a) + hub_pair(hub_a → hub_b) + (hub_b → d), all
         # for the same depart-window.
         if best is None or best["_tot"] > 6 * 3600:
@@ -2116,13 +3948,24 @@ def _validate_routes_against_transitous(
                 w = (win_idx + w_off) % 24
                 ol = o_labels_for_wd.get(w)
                 dl = d_labels_for_wd.get(w)
-                if not ol or not dl:
+                if not dl or not (ol or HUB_LABELS_BWD):
                     continue
                 # Build hub_a → (best_travel_s, n_tr) and hub_b → ...
                 o_best = {}
-                for h, t, n in ol:
-                    if h not in o_best or t < o_best[h][0]:
-                        o_best[h] = (t, n)
+                if HUB_LABELS_BWD:
+                    # Station → hub labels arriving in this window or
+                    # the next, leaving o no earlier than the window
+                    # start; t_o counts from the window start.
+                    o_bwd = HUB_LABELS_BWD.get(o_sfid, {}).get(wd_bit, {})
+                    for w_arr in (w, w + 1):
+                        for h, dep, t, n in o_bwd.get(w_arr, ()):
+                            t_o = dep + t - w * 3600
+                            if dep >= w * 3600 and (h not in o_best or t_o < o_best[h][0]):
+                                o_best[h] = (t_o, n)
+                else:
+                    for h, t, n in ol:
+                        if h not in o_best or t < o_best[h][0]:
+                            o_best[h] = (t, n)
                 d_best = {}
                 for h, t, n in dl:
                     if h not in d_best or t < d_best[h][0]:
@@ -2228,7 +4071,7 @@ def _validate_routes_against_transitous(
     fresh_pairs_random = []  # list of (origin, dest, stratum)
     seen_pairs = set()
     attempts = 0
-    while len(fresh_pairs_random) < R10_FRESH_PAIRS and attempts < R10_FRESH_PAIRS * 100:
+    while len(fresh_pairs_random) < _FRESH_PAIRS and attempts < _FRESH_PAIRS * 100:
         attempts += 1
         a = rng_local.choice(pool)
         b = rng_local.choice(pool)
@@ -2280,38 +4123,81 @@ def _validate_routes_against_transitous(
     # invalid even when Python's runtime accepts it).
     _counters = {"network_calls": 0, "cache_hits": 0, "cache_misses": 0,
                  "motis_errors": 0, "smart_skips": 0}
+    _counters_lock = threading.Lock()
 
-    def _cache_key(o_sfid, d_sfid, win_idx, when_iso):
+    def _count(name):
+        # Test groups run on _motis_client's thread pool.
+        with _counters_lock:
+            _counters[name] += 1
+
+    def _cache_request(o_sfid, d_sfid, win_idx, when_iso):
+        # Canonical request tuple the store keys on (the schema
+        # version is the store's own column).
         o_info = station_info[o_sfid]; d_info = station_info[d_sfid]
-        blob = _j.dumps({
+        return {
             "o": [o_info["lat"], o_info["lon"]],
             "d": [d_info["lat"], d_info["lon"]],
-            "t": when_iso, "w": win_idx, "ep": _MOTIS_BASE,
+            "t": when_iso, "w": win_idx, "ep": _MOTIS_EP,
             "max_tr": VAL_MAX_TRANSFERS, "max_match": 200,
-            "modes": "TRANSIT", "v": R10_CACHE_SCHEMA_VERSION,
-        }, sort_keys=True)
+            "modes": "TRANSIT",
+        }
+
+    def _cache_key(request):
+        # Legacy `<sha1>.json` file name; also the coalescing key.
+        blob = _j.dumps({**request, "v": R10_CACHE_SCHEMA_VERSION},
+                        sort_keys=True)
         return hashlib.sha1(blob.encode()).hexdigest()
 
+    def _motis_record(data):
+        """Per-response record the store keeps and the gate reads:
+        the fastest itinerary's summary, the first transit departure
+        of the first itinerary (smart-skip) and MOTIS' offset debug
+        counts. Errors are stored as-is ({"_error": ...})."""
+        if "_error" in data:
+            return data
+        first_dep = None
+        itins = data.get("itineraries", []) or []
+        for leg in (itins[0].get("legs", []) if itins else []):
+            if leg.get("mode") == "WALK":
+                continue
+            first_dep = (leg.get("startTime") or leg.get("from", {}).get("departure"))
+            if first_dep:
+                break
+        debug = data.get("debugOutput", {})
+        return {"best": _summarise_motis(data), "first_dep": first_dep,
+                "n_start_offsets": debug.get("n_start_offsets", 0),
+                "n_dest_offsets": debug.get("n_dest_offsets", 0)}
+
     def _motis_plan(o_sfid, d_sfid, win_idx, depart_date):
         """Cache-only lookup (R10_CACHE_ONLY=True until further
-        notice). Returns the cached JSON if present, otherwise None
-        (treated as cache-miss / MOTIS-skipped — not an error).
-        Network calls are issued only when R10_CACHE_ONLY=False AND
-        the cache misses; in serial-single-request mode (one MOTIS
-        call at a time) we drop the polite stagger since the loop
-        itself never overlaps requests."""
+        notice). Returns the stored _motis_record if present, otherwise
+        None (treated as cache-miss / MOTIS-skipped — not an error).
+        Network calls are issued only when R10_CACHE_ONLY=False (or
+        the endpoint is the local planner) AND the cache misses,
+        through the shared token-bucket
+        _motis_client (groups run concurrently; the bucket keeps the
+        aggregate request rate polite)."""
         win_lo, win_hi = win_idx * 3600, (win_idx + 1) * 3600
         local_iso = f"{depart_date.isoformat()}T{win_idx:02d}:00:00+02:00"
-        cache_k = _cache_key(o_sfid, d_sfid, win_idx, local_iso)
+        request = _cache_request(o_sfid, d_sfid, win_idx, local_iso)
+        rec = _STORE.get(request)
+        if rec is not None:
+            _count("cache_hits")
+            return rec
+        cache_k = _cache_key(request)
         cache_file = _CACHE_DIR / f"{cache_k}.json"
         if cache_file.exists():
-            _counters["cache_hits"] += 1
             try:
-                return _j.loads(cache_file.read_text())
+                data = _j.loads(cache_file.read_text())
             except Exception:
-                pass
-        if R10_CACHE_ONLY:
-            _counters["cache_misses"] += 1
+                data = None
+            if isinstance(data, dict):
+                _count("cache_hits")
+                rec = _motis_record(data)
+                _STORE.put(request, data, rec)
+                return rec
+        if _CACHE_ONLY:
+            _count("cache_misses")
             return None
         o_info = station_info[o_sfid]; d_info = station_info[d_sfid]
         when_utc = _datetime.fromisoformat(local_iso).astimezone(_timezone.utc).isoformat()
@@ -2326,49 +4212,40 @@ def _validate_routes_against_transitous(
             ("maxMatchingDistance", "200"),
             ("transitModes", "TRANSIT"),
         ]
-        url = f"{_MOTIS_BASE}/plan?" + urllib.parse.urlencode(params)
-        req = urllib.request.Request(url, headers={"User-Agent": _UA, "Accept": "application/json"})
         try:
-            with urllib.request.urlopen(req, timeout=25) as resp:
-                data = _j.loads(resp.read().decode())
-            _counters["network_calls"] += 1
-            cache_file.write_text(_j.dumps(data))
-            return data
+            data = _motis_client.plan(cache_k, params)
+            _count("network_calls")
+            rec = _motis_record(data)
+            _STORE.put(request, data, rec)
+            return rec
         except Exception as e:
-            _counters["motis_errors"] += 1
+            _count("motis_errors")
             err_resp = {"_error": str(e)}
-            cache_file.write_text(_j.dumps(err_resp))
+            _STORE.put(request, err_resp, err_resp)
             return err_resp
 
-    def _motis_first_departure_hour_local(data, depart_date):
+    def _motis_first_departure_hour_local(rec, depart_date):
         """Return the local-time hour of the first transit leg's
         departure, or None. Used by the smart window-skip: if window
         W's MOTIS response actually departs at hour T (where T ≥ W),
         all windows in (W, T] would yield the same earliest-train
         answer, so reuse this response."""
-        if not data or "_error" in data:
+        if not rec or "_error" in rec:
             return None
-        itins = data.get("itineraries", []) or []
-        if not itins:
+        dep = rec.get("first_dep")
+        if not dep:
+            return None
+        try:
+            dt_utc = _datetime.fromisoformat(dep.replace("Z", "+00:00"))
+            dt_local = dt_utc.astimezone(_timezone(_timedelta(hours=2)))
+            # If departure crosses midnight forward, cap at 23
+            # (smart-skip is a same-day optimisation; cross-day
+            # would require re-targeting the next day).
+            if dt_local.date() != depart_date:
+                return 23
+            return dt_local.hour
+        except Exception:
             return None
-        for leg in itins[0].get("legs", []):
-            if leg.get("mode") == "WALK":
-                continue
-            dep = (leg.get("startTime") or leg.get("from", {}).get("departure"))
-            if not dep:
-                continue
-            try:
-                dt_utc = _datetime.fromisoformat(dep.replace("Z", "+00:00"))
-                dt_local = dt_utc.astimezone(_timezone(_timedelta(hours=2)))
-                # If departure crosses midnight forward, cap at 23
-                # (smart-skip is a same-day optimisation; cross-day
-                # would require re-targeting the next day).
-                if dt_local.date() != depart_date:
-                    return 23
-                return dt_local.hour
-            except Exception:
-                return None
-        return None
 
     def _summarise_motis(data):
         if not data or "_error" in data:
@@ -2392,14 +4269,14 @@ def _validate_routes_against_transitous(
         if best is None:
             return None
         return {"travel_min": round(best["duration"] / 60),
+                "duration_s": best["duration"],
                 "n_transfers": best["n_transfers"],
-                "trip_ids": best["trip_ids"], "modes": best["modes"]}
+                "trip_ids": best["trip_ids"], "modes": sorted(best["modes"])}
 
-    def _motis_debug_offsets(data):
-        if not data:
+    def _motis_debug_offsets(rec):
+        if not rec:
             return (0, 0)
-        debug = data.get("debugOutput", {})
-        return (debug.get("n_start_offsets", 0), debug.get("n_dest_offsets", 0))
+        return (rec.get("n_start_offsets", 0), rec.get("n_dest_offsets", 0))
 
     # ---- Verdict triage ----
     def _is_domestic(sfid):
@@ -2410,7 +4287,7 @@ def _validate_routes_against_transitous(
         reasons = []
         domestic = _is_domestic(pair_origin) and _is_domestic(pair_dest)
         n_so, n_do = _motis_debug_offsets(motis_data)
-        coverage_ok = n_so >= VAL_MOTIS_OFFSETS_MIN and n_do >= VAL_MOTIS_OFFSETS_MIN
+        coverage_ok = n_so >= _OFFSETS_MIN and n_do >= _OFFSETS_MIN
 
         if ours is None and motis is None:
             return "both-fail", []
@@ -2474,7 +4351,13 @@ def _validate_routes_against_transitous(
         key = (o_sfid, d_sfid, wd_bit, wd_label, stratum)
         grouped.setdefault(key, []).append(win)
 
-    for (o_sfid, d_sfid, wd_bit, wd_label, stratum), wins in grouped.items():
+    # Groups are independent (the smart-skip only carries state inside
+    # a group), so they run concurrently on _motis_client's thread pool
+    # — the token bucket, not the loop, paces the network calls. Rows
+    # come back in group order.
+    def _run_group(item):
+        (o_sfid, d_sfid, wd_bit, wd_label, stratum), wins = item
+        group_rows = []
         depart_date = date_for_wd_bit[wd_bit]
         wins_sorted = sorted(set(wins))
         # Per-group cache of the active MOTIS response and the
@@ -2488,7 +4371,7 @@ def _validate_routes_against_transitous(
             # window is still covered by it.
             if active_motis_data is not None and win <= active_motis_covers_through:
                 motis_data = active_motis_data
-                _counters["smart_skips"] += 1
+                _count("smart_skips")
                 skip_note = (f"smart-skip: reused MOTIS response from "
                              f"window {active_motis_origin_win:02d}")
             else:
@@ -2510,14 +4393,14 @@ def _validate_routes_against_transitous(
                     active_motis_data = None
                     active_motis_covers_through = -1
                     active_motis_origin_win = -1
-            motis = _summarise_motis(motis_data)
+            motis = (motis_data or {}).get("best")
             verdict, reasons = _classify(o_sfid, d_sfid, ours, motis, motis_data, stratum)
             if motis_data is None:
                 # Cache-miss in CACHE_ONLY mode: surface explicitly
                 # so the row isn't silently labelled "both-fail".
                 verdict = "cache-miss"
                 reasons = ["no cached MOTIS response (R10_CACHE_ONLY=True)"]
-            rows.append({
+            group_rows.append({
                 "stratum": stratum,
                 "weekday": wd_label,
                 "window": win,
@@ -2531,6 +4414,10 @@ def _validate_routes_against_transitous(
                 "verdict": verdict,
                 "reasons": "; ".join([r for r in [skip_note] + list(reasons) if r]),
             })
+        return group_rows
+
+    for group_rows in _motis_client.map(_run_group, list(grouped.items())):
+        rows.extend(group_rows)
 
     val_df = pl.DataFrame(rows, schema_overrides={
         "ours_min": pl.Int64, "ours_tr": pl.Int64,
@@ -2564,7 +4451,7 @@ def _validate_routes_against_transitous(
     ev_path.write_text(_j.dumps({
         "schema_version": 3,
         "ran_utc": _datetime.now(_timezone.utc).isoformat(),
-        "cache_only": bool(R10_CACHE_ONLY),
+        "cache_only": bool(_CACHE_ONLY),
         "depart_dates_by_weekday": {wl: date_for_wd_bit[wb].isoformat()
                                        for wb, wl in VAL_WEEKDAYS},
         "seed_date": today.isoformat(),
@@ -2572,7 +4459,8 @@ def _validate_routes_against_transitous(
         "depart_dates": {wl: date_for_wd_bit[wb].isoformat()
                           for wb, wl in VAL_WEEKDAYS},
         "windows_used": sorted({w for _, _, w, _, _, _ in all_tests}),
-        "motis_endpoint": _MOTIS_BASE,
+        "motis_endpoint": _MOTIS_EP,
+        "hub_bake": graph_bake["backend"],
         "n_fresh_pairs": len(fresh_pairs_random),
         "n_fresh_tests": len(fresh_tests),
         "n_corpus_pairs": len(corpus_pairs),
@@ -2582,6 +4470,9 @@ def _validate_routes_against_transitous(
         "cache_misses": _counters["cache_misses"],
         "smart_skips": _counters["smart_skips"],
         "motis_errors": _counters["motis_errors"],
+        "motis_client": _motis_client.stats,
+        "response_store": {"path": str(_STORE.path),
+                           "rows": len(_STORE), **_STORE.stats},
         "rows": rows,
     }, indent=2))
 
@@ -2591,13 +4482,14 @@ def _validate_routes_against_transitous(
     summary_md = mo.md(f"""
     ### R10 Transitous validation gate
 
-    - **Endpoint** `{_MOTIS_BASE}` · **Mode** `{"cache-only" if R10_CACHE_ONLY else "live"}` (serial single-request)
+    - **Endpoint** `{_MOTIS_EP}` · **Mode** `{"cache-only" if _CACHE_ONLY else "live"}` ({R10_MOTIS_WORKERS} workers, ≤{_RATE_PER_S:g} req/s, {_motis_client.stats["retries"]} retries, {_motis_client.stats["coalesced"]} coalesced)
     - **Weekdays** {dict(zip([wl for _, wl in VAL_WEEKDAYS], [date_for_wd_bit[wb].isoformat() for wb, _ in VAL_WEEKDAYS]))} (Europe/Vienna)
     - **Seed** `{today.isoformat()}` (rotates daily for fresh tests)
     - **Tests** {len(fresh_tests)} fresh ({len(fresh_pairs_random)} pairs × 3 weekdays × 24 windows)
        + {len(corpus_pairs) * len(VAL_WEEKDAYS) * 24} corpus retest ({len(corpus_pairs)} pairs × 3 wd × 24 win)
        = **{len(all_tests)} total**
     - **MOTIS lookups** {_counters["cache_hits"]} cache-hit + {_counters["cache_misses"]} cache-miss + {_counters["smart_skips"]} smart-skip + {_counters["network_calls"]} network + {_counters["motis_errors"]} errors · UA `{_UA}`
+    - **Response store** `{_STORE.path}` · {len(_STORE)} rows (schema v{R10_CACHE_SCHEMA_VERSION}; {_STORE.stats["compacted"]} stale rows compacted)
     - **Stratum** {dict(zip(stratum_counts['stratum'].to_list(), stratum_counts['n'].to_list()))}
     - **Per-weekday** {dict(zip(weekday_counts['weekday'].to_list(), weekday_counts['n'].to_list()))}
     - **Evidence** `{ev_path}`
@@ -2631,13 +4523,29 @@ def _tail(dag_run_states, martin, mo):
       transfer cap structural, no algorithmic guard needed.
     - **cuGraph PageRank** hub selection + BFS connectivity-guarantee
       pass — replaces the O(n²) D-matrix greedy from the CPU baseline.
+    - **CSR PageRank** (`station_pagerank`) — the same ranking by
+      numpy power iteration when cuGraph is absent, plain or
+      personalized by departures/day; cuGraph only when available.
     - **Batched cuGraph.sssp** per (weekday, window) for the hub-pair
       contraction-hierarchy table.
+    - **CPU hub bake** (`TegBakeCPU`, GRAPH_BAKE_BACKEND) — the same
+      hub-pair / hub-label tables from a multi-source, round-based
+      search of the TEG, forked over (weekday, window); "verify" diffs
+      it against the cuGraph tables. The DAG's hub-selection and bake
+      tasks dispatch to it (and to PageRank hubs) through
+      `notebook_austria_graph_bake` when cugraph does not import.
     - **Partial Hub-Labeling** (K_LOCAL=8 nearest hubs per station) —
       enables O(1) JS findRoute queries via cross-product composition.
+      The CPU bake also builds per-nTr-layer labels exactly in both
+      directions (hub → station, and station → hub on the reversed
+      timetable) with one K-bounded multi-source search each, so their
+      cost follows K, not the hub count.
     - **JS route-builder** (first-mile + hub-pair + last-mile composer)
       runs entirely client-side over PMTiles — no marimo kernel
       callbacks, no Python at runtime. Map is static-web deployable.
+      Hub pairs come from the packed `hub_pair_index.bin` (typed
+      arrays, one sorted run per hub pair × weekday): each lookup is a
+      binary search, not 24 per-window probes.
 
     ### Tiles served by martin ({martin})
 
@@ -61,7 +61,7 @@ def _(airflow_public, martin, mo):
         plane. This notebook **self-authors the OSM Airflow DAG**
         (`notebook_austria_pipeline`) into `${{AIRFLOW_DAGS_DIR}}`,
         **triggers** it via the Airflow REST API at <{airflow_public}>,
-        **polls until success**, then renders the 5 vector-tile maps
+        **waits for its run-completion event**, then renders the 5 vector-tile maps
         martin serves from the freestiler PMTiles archives.
 
         **Two-notebook contract** — the GTFS pipeline + unified
@@ -144,6 +144,168 @@ def _(Path, os, textwrap):
     ))
     dags_dir.mkdir(parents=True, exist_ok=True)
 
+    # Task telemetry and the run-event hook, kept apart from the DAG
+    # body and spliced in at its `# @dag-support` line.
+    _dag_support = textwrap.dedent('''
+        # ── Task telemetry ──────────────────────────────────────────
+        # Every @task / @task(...) in this DAG goes through `task`
+        # below, which wraps the callable and writes ONE parquet row
+        # per task try to <AIRFLOW_TELEMETRY_DIR>/<dag_id>/<task_id>/:
+        # wall / CPU seconds (self + reaped children, so tippecanoe /
+        # osmium subprocesses count), peak RSS, storage bytes read /
+        # written (/proc/self/io), rows in / out reported via tm_rows,
+        # and sub-stage spans from tm_span / tm_iter. Best-effort — a
+        # telemetry failure never fails the task. KEEP IN SYNC with the
+        # _dag_support block of osm-austria, gtfs-austria and monaco.
+        TELEMETRY = Path(os.environ.get(
+            "AIRFLOW_TELEMETRY_DIR", "/workspace/telemetry"))
+        _tm = None        # the running task's record; one task per process
+
+
+        def _tm_usage():
+            import resource
+            import time
+            s = resource.getrusage(resource.RUSAGE_SELF)
+            c = resource.getrusage(resource.RUSAGE_CHILDREN)
+            io = {}
+            try:
+                for line in Path("/proc/self/io").read_text().splitlines():
+                    k, v = line.split(":")
+                    io[k] = int(v)
+            except OSError:
+                pass
+            return (time.perf_counter(),
+                    s.ru_utime + s.ru_stime + c.ru_utime + c.ru_stime,
+                    max(s.ru_maxrss, c.ru_maxrss) / 1024,
+                    io.get("read_bytes", 0), io.get("write_bytes", 0))
+
+
+        @contextmanager
+        def tm_span(name, **attrs):
+            """Sub-stage span in the running task's telemetry row;
+            a no-op outside an instrumented task."""
+            if _tm is None:
+                yield
+                return
+            t0, c0 = _tm_usage()[:2]
+            try:
+                yield
+            finally:
+                t1, c1 = _tm_usage()[:2]
+                _tm["spans"].append({
+                    "name": name, "start_s": t0 - _tm["t0"],
+                    "wall_s": t1 - t0, "cpu_s": c1 - c0,
+                    "attrs": json.dumps(attrs) if attrs else None,
+                })
+
+
+        def tm_iter(name, iterable):
+            """Yields from `iterable`, one span per loop-body pass."""
+            for i, item in enumerate(iterable):
+                with tm_span(name, i=i):
+                    yield item
+
+
+        def tm_rows(rows_in=None, rows_out=None):
+            if _tm is not None:
+                for k, v in (("rows_in", rows_in), ("rows_out", rows_out)):
+                    if v is not None:
+                        _tm[k] = (_tm[k] or 0) + int(v)
+
+
+        def _tm_write(started, status, error, u0, u1, rec):
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                from airflow.sdk import get_current_context
+                ti = get_current_context()["ti"]
+                map_index = getattr(ti, "map_index", None)
+                map_index = -1 if map_index is None else map_index
+                span = pa.struct([
+                    ("name", pa.string()), ("start_s", pa.float64()),
+                    ("wall_s", pa.float64()), ("cpu_s", pa.float64()),
+                    ("attrs", pa.string()),
+                ])
+                schema = pa.schema([
+                    ("dag_id", pa.string()), ("task_id", pa.string()),
+                    ("run_id", pa.string()), ("map_index", pa.int32()),
+                    ("try_number", pa.int32()), ("month", pa.string()),
+                    ("started_at", pa.timestamp("us", tz="UTC")),
+                    ("status", pa.string()), ("error", pa.string()),
+                    ("wall_s", pa.float64()), ("cpu_s", pa.float64()),
+                    ("peak_rss_mb", pa.float64()),
+                    ("read_bytes", pa.int64()), ("write_bytes", pa.int64()),
+                    ("rows_in", pa.int64()), ("rows_out", pa.int64()),
+                    ("spans", pa.list_(span)),
+                ])
+                row = {
+                    "dag_id": ti.dag_id, "task_id": ti.task_id,
+                    "run_id": ti.run_id, "map_index": map_index,
+                    "try_number": ti.try_number,
+                    "month": started.strftime("%Y-%m"), "started_at": started,
+                    "status": status, "error": error,
+                    "wall_s": u1[0] - u0[0], "cpu_s": u1[1] - u0[1],
+                    "peak_rss_mb": u1[2],
+                    "read_bytes": u1[3] - u0[3], "write_bytes": u1[4] - u0[4],
+                    "rows_in": rec["rows_in"], "rows_out": rec["rows_out"],
+                    "spans": rec["spans"],
+                }
+                out = TELEMETRY / ti.dag_id / ti.task_id
+                out.mkdir(parents=True, exist_ok=True)
+                pq.write_table(
+                    pa.Table.from_pylist([row], schema=schema),
+                    out / f"{ti.run_id}.m{map_index}.t{ti.try_number}.parquet",
+                )
+            except Exception as e:
+                print(f"[telemetry] row not written: {type(e).__name__}: {e}")
+
+
+        def _tm_measured(fn):
+            @wraps(fn)
+            def run(*args, **kwargs):
+                global _tm
+                from datetime import datetime, timezone
+                started = datetime.now(timezone.utc)
+                u0 = _tm_usage()
+                _tm = {"t0": u0[0], "spans": [],
+                       "rows_in": None, "rows_out": None}
+                status, error = "success", None
+                try:
+                    return fn(*args, **kwargs)
+                except BaseException as e:
+                    status = "skipped" if "Skip" in type(e).__name__ else "failed"
+                    error = f"{type(e).__name__}: {e}"[:500]
+                    raise
+                finally:
+                    rec, _tm = _tm, None
+                    _tm_write(started, status, error, u0, _tm_usage(), rec)
+            return run
+
+
+        def task(python_callable=None, **kwargs):
+            """airflow.sdk.task with telemetry: `@task` and `@task(...)`."""
+            if python_callable is None:
+                return lambda fn: airflow_task(**kwargs)(_tm_measured(fn))
+            return airflow_task(_tm_measured(python_callable))
+
+
+        def publish_run_state(context, state):
+            # DAG-level completion hook: drops
+            # <AIRFLOW_RUN_EVENTS_DIR>/<dag_id>/<run_id>.json (renamed
+            # into place) for the notebook's run-events watcher, so the
+            # trigger cell never polls the REST API for completion.
+            # KEEP IN SYNC with AirflowRuns.publish in the notebooks.
+            import json
+            run = context["dag_run"]
+            events = Path(os.environ.get(
+                "AIRFLOW_RUN_EVENTS_DIR", "/workspace/run-events")) / run.dag_id
+            events.mkdir(parents=True, exist_ok=True)
+            tmp = events / f".{run.run_id}.tmp"
+            tmp.write_text(json.dumps(
+                {"dag_id": run.dag_id, "run_id": run.run_id, "state": state}))
+            tmp.replace(events / f"{run.run_id}.json")
+    ''').lstrip()
+
     # ---- Austria OSM + freestiler DAG (consolidated) ----
     # The freestiler step needs the PBF→parquet output, so chaining
     # download_pbf → pbf_to_geoparquet → freestiler_convert →
@@ -171,12 +333,15 @@ def _(Path, os, textwrap):
         re-derived. Within a month, manual/notebook-triggered runs are
         free (every task is O(1) stat).
         """
+        import json
         import os
         import subprocess
+        from contextlib import contextmanager
         from datetime import datetime, timezone
+        from functools import partial, wraps
         from pathlib import Path
 
-        from airflow.sdk import dag, task
+        from airflow.sdk import dag, task as airflow_task
 
         WORK = Path(os.path.expanduser("/workspace/tiles/work"))
         TILES = Path(os.path.expanduser("/workspace/tiles/pmtiles"))
@@ -521,6 +686,9 @@ def _(Path, os, textwrap):
             """
 
 
+        # @dag-support
+
+
         @dag(
             dag_id="notebook_austria_pipeline",
             schedule="@monthly",
@@ -528,6 +696,8 @@ def _(Path, os, textwrap):
             catchup=False,
             max_active_runs=1,
             tags=["osm", "austria", "notebook", "duckdb-freestiler"],
+            on_success_callback=partial(publish_run_state, state="success"),
+            on_failure_callback=partial(publish_run_state, state="failed"),
         )
         def notebook_austria_pipeline():
             @task
@@ -558,11 +728,14 @@ def _(Path, os, textwrap):
 
             @task
             def pbf_to_geoparquet(pbf_path: str) -> str:
+                import pyarrow.parquet as pq
                 import quackosm as qosm
                 out = WORK / "austria.parquet"
                 if not _needs_regen(out):
                     return str(out)
-                qosm.convert_pbf_to_parquet(pbf_path, result_file_path=str(out))
+                with tm_span("quackosm.convert_pbf_to_parquet"):
+                    qosm.convert_pbf_to_parquet(pbf_path, result_file_path=str(out))
+                tm_rows(rows_out=pq.ParquetFile(out).metadata.num_rows)
                 return str(out)
 
             @task
@@ -588,27 +761,29 @@ def _(Path, os, textwrap):
                     return str(out)
                 query = f"SELECT * FROM read_parquet('{parquet_path}')"
                 if hasattr(freestiler, "freestile_query"):
-                    freestiler.freestile_query(
-                        query=query,
-                        output=str(out),
-                        layer_name="austria",
-                        min_zoom=0,
-                        max_zoom=12,
-                        base_zoom=12,
-                        drop_rate=2.0,
-                        coalesce=True,
-                    )
+                    with tm_span("freestiler.freestile_query"):
+                        freestiler.freestile_query(
+                            query=query,
+                            output=str(out),
+                            layer_name="austria",
+                            min_zoom=0,
+                            max_zoom=12,
+                            base_zoom=12,
+                            drop_rate=2.0,
+                            coalesce=True,
+                        )
                 elif hasattr(freestiler, "freestile"):
-                    freestiler.freestile(
-                        input=query,
-                        output=str(out),
-                        layer_name="austria",
-                        min_zoom=0,
-                        max_zoom=12,
-                        base_zoom=12,
-                        drop_rate=2.0,
-                        coalesce=True,
-                    )
+                    with tm_span("freestiler.freestile"):
+                        freestiler.freestile(
+                            input=query,
+                            output=str(out),
+                            layer_name="austria",
+                            min_zoom=0,
+                            max_zoom=12,
+                            base_zoom=12,
+                            drop_rate=2.0,
+                            coalesce=True,
+                        )
                 else:
                     public = sorted(n for n in dir(freestiler) if not n.startswith("_"))
                     raise RuntimeError(
@@ -652,16 +827,17 @@ def _(Path, os, textwrap):
                 # (upstream issue scope), MVT is the only encoding that survives
                 # the tile-server boot path. Flip back to "mlt" once the next
                 # martin release lands the decoder.
-                freestiler.freestile_query(
-                    query=query,
-                    output=str(out),
-                    layer_name="austria-railway",
-                    min_zoom=0,
-                    max_zoom=14,
-                    base_zoom=14,
-                    drop_rate=2.0,
-                    coalesce=True,
-                )
+                with tm_span("freestiler.freestile_query"):
+                    freestiler.freestile_query(
+                        query=query,
+                        output=str(out),
+                        layer_name="austria-railway",
+                        min_zoom=0,
+                        max_zoom=14,
+                        base_zoom=14,
+                        drop_rate=2.0,
+                        coalesce=True,
+                    )
                 return str(out)
 
             @task
@@ -683,16 +859,17 @@ def _(Path, os, textwrap):
                     FROM read_parquet('{parquet_path}')
                     WHERE {_CYCLE_WHERE}
                 """
-                freestiler.freestile_query(
-                    query=query,
-                    output=str(out),
-                    layer_name="austria-cycle",
-                    min_zoom=0,
-                    max_zoom=14,
-                    base_zoom=14,
-                    drop_rate=2.0,
-                    coalesce=True,
-                )
+                with tm_span("freestiler.freestile_query"):
+                    freestiler.freestile_query(
+                        query=query,
+                        output=str(out),
+                        layer_name="austria-cycle",
+                        min_zoom=0,
+                        max_zoom=14,
+                        base_zoom=14,
+                        drop_rate=2.0,
+                        coalesce=True,
+                    )
                 return str(out)
 
             @task
@@ -714,16 +891,17 @@ def _(Path, os, textwrap):
                     FROM read_parquet('{parquet_path}')
                     WHERE {_TOPO_WHERE}
                 """
-                freestiler.freestile_query(
-                    query=query,
-                    output=str(out),
-                    layer_name="austria-topo",
-                    min_zoom=0,
-                    max_zoom=12,
-                    base_zoom=12,
-                    drop_rate=2.0,
-                    coalesce=True,
-                )
+                with tm_span("freestiler.freestile_query"):
+                    freestiler.freestile_query(
+                        query=query,
+                        output=str(out),
+                        layer_name="austria-topo",
+                        min_zoom=0,
+                        max_zoom=12,
+                        base_zoom=12,
+                        drop_rate=2.0,
+                        coalesce=True,
+                    )
                 return str(out)
 
             @task
@@ -743,16 +921,17 @@ def _(Path, os, textwrap):
                     FROM read_parquet('{parquet_path}')
                     WHERE {_HIKING_WHERE}
                 """
-                freestiler.freestile_query(
-                    query=query,
-                    output=str(out),
-                    layer_name="austria-hiking",
-                    min_zoom=0,
-                    max_zoom=14,
-                    base_zoom=14,
-                    drop_rate=2.0,
-                    coalesce=True,
-                )
+                with tm_span("freestiler.freestile_query"):
+                    freestiler.freestile_query(
+                        query=query,
+                        output=str(out),
+                        layer_name="austria-hiking",
+                        min_zoom=0,
+                        max_zoom=14,
+                        base_zoom=14,
+                        drop_rate=2.0,
+                        coalesce=True,
+                    )
                 return str(out)
 
             @task
@@ -783,16 +962,17 @@ def _(Path, os, textwrap):
                 out = TILES / "austria-ecovoyage.pmtiles"
                 if not _needs_regen(out):
                     return str(out)
-                freestiler.freestile_query(
-                    query=_ecovoyage_union(parquet_path),
-                    output=str(out),
-                    layer_name="austria-ecovoyage",
-                    min_zoom=0,
-                    max_zoom=12,
-                    base_zoom=12,
-                    drop_rate=2.0,
-                    coalesce=True,
-                )
+                with tm_span("freestiler.freestile_query"):
+                    freestiler.freestile_query(
+                        query=_ecovoyage_union(parquet_path),
+                        output=str(out),
+                        layer_name="austria-ecovoyage",
+                        min_zoom=0,
+                        max_zoom=12,
+                        base_zoom=12,
+                        drop_rate=2.0,
+                        coalesce=True,
+                    )
                 return str(out)
 
             @task
@@ -814,16 +994,17 @@ def _(Path, os, textwrap):
                 out = TILES / "austria-rail.pmtiles"
                 if not _needs_regen(out):
                     return str(out)
-                freestiler.freestile_query(
-                    query=_ecovoyage_union(parquet_path, tier="rail"),
-                    output=str(out),
-                    layer_name="austria-rail",
-                    min_zoom=0,
-                    max_zoom=14,
-                    drop_rate=None,
-                    simplification=True,
-                    coalesce=True,
-                )
+                with tm_span("freestiler.freestile_query"):
+                    freestiler.freestile_query(
+                        query=_ecovoyage_union(parquet_path, tier="rail"),
+                        output=str(out),
+                        layer_name="austria-rail",
+                        min_zoom=0,
+                        max_zoom=14,
+                        drop_rate=None,
+                        simplification=True,
+                        coalesce=True,
+                    )
                 return str(out)
 
             @task
@@ -839,16 +1020,17 @@ def _(Path, os, textwrap):
                 out = TILES / "austria-routes.pmtiles"
                 if not _needs_regen(out):
                     return str(out)
-                freestiler.freestile_query(
-                    query=_ecovoyage_union(parquet_path, tier="routes"),
-                    output=str(out),
-                    layer_name="austria-routes",
-                    min_zoom=6,
-                    max_zoom=14,
-                    drop_rate=None,
-                    simplification=True,
-                    coalesce=True,
-                )
+                with tm_span("freestiler.freestile_query"):
+                    freestiler.freestile_query(
+                        query=_ecovoyage_union(parquet_path, tier="routes"),
+                        output=str(out),
+                        layer_name="austria-routes",
+                        min_zoom=6,
+                        max_zoom=14,
+                        drop_rate=None,
+                        simplification=True,
+                        coalesce=True,
+                    )
                 return str(out)
 
             @task
@@ -870,16 +1052,17 @@ def _(Path, os, textwrap):
                 out = TILES / "austria-paths.pmtiles"
                 if not _needs_regen(out):
                     return str(out)
-                freestiler.freestile_query(
-                    query=_ecovoyage_union(parquet_path, tier="paths"),
-                    output=str(out),
-                    layer_name="austria-paths",
-                    min_zoom=12,
-                    max_zoom=14,
-                    drop_rate=None,
-                    simplification=True,
-                    coalesce=True,
-                )
+                with tm_span("freestiler.freestile_query"):
+                    freestiler.freestile_query(
+                        query=_ecovoyage_union(parquet_path, tier="paths"),
+                        output=str(out),
+                        layer_name="austria-paths",
+                        min_zoom=12,
+                        max_zoom=14,
+                        drop_rate=None,
+                        simplification=True,
+                        coalesce=True,
+                    )
                 return str(out)
 
             @task
@@ -952,7 +1135,7 @@ def _(Path, os, textwrap):
 
 
         notebook_austria_pipeline()
-    ''').lstrip())
+    ''').lstrip().replace("# @dag-support\n", _dag_support))
 
     # Single-DAG list/dict so the trigger cell's loop semantics
     # (`for _did in dag_ids: ...`) work unchanged. After the GTFS
@@ -963,162 +1146,285 @@ def _(Path, os, textwrap):
     return dag_files, dag_ids
 
 
-@app.cell
-def _(dag_files, dag_ids, os, requests, time):
-    # Adopt-or-trigger DAG runs, then poll to terminal state. Aligns
-    # with schedule="@monthly" + the per-task month-bucket cache:
-    # exactly one execution per DAG per calendar month is the desired
-    # semantic. Re-running this cell mid-pipeline ADOPTS the in-flight
-    # DagRun (whether triggered by the @monthly scheduler or by a
-    # previous run of this cell) and polls — it does NOT fire a
-    # redundant parallel run. That's why the cell signature carries
-    # `dag_files`/`dag_ids` from the writer cell but never re-triggers
-    # if a usable run already exists.
-    _api = os.environ.get("AIRFLOW_API_INTERNAL_URL", "http://localhost:8080")
-    _pwd = os.environ["AIRFLOW_ADMIN_PASSWORD"]
-
-    # Airflow under LocalExecutor + SQLite serializes ALL writes through
-    # one writer; a concurrent dagRun POST or state-poll GET can collide
-    # on the SQLite lock and surface HTTP 500. Retry 5xx with 1s/2s/4s
-    # backoff — principled back-pressure handling, not a magic-sleep
-    # workaround (R4 distinction).
-    def _http_with_retry(method, url, *, headers, json=None, timeout=10, retries=3):
-        _backoff = 1
-        for _attempt in range(retries):
-            _resp = requests.request(
-                method, url, headers=headers, json=json, timeout=timeout,
-            )
-            if _resp.status_code < 500:
-                _resp.raise_for_status()
-                return _resp
-            if _attempt == retries - 1:
-                _resp.raise_for_status()
-            time.sleep(_backoff)
-            _backoff *= 2
-        return _resp  # unreachable
-
-    _token = _http_with_retry(
-        "POST",
-        f"{_api}/auth/token",
-        headers={},
-        json={"username": "admin", "password": _pwd},
-        timeout=10,
-    ).json()["access_token"]
-    _auth = {"Authorization": f"Bearer {_token}"}
-
-    from datetime import datetime, timezone
-    _now = datetime.now(timezone.utc)
-    _this_month = (_now.year, _now.month)
-
-    # Phase 1 — wait for scheduler registration + unpause if needed.
-    # The dag-processor scans the dags folder every 10s
-    # (AIRFLOW__DAG_PROCESSOR__REFRESH_INTERVAL=10); 90s gives ~9 scan
-    # opportunities per DAG.
-    for _did in dag_ids:
-        _reg_deadline = time.monotonic() + 90
-        while time.monotonic() < _reg_deadline:
-            _r = requests.get(
-                f"{_api}/api/v2/dags/{_did}", headers=_auth, timeout=5,
+@app.class_definition
+# KEEP IN SYNC with notebooks/gtfs-austria.py, gtfs-graph.py,
+# osm-austria.py and osm-monaco-viz.py (their trigger cells), and
+# `publish` with the publish_run_state hook in each self-authored DAG.
+class AirflowRuns:
+    """Orchestration client the trigger cells share: one JWT per kernel
+    (re-minted when it nears expiry or on a 401), 5xx back-off for
+    Airflow's SQLite write lock, and register → unpause →
+    adopt-or-trigger over all of a notebook's DAGs at once, one thread
+    per DAG.
+
+    Completion is pushed rather than polled. The self-authored DAGs
+    carry on_success / on_failure callbacks that drop
+    `<events_dir>/<dag_id>/<run_id>.json` (`{"state": ...}`, renamed
+    into place) the moment a run ends; the notebook watches that
+    directory with `mo.watch.directory` and re-reads `states()` when a
+    file lands, so the kernel sits idle while the pipelines run. A
+    daemon listener per run covers what no callback reports on — the
+    committed graph DAG, an events dir Airflow cannot reach — by
+    reading the run's state every `fallback_s` and publishing the same
+    file once it is terminal. Past `cap_s` it publishes "timeout" but
+    keeps listening, so a run that ends late still lands; a later
+    `start()` that adopts the still-running run clears the "timeout"
+    and restarts the cap."""
+
+    TERMINAL = ("success", "failed")
+
+    _token = None           # (jwt, exp) shared by every instance
+    _lock = None
+    _listening = {}         # (dag_id, run_id) → live listener's deadline
+
+    def __init__(self, api=None, events_dir=None, *, fallback_s=30):
+        import os
+        import threading
+        from pathlib import Path
+
+        if AirflowRuns._lock is None:
+            AirflowRuns._lock = threading.Lock()
+        self.api = api or os.environ.get(
+            "AIRFLOW_API_INTERNAL_URL", "http://localhost:8080")
+        self.events_dir = Path(events_dir or os.environ.get(
+            "AIRFLOW_RUN_EVENTS_DIR", "/workspace/run-events"))
+        self.fallback_s = fallback_s
+
+    def _auth(self, stale=None):
+        import base64
+        import json
+        import os
+        import time
+
+        with AirflowRuns._lock:
+            tok = AirflowRuns._token
+            if tok is None or tok[1] < time.time() + 60 or tok[0] == stale:
+                jwt = self.request(
+                    "POST", "/auth/token", auth=False,
+                    json={"username": "admin",
+                          "password": os.environ["AIRFLOW_ADMIN_PASSWORD"]},
+                ).json()["access_token"]
+                try:
+                    claims = jwt.split(".")[1]
+                    exp = json.loads(base64.urlsafe_b64decode(
+                        claims + "=" * (-len(claims) % 4)))["exp"]
+                except (IndexError, KeyError, ValueError):
+                    exp = time.time() + 600
+                tok = AirflowRuns._token = (jwt, exp)
+        return tok[0]
+
+    def request(self, method, path, *, json=None, timeout=10, retries=3,
+                auth=True, check=True):
+        """One REST call. 5xx is retried with 1/2/4 s back-off — a
+        concurrent POST/GET colliding on the SQLite lock comes back as
+        an empty 500 — and a 401 re-mints the shared token once."""
+        import time
+
+        import requests
+
+        backoff, reauthed = 1, False
+        for attempt in range(retries):
+            token = self._auth() if auth else None
+            resp = requests.request(
+                method, f"{self.api}{path}", json=json, timeout=timeout,
+                headers={"Authorization": f"Bearer {token}"} if auth else {},
             )
-            if _r.status_code == 200:
-                if _r.json().get("is_paused"):
-                    requests.patch(
-                        f"{_api}/api/v2/dags/{_did}",
-                        headers=_auth, json={"is_paused": False}, timeout=5,
-                    )
-                    time.sleep(1)
-                    continue
+            if resp.status_code == 401 and auth and not reauthed:
+                self._auth(stale=token)
+                reauthed = True
+                continue
+            if resp.status_code < 500 or attempt == retries - 1:
+                break
+            time.sleep(backoff)
+            backoff *= 2
+        if check:
+            resp.raise_for_status()
+        return resp
+
+    def _start(self, dag_id, dag_file, adopt, now, register_s):
+        import time
+        from datetime import datetime
+
+        # Registration: the dag-processor scans the dags folder every
+        # 10 s; `register_s` (90 s) gives ~9 scan opportunities.
+        deadline = time.monotonic() + register_s
+        while True:
+            r = self.request("GET", f"/api/v2/dags/{dag_id}", timeout=5,
+                             check=False)
+            if r.status_code == 200:
+                if r.json().get("is_paused"):
+                    self.request("PATCH", f"/api/v2/dags/{dag_id}",
+                                 json={"is_paused": False}, timeout=5)
                 break
+            if r.status_code != 404:
+                r.raise_for_status()
+            if time.monotonic() > deadline:
+                raise RuntimeError(
+                    f"Airflow never registered DAG {dag_id} from {dag_file}")
             time.sleep(2)
-        else:
-            raise RuntimeError(
-                f"Airflow never registered DAG {_did} from {dag_files[_did]}"
-            )
 
-    # Phase 2 — pick the target run for each DAG. Decision rules:
-    #
-    #   * non-terminal run exists (running/queued) → ADOPT it. The
-    #     scheduler is already working on this DAG; firing another
-    #     trigger would just queue a redundant run behind
-    #     max_active_runs=1.
-    #
-    #   * terminal-success run THIS calendar month → ADOPT. The
-    #     artifacts are already on disk; downstream cells see
-    #     state=success and proceed without any wall-clock cost.
-    #
-    #   * neither → TRIGGER a new manual run. First-ever execution of
-    #     a fresh deploy, or a re-run after a non-success terminal.
-    #
-    # The Airflow REST returns most-recent dagRuns first when sorted
-    # by descending logical_date, so we scan up to 10 and pick the
-    # first match by the rules above.
-    dag_run_ids = {}
-    for _did in dag_ids:
-        _runs = _http_with_retry(
-            "GET",
-            f"{_api}/api/v2/dags/{_did}/dagRuns?limit=10&order_by=-logical_date",
-            headers=_auth,
-        ).json().get("dag_runs", [])
-        _adopt = None
-        for _r in _runs:
-            _state = _r.get("state")
-            if _state in ("running", "queued"):
-                _adopt = _r
-                break
-            if _state == "success":
-                _end = _r.get("end_date") or _r.get("logical_date")
-                if _end:
-                    _dt = datetime.fromisoformat(_end.replace("Z", "+00:00"))
-                    if (_dt.year, _dt.month) == _this_month:
-                        _adopt = _r
-                        break
-            # else (failed / upstream_failed / removed / …) → keep scanning
-        if _adopt is None:
-            _new = _http_with_retry(
-                "POST",
-                f"{_api}/api/v2/dags/{_did}/dagRuns",
-                headers=_auth,
-                json={
-                    "conf": {},
-                    "logical_date": _now.isoformat(),
-                },
-                timeout=10,
-            ).json()
-            dag_run_ids[_did] = _new["dag_run_id"]
-        else:
-            dag_run_ids[_did] = _adopt["dag_run_id"]
-
-    # Phase 3 — poll BOTH DAGs' target runs concurrently until each
-    # reaches terminal state. 2400s (40 min) covers a cold-cache
-    # Austria run: 750 MB PBF + quackosm GeoParquet + freestiler MVT/
-    # PMTiles encoding at z12 on a country extent. Warm-cache reuse
-    # (adopted success run) short-circuits to ~0s. State-poll GETs
-    # also go through the retry helper since they compete with worker
-    # writes on the same SQLite lock.
-    dag_run_states = {}
-    _poll_deadline = time.monotonic() + 2400
-    while time.monotonic() < _poll_deadline and len(dag_run_states) < len(dag_ids):
-        for _did in dag_ids:
-            if _did in dag_run_states:
-                continue
-            _state = _http_with_retry(
+        # Adopt rules: a running/queued run (the scheduler is already
+        # on it; another trigger would only queue behind
+        # max_active_runs=1), else a success this calendar month (its
+        # artefacts are on disk), else trigger. Airflow 3 wants
+        # logical_date in the trigger payload.
+        if adopt:
+            for run in self.request(
                 "GET",
-                f"{_api}/api/v2/dags/{_did}/dagRuns/{dag_run_ids[_did]}",
-                headers=_auth,
-                timeout=5,
-            ).json()["state"]
-            if _state in ("success", "failed"):
-                dag_run_states[_did] = _state
-        if len(dag_run_states) < len(dag_ids):
-            time.sleep(3)
-    if len(dag_run_states) < len(dag_ids):
-        _missing = [d for d in dag_ids if d not in dag_run_states]
-        raise TimeoutError(f"DAGs {_missing} did not finish in 40 min")
-
-    _failed = [d for d, s in dag_run_states.items() if s != "success"]
-    if _failed:
-        raise RuntimeError(f"DAG(s) ended non-success: {dag_run_states}")
+                f"/api/v2/dags/{dag_id}/dagRuns?limit=10&order_by=-logical_date",
+            ).json().get("dag_runs", []):
+                state = run.get("state")
+                if state in ("running", "queued"):
+                    return run["dag_run_id"], state
+                end = run.get("end_date") or run.get("logical_date")
+                if state == "success" and end:
+                    dt = datetime.fromisoformat(end.replace("Z", "+00:00"))
+                    if (dt.year, dt.month) == (now.year, now.month):
+                        return run["dag_run_id"], state
+        run = self.request(
+            "POST", f"/api/v2/dags/{dag_id}/dagRuns",
+            json={"conf": {}, "logical_date": now.isoformat()},
+        ).json()
+        return run["dag_run_id"], run.get("state") or "queued"
+
+    def start(self, dag_files, *, adopt=True, cap_s=3600, register_s=90):
+        """Registers, unpauses and adopts-or-triggers every DAG in
+        `dag_files` ({dag_id: path}) concurrently; returns
+        {dag_id: run_id}. Adopted runs that already finished are
+        published straight away, the rest get a fallback listener."""
+        from concurrent.futures import ThreadPoolExecutor
+        from datetime import datetime, timezone
 
+        now = datetime.now(timezone.utc)
+        self._auth()                    # mint once, not once per thread
+        with ThreadPoolExecutor(max_workers=len(dag_files)) as pool:
+            started = dict(zip(dag_files, pool.map(
+                lambda d: self._start(d, dag_files[d], adopt, now,
+                                      register_s),
+                dag_files)))
+        for dag_id, (run_id, state) in started.items():
+            with AirflowRuns._lock:
+                seen = self.state(dag_id, run_id)
+                if state in self.TERMINAL:
+                    if seen is None:
+                        self.publish(dag_id, run_id, state)
+                elif seen is not None and seen not in self.TERMINAL:
+                    # A "timeout" from an earlier cap: Airflow says the
+                    # run is still going, so it reads "running" again.
+                    (self.events_dir / dag_id / f"{run_id}.json").unlink(
+                        missing_ok=True)
+            if state not in self.TERMINAL:
+                self._listen(dag_id, run_id, cap_s)
+        return {d: run_id for d, (run_id, _) in started.items()}
+
+    def _listen(self, dag_id, run_id, cap_s):
+        import threading
+        import time
+
+        import requests
+
+        key = (dag_id, run_id)
+        with AirflowRuns._lock:
+            live = key in AirflowRuns._listening
+            AirflowRuns._listening[key] = time.monotonic() + cap_s
+        if live:
+            return                      # the live one takes the new cap
+
+        def listen():
+            try:
+                while True:
+                    seen = self.state(dag_id, run_id)
+                    if seen in self.TERMINAL:
+                        break
+                    if (seen is None
+                            and time.monotonic() > AirflowRuns._listening[key]):
+                        self.publish(dag_id, run_id, "timeout")
+                    try:
+                        state = self.request(
+                            "GET", f"/api/v2/dags/{dag_id}/dagRuns/{run_id}",
+                            timeout=5,
+                        ).json()["state"]
+                    except requests.RequestException:
+                        state = None
+                    if state in self.TERMINAL:
+                        with AirflowRuns._lock:
+                            self.publish(dag_id, run_id, state)
+                        break
+                    time.sleep(self.fallback_s)
+            finally:
+                with AirflowRuns._lock:
+                    AirflowRuns._listening.pop(key, None)
+
+        threading.Thread(target=listen, name=f"airflow-run-{dag_id}",
+                         daemon=True).start()
+
+    def publish(self, dag_id, run_id, state):
+        import json
+
+        events = self.events_dir / dag_id
+        events.mkdir(parents=True, exist_ok=True)
+        tmp = events / f".{run_id}.tmp"
+        tmp.write_text(json.dumps(
+            {"dag_id": dag_id, "run_id": run_id, "state": state}))
+        tmp.replace(events / f"{run_id}.json")
+
+    def state(self, dag_id, run_id):
+        import json
+
+        try:
+            return json.loads(
+                (self.events_dir / dag_id / f"{run_id}.json").read_text()
+            )["state"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def states(self, dag_run_ids):
+        """{dag_id: state} for the runs `start` returned; "running"
+        until the run's event file lands."""
+        return {d: self.state(d, r) or "running"
+                for d, r in dag_run_ids.items()}
+
+    def watch_path(self, dag_ids):
+        """Directory the notebook hands to `mo.watch.directory`: the
+        DAG's own events dir when there is one DAG, so other
+        notebooks' runs don't re-run this one's cells."""
+        path = self.events_dir
+        if len(dag_ids) == 1:
+            path = path / dag_ids[0]
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+
+@app.cell
+def _(dag_files, dag_ids, mo):
+    # Adopt-or-trigger DAG runs through the shared AirflowRuns client.
+    # Aligns with schedule="@monthly" + the per-task month-bucket
+    # cache: exactly one execution per DAG per calendar month is the
+    # desired semantic. Re-running this cell mid-pipeline ADOPTS the
+    # in-flight DagRun (whether triggered by the @monthly scheduler or
+    # by a previous run of this cell) — it does NOT fire a redundant
+    # parallel run. Completion arrives as a file from the DAG's
+    # publish_run_state hook in the watched run-events directory, so
+    # the kernel is not held in a poll loop. 2400 s (40 min) cap covers
+    # a cold-cache Austria run: 750 MB PBF + quackosm GeoParquet +
+    # freestiler MVT/PMTiles encoding at z12 on a country extent.
+    airflow = AirflowRuns()
+    dag_run_ids = airflow.start(dag_files, cap_s=2400)
+    run_events = mo.watch.directory(airflow.watch_path(dag_ids))
+    return airflow, dag_run_ids, run_events
+
+
+@app.cell
+def _(airflow, dag_run_ids, run_events):
+    # Re-runs each time a run-event file lands in the watched
+    # `run_events` directory; until then a DAG reads "running" and the
+    # gated cells below mo.stop on it.
+    run_events
+    dag_run_states = airflow.states(dag_run_ids)
+    _ended = {d: s for d, s in dag_run_states.items()
+              if s not in ("success", "running")}
+    if _ended:
+        raise RuntimeError(f"DAG(s) ended non-success: {_ended}")
     dag_run_states
     return (dag_run_states,)
 
@@ -87,7 +87,7 @@ def _(martin, mo, pmtiles_viewer, versatiles_assets, versatiles_public):
         Self-contained pipeline: this notebook **writes its own Airflow
         DAGs** to `${{AIRFLOW_DAGS_DIR}}` (six DAGs — OSM, GTFS, and four
         parallel vector-tile generators), **triggers** them via the
-        Airflow REST API, **polls until each succeeds**, then runs
+        Airflow REST API, **waits for each run-completion event**, then runs
         polars analysis + a cudf-polars GPU/CPU benchmark on the OSM
         GeoParquet and renders five maps:
 
@@ -154,6 +154,168 @@ def _(Path, os, textwrap):
     ))
     dags_dir.mkdir(parents=True, exist_ok=True)
 
+    # Task telemetry and the run-event hook, written once here and
+    # spliced into every DAG below at its `# @dag-support` line.
+    _dag_support = textwrap.dedent('''
+        # ── Task telemetry ──────────────────────────────────────────
+        # Every @task / @task(...) in this DAG goes through `task`
+        # below, which wraps the callable and writes ONE parquet row
+        # per task try to <AIRFLOW_TELEMETRY_DIR>/<dag_id>/<task_id>/:
+        # wall / CPU seconds (self + reaped children, so tippecanoe /
+        # osmium subprocesses count), peak RSS, storage bytes read /
+        # written (/proc/self/io), rows in / out reported via tm_rows,
+        # and sub-stage spans from tm_span / tm_iter. Best-effort — a
+        # telemetry failure never fails the task. KEEP IN SYNC with the
+        # _dag_support block of osm-austria, gtfs-austria and monaco.
+        TELEMETRY = Path(os.environ.get(
+            "AIRFLOW_TELEMETRY_DIR", "/workspace/telemetry"))
+        _tm = None        # the running task's record; one task per process
+
+
+        def _tm_usage():
+            import resource
+            import time
+            s = resource.getrusage(resource.RUSAGE_SELF)
+            c = resource.getrusage(resource.RUSAGE_CHILDREN)
+            io = {}
+            try:
+                for line in Path("/proc/self/io").read_text().splitlines():
+                    k, v = line.split(":")
+                    io[k] = int(v)
+            except OSError:
+                pass
+            return (time.perf_counter(),
+                    s.ru_utime + s.ru_stime + c.ru_utime + c.ru_stime,
+                    max(s.ru_maxrss, c.ru_maxrss) / 1024,
+                    io.get("read_bytes", 0), io.get("write_bytes", 0))
+
+
+        @contextmanager
+        def tm_span(name, **attrs):
+            """Sub-stage span in the running task's telemetry row;
+            a no-op outside an instrumented task."""
+            if _tm is None:
+                yield
+                return
+            t0, c0 = _tm_usage()[:2]
+            try:
+                yield
+            finally:
+                t1, c1 = _tm_usage()[:2]
+                _tm["spans"].append({
+                    "name": name, "start_s": t0 - _tm["t0"],
+                    "wall_s": t1 - t0, "cpu_s": c1 - c0,
+                    "attrs": json.dumps(attrs) if attrs else None,
+                })
+
+
+        def tm_iter(name, iterable):
+            """Yields from `iterable`, one span per loop-body pass."""
+            for i, item in enumerate(iterable):
+                with tm_span(name, i=i):
+                    yield item
+
+
+        def tm_rows(rows_in=None, rows_out=None):
+            if _tm is not None:
+                for k, v in (("rows_in", rows_in), ("rows_out", rows_out)):
+                    if v is not None:
+                        _tm[k] = (_tm[k] or 0) + int(v)
+
+
+        def _tm_write(started, status, error, u0, u1, rec):
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                from airflow.sdk import get_current_context
+                ti = get_current_context()["ti"]
+                map_index = getattr(ti, "map_index", None)
+                map_index = -1 if map_index is None else map_index
+                span = pa.struct([
+                    ("name", pa.string()), ("start_s", pa.float64()),
+                    ("wall_s", pa.float64()), ("cpu_s", pa.float64()),
+                    ("attrs", pa.string()),
+                ])
+                schema = pa.schema([
+                    ("dag_id", pa.string()), ("task_id", pa.string()),
+                    ("run_id", pa.string()), ("map_index", pa.int32()),
+                    ("try_number", pa.int32()), ("month", pa.string()),
+                    ("started_at", pa.timestamp("us", tz="UTC")),
+                    ("status", pa.string()), ("error", pa.string()),
+                    ("wall_s", pa.float64()), ("cpu_s", pa.float64()),
+                    ("peak_rss_mb", pa.float64()),
+                    ("read_bytes", pa.int64()), ("write_bytes", pa.int64()),
+                    ("rows_in", pa.int64()), ("rows_out", pa.int64()),
+                    ("spans", pa.list_(span)),
+                ])
+                row = {
+                    "dag_id": ti.dag_id, "task_id": ti.task_id,
+                    "run_id": ti.run_id, "map_index": map_index,
+                    "try_number": ti.try_number,
+                    "month": started.strftime("%Y-%m"), "started_at": started,
+                    "status": status, "error": error,
+                    "wall_s": u1[0] - u0[0], "cpu_s": u1[1] - u0[1],
+                    "peak_rss_mb": u1[2],
+                    "read_bytes": u1[3] - u0[3], "write_bytes": u1[4] - u0[4],
+                    "rows_in": rec["rows_in"], "rows_out": rec["rows_out"],
+                    "spans": rec["spans"],
+                }
+                out = TELEMETRY / ti.dag_id / ti.task_id
+                out.mkdir(parents=True, exist_ok=True)
+                pq.write_table(
+                    pa.Table.from_pylist([row], schema=schema),
+                    out / f"{ti.run_id}.m{map_index}.t{ti.try_number}.parquet",
+                )
+            except Exception as e:
+                print(f"[telemetry] row not written: {type(e).__name__}: {e}")
+
+
+        def _tm_measured(fn):
+            @wraps(fn)
+            def run(*args, **kwargs):
+                global _tm
+                from datetime import datetime, timezone
+                started = datetime.now(timezone.utc)
+                u0 = _tm_usage()
+                _tm = {"t0": u0[0], "spans": [],
+                       "rows_in": None, "rows_out": None}
+                status, error = "success", None
+                try:
+                    return fn(*args, **kwargs)
+                except BaseException as e:
+                    status = "skipped" if "Skip" in type(e).__name__ else "failed"
+                    error = f"{type(e).__name__}: {e}"[:500]
+                    raise
+                finally:
+                    rec, _tm = _tm, None
+                    _tm_write(started, status, error, u0, _tm_usage(), rec)
+            return run
+
+
+        def task(python_callable=None, **kwargs):
+            """airflow.sdk.task with telemetry: `@task` and `@task(...)`."""
+            if python_callable is None:
+                return lambda fn: airflow_task(**kwargs)(_tm_measured(fn))
+            return airflow_task(_tm_measured(python_callable))
+
+
+        def publish_run_state(context, state):
+            # DAG-level completion hook: drops
+            # <AIRFLOW_RUN_EVENTS_DIR>/<dag_id>/<run_id>.json (renamed
+            # into place) for the notebook's run-events watcher, so the
+            # trigger cell never polls the REST API for completion.
+            # KEEP IN SYNC with AirflowRuns.publish in the notebooks.
+            import json
+            run = context["dag_run"]
+            events = Path(os.environ.get(
+                "AIRFLOW_RUN_EVENTS_DIR", "/workspace/run-events")) / run.dag_id
+            events.mkdir(parents=True, exist_ok=True)
+            tmp = events / f".{run.run_id}.tmp"
+            tmp.write_text(json.dumps(
+                {"dag_id": run.dag_id, "run_id": run.run_id, "state": state}))
+            tmp.replace(events / f"{run.run_id}.json")
+    ''').lstrip()
+
     # ---- OSM DAG ----
     osm_dag_id = "notebook_osm_pipeline"
     osm_dag_file = dags_dir / f"{osm_dag_id}.py"
@@ -165,24 +327,32 @@ def _(Path, os, textwrap):
         Output lands under the workspace volume at the paths martin
         already serves.
         """
+        import json
         import os
         import subprocess
         import urllib.request
+        from contextlib import contextmanager
         from datetime import datetime
+        from functools import partial, wraps
         from pathlib import Path
 
-        from airflow.sdk import dag, task
+        from airflow.sdk import dag, task as airflow_task
 
         WORK = Path(os.path.expanduser("/workspace/tiles/work"))
         TILES = Path(os.path.expanduser("/workspace/tiles/pmtiles"))
 
 
+        # @dag-support
+
+
         @dag(
             dag_id="notebook_osm_pipeline",
             schedule="@monthly",
             start_date=datetime(2026, 1, 1),
             catchup=False,
             tags=["osm", "notebook"],
+            on_success_callback=partial(publish_run_state, state="success"),
+            on_failure_callback=partial(publish_run_state, state="failed"),
         )
         def notebook_osm_pipeline():
             @task
@@ -261,9 +431,12 @@ def _(Path, os, textwrap):
 
             @task
             def pbf_to_geoparquet(pbf_path: str) -> str:
+                import pyarrow.parquet as pq
                 import quackosm as qosm
                 out = WORK / "monaco.parquet"
-                qosm.convert_pbf_to_parquet(pbf_path, result_file_path=str(out))
+                with tm_span("quackosm.convert_pbf_to_parquet"):
+                    qosm.convert_pbf_to_parquet(pbf_path, result_file_path=str(out))
+                tm_rows(rows_out=pq.ParquetFile(out).metadata.num_rows)
                 return str(out)
 
             @task
@@ -288,10 +461,11 @@ def _(Path, os, textwrap):
                 out = WORK / "monaco.geojson"
                 con = duckdb.connect()
                 con.execute("INSTALL spatial; LOAD spatial;")
-                rows = con.execute(f"""
-                    SELECT ST_AsGeoJSON(geometry) AS geom_json
-                    FROM read_parquet('{parquet_path}')
-                """).fetchall()
+                with tm_span("duckdb.st_asgeojson"):
+                    rows = con.execute(f"""
+                        SELECT ST_AsGeoJSON(geometry) AS geom_json
+                        FROM read_parquet('{parquet_path}')
+                    """).fetchall()
                 features = [
                     {"type": "Feature",
                      "properties": {},
@@ -299,7 +473,8 @@ def _(Path, os, textwrap):
                     for (geom,) in rows
                     if geom
                 ]
-                with open(out, "w") as f:
+                tm_rows(rows_in=len(rows), rows_out=len(features))
+                with tm_span("geojson.write"), open(out, "w") as f:
                     _json.dump(
                         {"type": "FeatureCollection", "features": features},
                         f,
@@ -310,10 +485,11 @@ def _(Path, os, textwrap):
             def geojson_to_pmtiles(geojson_path: str) -> str:
                 TILES.mkdir(parents=True, exist_ok=True)
                 out = TILES / "monaco.pmtiles"
-                subprocess.run([
-                    "tippecanoe", "-o", str(out), "-zg",
-                    "--drop-densest-as-needed", "--force", geojson_path,
-                ], check=True)
+                with tm_span("tippecanoe"):
+                    subprocess.run([
+                        "tippecanoe", "-o", str(out), "-zg",
+                        "--drop-densest-as-needed", "--force", geojson_path,
+                    ], check=True)
                 return str(out)
 
             @task
@@ -386,7 +562,7 @@ def _(Path, os, textwrap):
 
 
         notebook_osm_pipeline()
-    ''').lstrip())
+    ''').lstrip().replace("# @dag-support\n", _dag_support))
 
     # ---- GTFS DAG ----
     gtfs_dag_id = "notebook_gtfs_pipeline"
@@ -399,23 +575,31 @@ def _(Path, os, textwrap):
         table — stops, routes, trips, stop_times, etc.). Output lands
         under the workspace volume at /workspace/gtfs/.
         """
+        import json
         import os
         import urllib.request
+        from contextlib import contextmanager
         from datetime import datetime
+        from functools import partial, wraps
         from pathlib import Path
 
-        from airflow.sdk import dag, task
+        from airflow.sdk import dag, task as airflow_task
 
         RAW = Path(os.path.expanduser("/workspace/gtfs/raw"))
         PARQUET = Path(os.path.expanduser("/workspace/gtfs/parquet"))
 
 
+        # @dag-support
+
+
         @dag(
             dag_id="notebook_gtfs_pipeline",
             schedule="@monthly",
             start_date=datetime(2026, 1, 1),
             catchup=False,
             tags=["gtfs", "transit", "notebook"],
+            on_success_callback=partial(publish_run_state, state="success"),
+            on_failure_callback=partial(publish_run_state, state="failed"),
         )
         def notebook_gtfs_pipeline():
             @task
@@ -462,15 +646,17 @@ def _(Path, os, textwrap):
             def gtfs_to_parquet(zip_path: str) -> str:
                 from gtfs_parquet import parse_gtfs, write_parquet
                 PARQUET.mkdir(parents=True, exist_ok=True)
-                feed = parse_gtfs(zip_path)
-                write_parquet(feed, str(PARQUET))
+                with tm_span("gtfs_parquet.parse_gtfs"):
+                    feed = parse_gtfs(zip_path)
+                with tm_span("gtfs_parquet.write_parquet"):
+                    write_parquet(feed, str(PARQUET))
                 return str(PARQUET)
 
             gtfs_to_parquet(download_gtfs())
 
 
         notebook_gtfs_pipeline()
-    ''').lstrip())
+    ''').lstrip().replace("# @dag-support\n", _dag_support))
 
     # ---- Pipeline 2: gpq-tiles DAG ----
     # Direct GeoParquet → PMTiles via geoparquet-io/gpq-tiles (Rust;
@@ -487,23 +673,31 @@ def _(Path, os, textwrap):
         a sibling source under martin's watched directory, so the
         existing martin tile server auto-discovers it.
         """
+        import json
         import os
         import subprocess
+        from contextlib import contextmanager
         from datetime import datetime
+        from functools import partial, wraps
         from pathlib import Path
 
-        from airflow.sdk import dag, task
+        from airflow.sdk import dag, task as airflow_task
 
         WORK = Path(os.path.expanduser("/workspace/tiles/work"))
         TILES = Path(os.path.expanduser("/workspace/tiles/pmtiles"))
 
 
+        # @dag-support
+
+
         @dag(
             dag_id="notebook_osm_gpqtiles_pipeline",
             schedule="@monthly",
             start_date=datetime(2026, 1, 1),
             catchup=False,
             tags=["osm", "notebook", "gpq-tiles"],
+            on_success_callback=partial(publish_run_state, state="success"),
+            on_failure_callback=partial(publish_run_state, state="failed"),
         )
         def notebook_osm_gpqtiles_pipeline():
             @task
@@ -519,22 +713,24 @@ def _(Path, os, textwrap):
                 # existent / partial file. Per R4 this is principled
                 # cross-DAG synchronization on a known producer-
                 # consumer dep, not a magic sleep.
-                _deadline = time.monotonic() + 600
-                while not (parquet_path.exists() and parquet_path.stat().st_size > 0):
-                    if time.monotonic() > _deadline:
-                        raise TimeoutError(f"{parquet_path} not produced within 600s")
-                    time.sleep(2)
+                with tm_span("wait_for_parquet"):
+                    _deadline = time.monotonic() + 600
+                    while not (parquet_path.exists() and parquet_path.stat().st_size > 0):
+                        if time.monotonic() > _deadline:
+                            raise TimeoutError(f"{parquet_path} not produced within 600s")
+                        time.sleep(2)
                 # gpq-tiles is a system binary in this image (the
                 # osm-tools layer cargo-installs it because PyPI wheels
                 # don't cover our Python 3.13 / linux x86_64 combo and
                 # the pixi env's no-build = true blocks sdist resolution).
-                subprocess.run([
-                    "/usr/local/bin/gpq-tiles",
-                    str(parquet_path), str(out),
-                    "--min-zoom", "0",
-                    "--max-zoom", "14",
-                    "--drop-densest-as-needed",
-                ], check=True)
+                with tm_span("gpq-tiles"):
+                    subprocess.run([
+                        "/usr/local/bin/gpq-tiles",
+                        str(parquet_path), str(out),
+                        "--min-zoom", "0",
+                        "--max-zoom", "14",
+                        "--drop-densest-as-needed",
+                    ], check=True)
                 return str(out)
 
             @task
@@ -599,7 +795,7 @@ def _(Path, os, textwrap):
 
 
         notebook_osm_gpqtiles_pipeline()
-    ''').lstrip())
+    ''').lstrip().replace("# @dag-support\n", _dag_support))
 
     # ---- Pipeline 3: DuckDB ST_AsMVT + pmtiles.Writer DAG ----
     # The "by hand" reference path. DuckDB's spatial extension encodes
@@ -615,13 +811,16 @@ def _(Path, os, textwrap):
         Python. Scoped to z=10..14 over Monaco's bbox to keep tile
         count tractable (~340 tiles).
         """
+        import json
         import os
         import math
         import subprocess
+        from contextlib import contextmanager
         from datetime import datetime
+        from functools import partial, wraps
         from pathlib import Path
 
-        from airflow.sdk import dag, task
+        from airflow.sdk import dag, task as airflow_task
 
         WORK = Path(os.path.expanduser("/workspace/tiles/work"))
         TILES = Path(os.path.expanduser("/workspace/tiles/pmtiles"))
@@ -644,12 +843,17 @@ def _(Path, os, textwrap):
                         yield z, x, y
 
 
+        # @dag-support
+
+
         @dag(
             dag_id="notebook_osm_duckdb_mvt_pipeline",
             schedule="@monthly",
             start_date=datetime(2026, 1, 1),
             catchup=False,
             tags=["osm", "notebook", "duckdb-mvt"],
+            on_success_callback=partial(publish_run_state, state="success"),
+            on_failure_callback=partial(publish_run_state, state="failed"),
         )
         def notebook_osm_duckdb_mvt_pipeline():
             @task
@@ -665,11 +869,12 @@ def _(Path, os, textwrap):
 
                 # Wait for the OSM DAG's pbf_to_geoparquet task to finish
                 # (see gpqtiles_convert for full rationale).
-                _deadline = time.monotonic() + 600
-                while not (parquet_path.exists() and parquet_path.stat().st_size > 0):
-                    if time.monotonic() > _deadline:
-                        raise TimeoutError(f"{parquet_path} not produced within 600s")
-                    time.sleep(2)
+                with tm_span("wait_for_parquet"):
+                    _deadline = time.monotonic() + 600
+                    while not (parquet_path.exists() and parquet_path.stat().st_size > 0):
+                        if time.monotonic() > _deadline:
+                            raise TimeoutError(f"{parquet_path} not produced within 600s")
+                        time.sleep(2)
 
                 # Monaco bbox (approx): lon 7.40-7.45, lat 43.71-43.77
                 MIN_LON, MAX_LON = 7.40, 7.45
@@ -701,15 +906,18 @@ def _(Path, os, textwrap):
                 # the `bounds` argument as BOX_2D. DuckDB Spatial has
                 # no direct GEOMETRY→BOX_2D cast, so we wrap in
                 # ST_Extent which projects to BOX_2D correctly.
-                con.execute(f"""
-                    CREATE TEMP TABLE src AS
-                    SELECT ST_Transform(geometry, 'EPSG:4326', 'EPSG:3857', always_xy := true) AS geom
-                    FROM read_parquet('{parquet_path}')
-                    WHERE geometry IS NOT NULL
-                """)
+                with tm_span("duckdb.project_src"):
+                    con.execute(f"""
+                        CREATE TEMP TABLE src AS
+                        SELECT ST_Transform(geometry, 'EPSG:4326', 'EPSG:3857', always_xy := true) AS geom
+                        FROM read_parquet('{parquet_path}')
+                        WHERE geometry IS NOT NULL
+                    """)
+                tm_rows(rows_in=con.execute("SELECT count(*) FROM src").fetchone()[0])
 
                 tiles_written = 0
-                with open(out, "wb") as f:
+                encode = tm_span("duckdb.st_asmvt", min_zoom=MIN_Z, max_zoom=MAX_Z)
+                with encode, open(out, "wb") as f:
                     writer = Writer(f)
                     for z, x, y in _tile_coords_for_bbox(
                         MIN_LON, MIN_LAT, MAX_LON, MAX_LAT, MIN_Z, MAX_Z,
@@ -769,6 +977,7 @@ def _(Path, os, textwrap):
                         },
                         {"vector_layers": [{"id": "monaco", "fields": {}}]},
                     )
+                tm_rows(rows_out=tiles_written)
                 print(f"wrote {tiles_written} tiles to {out}")
                 return str(out)
 
@@ -834,7 +1043,7 @@ def _(Path, os, textwrap):
 
 
         notebook_osm_duckdb_mvt_pipeline()
-    ''').lstrip())
+    ''').lstrip().replace("# @dag-support\n", _dag_support))
 
     # ---- Pipeline 4: DuckDB → freestiler DAG ----
     # The "by library" companion to the ST_AsMVT pipeline. Same DuckDB
@@ -850,23 +1059,31 @@ def _(Path, os, textwrap):
         Rust tiling engine handles the per-tile MVT encoding +
         PMTiles archive packing in one library call.
         """
+        import json
         import os
         import subprocess
+        from contextlib import contextmanager
         from datetime import datetime
+        from functools import partial, wraps
         from pathlib import Path
 
-        from airflow.sdk import dag, task
+        from airflow.sdk import dag, task as airflow_task
 
         WORK = Path(os.path.expanduser("/workspace/tiles/work"))
         TILES = Path(os.path.expanduser("/workspace/tiles/pmtiles"))
 
 
+        # @dag-support
+
+
         @dag(
             dag_id="notebook_osm_duckdb_freestiler_pipeline",
             schedule="@monthly",
             start_date=datetime(2026, 1, 1),
             catchup=False,
             tags=["osm", "notebook", "duckdb-freestiler"],
+            on_success_callback=partial(publish_run_state, state="success"),
+            on_failure_callback=partial(publish_run_state, state="failed"),
         )
         def notebook_osm_duckdb_freestiler_pipeline():
             @task
@@ -880,11 +1097,12 @@ def _(Path, os, textwrap):
 
                 # Wait for the OSM DAG's pbf_to_geoparquet task to finish
                 # (see gpqtiles_convert for full rationale).
-                _deadline = time.monotonic() + 600
-                while not (parquet_path.exists() and parquet_path.stat().st_size > 0):
-                    if time.monotonic() > _deadline:
-                        raise TimeoutError(f"{parquet_path} not produced within 600s")
-                    time.sleep(2)
+                with tm_span("wait_for_parquet"):
+                    _deadline = time.monotonic() + 600
+                    while not (parquet_path.exists() and parquet_path.stat().st_size > 0):
+                        if time.monotonic() > _deadline:
+                            raise TimeoutError(f"{parquet_path} not produced within 600s")
+                        time.sleep(2)
 
                 # freestiler accepts either a file path (sf/spatial-file
                 # input) OR a DuckDB SQL query. Use the SQL form to
@@ -894,21 +1112,23 @@ def _(Path, os, textwrap):
                 # surface if it differs from the expected API.
                 query = f"SELECT * FROM read_parquet('{parquet_path}')"
                 if hasattr(freestiler, "freestile_query"):
-                    freestiler.freestile_query(
-                        query=query,
-                        output=str(out),
-                        layer_name="monaco",
-                        min_zoom=0,
-                        max_zoom=14,
-                    )
+                    with tm_span("freestiler.freestile_query"):
+                        freestiler.freestile_query(
+                            query=query,
+                            output=str(out),
+                            layer_name="monaco",
+                            min_zoom=0,
+                            max_zoom=14,
+                        )
                 elif hasattr(freestiler, "freestile"):
-                    freestiler.freestile(
-                        input=query,
-                        output=str(out),
-                        layer_name="monaco",
-                        min_zoom=0,
-                        max_zoom=14,
-                    )
+                    with tm_span("freestiler.freestile"):
+                        freestiler.freestile(
+                            input=query,
+                            output=str(out),
+                            layer_name="monaco",
+                            min_zoom=0,
+                            max_zoom=14,
+                        )
                 else:
                     public = sorted(n for n in dir(freestiler) if not n.startswith("_"))
                     raise RuntimeError(
@@ -979,7 +1199,7 @@ def _(Path, os, textwrap):
 
 
         notebook_osm_duckdb_freestiler_pipeline()
-    ''').lstrip())
+    ''').lstrip().replace("# @dag-support\n", _dag_support))
 
     # ---- Pipeline 5: Shortbread via Tilemaker DAG ----
     # The shortbread-tiles.org schema is the de-facto general-purpose
@@ -1003,23 +1223,31 @@ def _(Path, os, textwrap):
         watched directory; reload_versatiles restarts the service
         so the new file's mtime is registered.
         """
+        import json
         import os
         import subprocess
+        from contextlib import contextmanager
         from datetime import datetime
+        from functools import partial, wraps
         from pathlib import Path
 
-        from airflow.sdk import dag, task
+        from airflow.sdk import dag, task as airflow_task
 
         WORK = Path(os.path.expanduser("/workspace/tiles/work"))
         SHORTBREAD = Path(os.path.expanduser("/workspace/tiles/shortbread"))
 
 
+        # @dag-support
+
+
         @dag(
             dag_id="notebook_osm_shortbread_pipeline",
             schedule="@monthly",
             start_date=datetime(2026, 1, 1),
             catchup=False,
             tags=["osm", "notebook", "shortbread", "tilemaker"],
+            on_success_callback=partial(publish_run_state, state="success"),
+            on_failure_callback=partial(publish_run_state, state="failed"),
         )
         def notebook_osm_shortbread_pipeline():
             @task
@@ -1043,24 +1271,26 @@ def _(Path, os, textwrap):
                 # freestiler_convert — one shared pattern across all
                 # four PBF consumers (R3: no ad-hoc per-DAG variants
                 # of the same producer-consumer dep).
-                _deadline = time.monotonic() + 600
-                while not (parquet.exists() and parquet.stat().st_size > 0):
-                    if time.monotonic() > _deadline:
-                        raise TimeoutError(f"{parquet} not produced within 600s")
-                    time.sleep(2)
+                with tm_span("wait_for_parquet"):
+                    _deadline = time.monotonic() + 600
+                    while not (parquet.exists() and parquet.stat().st_size > 0):
+                        if time.monotonic() > _deadline:
+                            raise TimeoutError(f"{parquet} not produced within 600s")
+                        time.sleep(2)
                 # tilemaker's CLI shape: --input + --output + --config +
                 # --process. The shortbread-tilemaker repo ships
                 # config.json (layer/zoom schema) and process.lua (per-
                 # feature classifier). Output extension `.pmtiles` is
                 # detected by tilemaker (>= v3.0) and produces a
                 # PMTiles archive directly — no .mbtiles intermediate.
-                subprocess.run([
-                    "tilemaker",
-                    "--input", str(pbf),
-                    "--output", str(out),
-                    "--config", "/opt/shortbread-tilemaker/config.json",
-                    "--process", "/opt/shortbread-tilemaker/process.lua",
-                ], check=True)
+                with tm_span("tilemaker"):
+                    subprocess.run([
+                        "tilemaker",
+                        "--input", str(pbf),
+                        "--output", str(out),
+                        "--config", "/opt/shortbread-tilemaker/config.json",
+                        "--process", "/opt/shortbread-tilemaker/process.lua",
+                    ], check=True)
                 return str(out)
 
             @task
@@ -1111,7 +1341,7 @@ def _(Path, os, textwrap):
 
 
         notebook_osm_shortbread_pipeline()
-    ''').lstrip())
+    ''').lstrip().replace("# @dag-support\n", _dag_support))
 
     dag_ids = [
         osm_dag_id, gtfs_dag_id,
@@ -1129,135 +1359,297 @@ def _(Path, os, textwrap):
     return dag_files, dag_ids
 
 
-@app.cell
-def _(dag_files, dag_ids, os, requests, time):
-    # Server-side: container-internal loopback by default. Override
-    # AIRFLOW_API_INTERNAL_URL for cross-pod topologies (e.g. set
-    # to "http://airflow-pod:8080" when airflow runs in a separate
-    # pod on the shared ov podman network).
-    _api = os.environ.get("AIRFLOW_API_INTERNAL_URL", "http://localhost:8080")
-    _pwd = os.environ["AIRFLOW_ADMIN_PASSWORD"]
-
-    # Airflow under the default LocalExecutor + SQLite metadata DB
-    # serializes ALL writes through one writer. When the dag-processor
-    # registers a DAG and workers start streaming task-instance state
-    # writes (PATCH /execution/task-instances/.../run|state|heartbeat
-    # |rtif), a concurrent dagRun POST or state-poll GET can collide
-    # on the SQLite lock; the ASGI handler waits ~5s for the lock,
-    # returns HTTP 500 with an empty body. We tolerate the transient
-    # by retrying 5xx with 1s/2s/4s backoff. This is not a magic-sleep
-    # workaround (R4): it's principled external-API back-pressure
-    # handling, the same pattern the cell already uses for DAG-
-    # registration polling. Long-term fix is to swap SQLite for
-    # Postgres (the airflow layer's intended scale-out path); that's
-    # a separate cutover.
-    def _http_with_retry(method, url, *, headers, json=None, timeout=10, retries=3):
-        _backoff = 1
-        for _attempt in range(retries):
-            _resp = requests.request(
-                method, url, headers=headers, json=json, timeout=timeout,
-            )
-            if _resp.status_code < 500:
-                _resp.raise_for_status()
-                return _resp
-            if _attempt == retries - 1:
-                _resp.raise_for_status()
-            time.sleep(_backoff)
-            _backoff *= 2
-        return _resp  # unreachable
-
-    # 1. Get JWT once (used for all DAG operations below).
-    _token = _http_with_retry(
-        "POST",
-        f"{_api}/auth/token",
-        headers={},
-        json={"username": "admin", "password": _pwd},
-        timeout=10,
-    ).json()["access_token"]
-    _auth = {"Authorization": f"Bearer {_token}"}
-
-    from datetime import datetime, timezone
-
-    # 2. For EACH DAG: wait for scheduler registration → unpause →
-    #    trigger → record run_id. Airflow scans the dags folder every
-    #    10s (AIRFLOW__DAG_PROCESSOR__REFRESH_INTERVAL=10); 90s gives
-    #    headroom for ~9 scan opportunities per DAG.
-    dag_run_ids = {}
-    for _did in dag_ids:
-        _deadline = time.monotonic() + 90
-        while time.monotonic() < _deadline:
-            _r = requests.get(
-                f"{_api}/api/v2/dags/{_did}", headers=_auth, timeout=5,
+@app.class_definition
+# KEEP IN SYNC with notebooks/gtfs-austria.py, gtfs-graph.py,
+# osm-austria.py and osm-monaco-viz.py (their trigger cells), and
+# `publish` with the publish_run_state hook in each self-authored DAG.
+class AirflowRuns:
+    """Orchestration client the trigger cells share: one JWT per kernel
+    (re-minted when it nears expiry or on a 401), 5xx back-off for
+    Airflow's SQLite write lock, and register → unpause →
+    adopt-or-trigger over all of a notebook's DAGs at once, one thread
+    per DAG.
+
+    Completion is pushed rather than polled. The self-authored DAGs
+    carry on_success / on_failure callbacks that drop
+    `<events_dir>/<dag_id>/<run_id>.json` (`{"state": ...}`, renamed
+    into place) the moment a run ends; the notebook watches that
+    directory with `mo.watch.directory` and re-reads `states()` when a
+    file lands, so the kernel sits idle while the pipelines run. A
+    daemon listener per run covers what no callback reports on — the
+    committed graph DAG, an events dir Airflow cannot reach — by
+    reading the run's state every `fallback_s` and publishing the same
+    file once it is terminal. Past `cap_s` it publishes "timeout" but
+    keeps listening, so a run that ends late still lands; a later
+    `start()` that adopts the still-running run clears the "timeout"
+    and restarts the cap."""
+
+    TERMINAL = ("success", "failed")
+
+    _token = None           # (jwt, exp) shared by every instance
+    _lock = None
+    _listening = {}         # (dag_id, run_id) → live listener's deadline
+
+    def __init__(self, api=None, events_dir=None, *, fallback_s=30):
+        import os
+        import threading
+        from pathlib import Path
+
+        if AirflowRuns._lock is None:
+            AirflowRuns._lock = threading.Lock()
+        self.api = api or os.environ.get(
+            "AIRFLOW_API_INTERNAL_URL", "http://localhost:8080")
+        self.events_dir = Path(events_dir or os.environ.get(
+            "AIRFLOW_RUN_EVENTS_DIR", "/workspace/run-events"))
+        self.fallback_s = fallback_s
+
+    def _auth(self, stale=None):
+        import base64
+        import json
+        import os
+        import time
+
+        with AirflowRuns._lock:
+            tok = AirflowRuns._token
+            if tok is None or tok[1] < time.time() + 60 or tok[0] == stale:
+                jwt = self.request(
+                    "POST", "/auth/token", auth=False,
+                    json={"username": "admin",
+                          "password": os.environ["AIRFLOW_ADMIN_PASSWORD"]},
+                ).json()["access_token"]
+                try:
+                    claims = jwt.split(".")[1]
+                    exp = json.loads(base64.urlsafe_b64decode(
+                        claims + "=" * (-len(claims) % 4)))["exp"]
+                except (IndexError, KeyError, ValueError):
+                    exp = time.time() + 600
+                tok = AirflowRuns._token = (jwt, exp)
+        return tok[0]
+
+    def request(self, method, path, *, json=None, timeout=10, retries=3,
+                auth=True, check=True):
+        """One REST call. 5xx is retried with 1/2/4 s back-off — a
+        concurrent POST/GET colliding on the SQLite lock comes back as
+        an empty 500 — and a 401 re-mints the shared token once."""
+        import time
+
+        import requests
+
+        backoff, reauthed = 1, False
+        for attempt in range(retries):
+            token = self._auth() if auth else None
+            resp = requests.request(
+                method, f"{self.api}{path}", json=json, timeout=timeout,
+                headers={"Authorization": f"Bearer {token}"} if auth else {},
             )
-            if _r.status_code == 200:
-                if _r.json().get("is_paused"):
-                    requests.patch(
-                        f"{_api}/api/v2/dags/{_did}",
-                        headers=_auth, json={"is_paused": False}, timeout=5,
-                    )
-                    time.sleep(1)
-                    continue
+            if resp.status_code == 401 and auth and not reauthed:
+                self._auth(stale=token)
+                reauthed = True
+                continue
+            if resp.status_code < 500 or attempt == retries - 1:
                 break
+            time.sleep(backoff)
+            backoff *= 2
+        if check:
+            resp.raise_for_status()
+        return resp
+
+    def _start(self, dag_id, dag_file, adopt, now, register_s):
+        import time
+        from datetime import datetime
+
+        # Registration: the dag-processor scans the dags folder every
+        # 10 s; `register_s` (90 s) gives ~9 scan opportunities.
+        deadline = time.monotonic() + register_s
+        while True:
+            r = self.request("GET", f"/api/v2/dags/{dag_id}", timeout=5,
+                             check=False)
+            if r.status_code == 200:
+                if r.json().get("is_paused"):
+                    self.request("PATCH", f"/api/v2/dags/{dag_id}",
+                                 json={"is_paused": False}, timeout=5)
+                break
+            if r.status_code != 404:
+                r.raise_for_status()
+            if time.monotonic() > deadline:
+                raise RuntimeError(
+                    f"Airflow never registered DAG {dag_id} from {dag_file}")
             time.sleep(2)
-        else:
-            raise RuntimeError(
-                f"Airflow never registered DAG {_did} from {dag_files[_did]}"
-            )
-        # Trigger. Airflow 3.x requires logical_date in the trigger
-        # payload (was auto-generated in 2.x). Retries cover SQLite
-        # write-lock contention as workers ramp up under load.
-        _run = _http_with_retry(
-            "POST",
-            f"{_api}/api/v2/dags/{_did}/dagRuns",
-            headers=_auth,
-            json={
-                "conf": {},
-                "logical_date": datetime.now(timezone.utc).isoformat(),
-            },
-            timeout=10,
-        ).json()
-        dag_run_ids[_did] = _run["dag_run_id"]
-
-    # 3. Poll BOTH DAGs concurrently until each reaches success/failed.
-    #    10 min cap covers cold-cache downloads (PBF ~12 MB +
-    #    GTFS ~770 KB) plus quackosm + tippecanoe + gtfs-parquet.
-    #    State-poll GETs ALSO go through the retry helper since
-    #    they compete with worker writes on the same SQLite lock.
-    dag_run_states = {}
-    _deadline = time.monotonic() + 600
-    while time.monotonic() < _deadline and len(dag_run_states) < len(dag_ids):
-        for _did in dag_ids:
-            if _did in dag_run_states:
-                continue
-            _state = _http_with_retry(
+
+        # Adopt rules: a running/queued run (the scheduler is already
+        # on it; another trigger would only queue behind
+        # max_active_runs=1), else a success this calendar month (its
+        # artefacts are on disk), else trigger. Airflow 3 wants
+        # logical_date in the trigger payload.
+        if adopt:
+            for run in self.request(
                 "GET",
-                f"{_api}/api/v2/dags/{_did}/dagRuns/{dag_run_ids[_did]}",
-                headers=_auth,
-                timeout=5,
-            ).json()["state"]
-            if _state in ("success", "failed"):
-                dag_run_states[_did] = _state
-        if len(dag_run_states) < len(dag_ids):
-            time.sleep(3)
-    if len(dag_run_states) < len(dag_ids):
-        _missing = [d for d in dag_ids if d not in dag_run_states]
-        raise TimeoutError(f"DAGs {_missing} did not finish in 10 min")
-
-    # 4. Fail loudly if any DAG ended non-success.
-    _failed = [d for d, s in dag_run_states.items() if s != "success"]
-    if _failed:
-        raise RuntimeError(f"DAG(s) ended non-success: {dag_run_states}")
-
-    # Display the per-DAG state map (marimo renders the dict).
+                f"/api/v2/dags/{dag_id}/dagRuns?limit=10&order_by=-logical_date",
+            ).json().get("dag_runs", []):
+                state = run.get("state")
+                if state in ("running", "queued"):
+                    return run["dag_run_id"], state
+                end = run.get("end_date") or run.get("logical_date")
+                if state == "success" and end:
+                    dt = datetime.fromisoformat(end.replace("Z", "+00:00"))
+                    if (dt.year, dt.month) == (now.year, now.month):
+                        return run["dag_run_id"], state
+        run = self.request(
+            "POST", f"/api/v2/dags/{dag_id}/dagRuns",
+            json={"conf": {}, "logical_date": now.isoformat()},
+        ).json()
+        return run["dag_run_id"], run.get("state") or "queued"
+
+    def start(self, dag_files, *, adopt=True, cap_s=3600, register_s=90):
+        """Registers, unpauses and adopts-or-triggers every DAG in
+        `dag_files` ({dag_id: path}) concurrently; returns
+        {dag_id: run_id}. Adopted runs that already finished are
+        published straight away, the rest get a fallback listener."""
+        from concurrent.futures import ThreadPoolExecutor
+        from datetime import datetime, timezone
+
+        now = datetime.now(timezone.utc)
+        self._auth()                    # mint once, not once per thread
+        with ThreadPoolExecutor(max_workers=len(dag_files)) as pool:
+            started = dict(zip(dag_files, pool.map(
+                lambda d: self._start(d, dag_files[d], adopt, now,
+                                      register_s),
+                dag_files)))
+        for dag_id, (run_id, state) in started.items():
+            with AirflowRuns._lock:
+                seen = self.state(dag_id, run_id)
+                if state in self.TERMINAL:
+                    if seen is None:
+                        self.publish(dag_id, run_id, state)
+                elif seen is not None and seen not in self.TERMINAL:
+                    # A "timeout" from an earlier cap: Airflow says the
+                    # run is still going, so it reads "running" again.
+                    (self.events_dir / dag_id / f"{run_id}.json").unlink(
+                        missing_ok=True)
+            if state not in self.TERMINAL:
+                self._listen(dag_id, run_id, cap_s)
+        return {d: run_id for d, (run_id, _) in started.items()}
+
+    def _listen(self, dag_id, run_id, cap_s):
+        import threading
+        import time
+
+        import requests
+
+        key = (dag_id, run_id)
+        with AirflowRuns._lock:
+            live = key in AirflowRuns._listening
+            AirflowRuns._listening[key] = time.monotonic() + cap_s
+        if live:
+            return                      # the live one takes the new cap
+
+        def listen():
+            try:
+                while True:
+                    seen = self.state(dag_id, run_id)
+                    if seen in self.TERMINAL:
+                        break
+                    if (seen is None
+                            and time.monotonic() > AirflowRuns._listening[key]):
+                        self.publish(dag_id, run_id, "timeout")
+                    try:
+                        state = self.request(
+                            "GET", f"/api/v2/dags/{dag_id}/dagRuns/{run_id}",
+                            timeout=5,
+                        ).json()["state"]
+                    except requests.RequestException:
+                        state = None
+                    if state in self.TERMINAL:
+                        with AirflowRuns._lock:
+                            self.publish(dag_id, run_id, state)
+                        break
+                    time.sleep(self.fallback_s)
+            finally:
+                with AirflowRuns._lock:
+                    AirflowRuns._listening.pop(key, None)
+
+        threading.Thread(target=listen, name=f"airflow-run-{dag_id}",
+                         daemon=True).start()
+
+    def publish(self, dag_id, run_id, state):
+        import json
+
+        events = self.events_dir / dag_id
+        events.mkdir(parents=True, exist_ok=True)
+        tmp = events / f".{run_id}.tmp"
+        tmp.write_text(json.dumps(
+            {"dag_id": dag_id, "run_id": run_id, "state": state}))
+        tmp.replace(events / f"{run_id}.json")
+
+    def state(self, dag_id, run_id):
+        import json
+
+        try:
+            return json.loads(
+                (self.events_dir / dag_id / f"{run_id}.json").read_text()
+            )["state"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def states(self, dag_run_ids):
+        """{dag_id: state} for the runs `start` returned; "running"
+        until the run's event file lands."""
+        return {d: self.state(d, r) or "running"
+                for d, r in dag_run_ids.items()}
+
+    def watch_path(self, dag_ids):
+        """Directory the notebook hands to `mo.watch.directory`: the
+        DAG's own events dir when there is one DAG, so other
+        notebooks' runs don't re-run this one's cells."""
+        path = self.events_dir
+        if len(dag_ids) == 1:
+            path = path / dag_ids[0]
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+
+@app.cell
+def _(dag_files, dag_ids, mo):
+    # Trigger all six DAGs at once through the shared AirflowRuns
+    # client (adopt=False: this demo always runs fresh). Server-side
+    # calls go to AIRFLOW_API_INTERNAL_URL — container-internal
+    # loopback by default, "http://airflow-pod:8080" when airflow runs
+    # in a separate pod on the shared ov podman network. Each DAG's
+    # publish_run_state hook drops a file in the watched run-events
+    # directory when it ends, and the cell below re-reads the states
+    # then — no poll loop in the kernel. 10 min cap covers cold-cache
+    # downloads (PBF ~12 MB + GTFS ~770 KB) plus quackosm + tippecanoe
+    # + gtfs-parquet.
+    airflow = AirflowRuns()
+    dag_run_ids = airflow.start(dag_files, adopt=False, cap_s=600)
+    run_events = mo.watch.directory(airflow.watch_path(dag_ids))
+    return airflow, dag_run_ids, run_events
+
+
+@app.cell
+def _(airflow, dag_run_ids, run_events):
+    # Re-runs each time a run-event file lands in the watched
+    # `run_events` directory; until then a DAG reads "running" and the
+    # gated cells below mo.stop on it.
+    run_events
+    dag_run_states = airflow.states(dag_run_ids)
+    _ended = {d: s for d, s in dag_run_states.items()
+              if s not in ("success", "running")}
+    if _ended:
+        raise RuntimeError(f"DAG(s) ended non-success: {_ended}")
     dag_run_states
     return (dag_run_states,)
 
 
 @app.cell
-def _(dag_run_states, os, pl):
+def _(dag_run_states, mo, os, pl):
     # Class A — server-side compute, server-rendered table. No URL concern.
     # Gate on the OSM DAG having finished successfully.
-    assert dag_run_states["notebook_osm_pipeline"] == "success"
+    mo.stop(
+        dag_run_states.get("notebook_osm_pipeline") != "success",
+        f"Waiting for notebook_osm_pipeline (state="
+        f"{dag_run_states.get('notebook_osm_pipeline')!r})",
+    )
     parquet_path = os.path.expanduser("/workspace/tiles/work/monaco.parquet")
 
     # cudf-polars-cu13 panics on group_by over Arrow Map<String,String>
@@ -1307,7 +1699,7 @@ def _(parquet_path, pl):
 
 
 @app.cell
-def _(dag_run_states, parquet_path):
+def _(dag_run_states, mo, parquet_path):
     # Class A — server-side DuckDB Spatial query over the same OSM
     # parquet. DuckDB's `spatial` extension reads GeoParquet's
     # geometry-column metadata and exposes the column as
@@ -1317,7 +1709,11 @@ def _(dag_run_states, parquet_path):
     # because the geometry is no longer a raw BLOB at this point).
     # This cell answers the basic sanity question: per-geometry-type
     # counts.
-    assert dag_run_states["notebook_osm_pipeline"] == "success"
+    mo.stop(
+        dag_run_states.get("notebook_osm_pipeline") != "success",
+        f"Waiting for notebook_osm_pipeline (state="
+        f"{dag_run_states.get('notebook_osm_pipeline')!r})",
+    )
     import duckdb
     _con = duckdb.connect()
     _con.execute("INSTALL spatial; LOAD spatial;")
@@ -1334,14 +1730,18 @@ def _(dag_run_states, parquet_path):
 
 
 @app.cell
-def _(dag_run_states, parquet_path, pl):
+def _(dag_run_states, mo, parquet_path, pl):
     # Class A — polars-st adds GEOS-backed spatial operations as a
     # Polars expression namespace (`.st.*`). This cell decodes the
     # WKB geometry column, computes per-feature bounding-box area,
     # and reports the 10 largest polygons. Pure CPU — cudf-polars-cu13
     # falls back to the CPU executor for the .st.* namespace, which is
     # exactly what we want here (the spatial ops aren't GPU-accelerated).
-    assert dag_run_states["notebook_osm_pipeline"] == "success"
+    mo.stop(
+        dag_run_states.get("notebook_osm_pipeline") != "success",
+        f"Waiting for notebook_osm_pipeline (state="
+        f"{dag_run_states.get('notebook_osm_pipeline')!r})",
+    )
     import polars_st as st
     df_polars_st = (
         pl.scan_parquet(parquet_path)
@@ -1536,7 +1936,11 @@ def _(dag_run_states, martin, mo):
     # the gpqtiles DAG writes /workspace/tiles/pmtiles/monaco-gpqtiles.pmtiles.
     # Same vector-tile contract as the streets map above; styling is
     # deliberately neutral so visual differences = engine differences.
-    assert dag_run_states["notebook_osm_gpqtiles_pipeline"] == "success"
+    mo.stop(
+        dag_run_states.get("notebook_osm_gpqtiles_pipeline") != "success",
+        f"Waiting for notebook_osm_gpqtiles_pipeline (state="
+        f"{dag_run_states.get('notebook_osm_gpqtiles_pipeline')!r})",
+    )
     mo.iframe(
         build_pipeline_maplibre_html(martin, "monaco-gpqtiles"),
         height="400px",
@@ -1549,7 +1953,11 @@ def _(dag_run_states, martin, mo):
     # Pipeline 3 — DuckDB ST_AsMVT + pmtiles.Writer (hand-rolled per-tile
     # encoding in Python). Renders the sibling source `monaco-duckdb-mvt`
     # that martin auto-discovers after the DuckDB-MVT DAG completes.
-    assert dag_run_states["notebook_osm_duckdb_mvt_pipeline"] == "success"
+    mo.stop(
+        dag_run_states.get("notebook_osm_duckdb_mvt_pipeline") != "success",
+        f"Waiting for notebook_osm_duckdb_mvt_pipeline (state="
+        f"{dag_run_states.get('notebook_osm_duckdb_mvt_pipeline')!r})",
+    )
     mo.iframe(
         build_pipeline_maplibre_html(martin, "monaco-duckdb-mvt"),
         height="400px",
@@ -1564,7 +1972,11 @@ def _(dag_run_states, martin, mo):
     # in one library call). Renders the sibling source
     # `monaco-duckdb-freestiler`. Compare side-by-side with the AsMVT
     # rendering above: same input, different engine.
-    assert dag_run_states["notebook_osm_duckdb_freestiler_pipeline"] == "success"
+    mo.stop(
+        dag_run_states.get("notebook_osm_duckdb_freestiler_pipeline") != "success",
+        f"Waiting for notebook_osm_duckdb_freestiler_pipeline (state="
+        f"{dag_run_states.get('notebook_osm_duckdb_freestiler_pipeline')!r})",
+    )
     mo.iframe(
         build_pipeline_maplibre_html(martin, "monaco-duckdb-freestiler"),
         height="400px",
@@ -1573,7 +1985,7 @@ def _(dag_run_states, martin, mo):
 
 
 @app.cell
-def _(Path, dag_run_states, os, pl):
+def _(Path, dag_run_states, mo, os, pl):
     # versatiles convert round-trip demo — PMTiles → .versatiles →
     # PMTiles. Demonstrates the symmetric `versatiles convert`
     # subcommand: the same binary that runs `versatiles serve` in
@@ -1592,7 +2004,11 @@ def _(Path, dag_run_states, os, pl):
     # signature — marimo's reactive dataflow forbids re-binding
     # those names at the cell level.
     import subprocess
-    assert dag_run_states["notebook_osm_pipeline"] == "success"
+    mo.stop(
+        dag_run_states.get("notebook_osm_pipeline") != "success",
+        f"Waiting for notebook_osm_pipeline (state="
+        f"{dag_run_states.get('notebook_osm_pipeline')!r})",
+    )
     work = Path("/workspace/tiles/convert-demo")
     work.mkdir(parents=True, exist_ok=True)
     src = "/workspace/tiles/pmtiles/monaco.pmtiles"
@@ -1655,7 +2071,11 @@ def _(dag_run_states, mo, versatiles_assets, versatiles_public):
     # tile server (versatiles vs martin), and a different style
     # generator (@versatiles/style vs the inline MapLibre style JSON
     # in build_pipeline_maplibre_html).
-    assert dag_run_states["notebook_osm_shortbread_pipeline"] == "success"
+    mo.stop(
+        dag_run_states.get("notebook_osm_shortbread_pipeline") != "success",
+        f"Waiting for notebook_osm_shortbread_pipeline (state="
+        f"{dag_run_states.get('notebook_osm_shortbread_pipeline')!r})",
+    )
     # versatiles serve's source URL for a watched-dir archive
     # `monaco-shortbread.pmtiles` is `/<basename>/{z}/{x}/{y}.pbf`
     # at the service root. The MapLibre style generated by
@@ -1760,7 +2180,7 @@ def _(dag_run_states, mo, versatiles_assets, versatiles_public):
 
 
 @app.cell
-def _(dag_run_states, pl, time):
+def _(dag_run_states, mo, pl, time):
     # cudf-polars GPU engine benchmark — RAPIDS cuDF-Polars (cu13)
     # plugs into Polars' LazyFrame.collect(engine=...) interface; the
     # GPU path executes the entire query plan via cuDF kernels.
@@ -1787,7 +2207,11 @@ def _(dag_run_states, pl, time):
     # Gates on dag_run_states["notebook_osm_pipeline"] only so the
     # cell positions sequentially after the OSM DAG completes — the
     # benchmark itself doesn't consume any OSM artifact.
-    assert dag_run_states["notebook_osm_pipeline"] == "success"
+    mo.stop(
+        dag_run_states.get("notebook_osm_pipeline") != "success",
+        f"Waiting for notebook_osm_pipeline (state="
+        f"{dag_run_states.get('notebook_osm_pipeline')!r})",
+    )
 
     # --- 1. Availability probes ---
     try:
@@ -1859,12 +2283,16 @@ def _(dag_run_states, pl, time):
 
 
 @app.cell
-def _(dag_run_states, os, pl):
+def _(dag_run_states, mo, os, pl):
     # Class A — server-side polars on the GTFS parquet directory
     # produced by notebook_gtfs_pipeline. Reports stop / route counts
     # plus the top routes by stop count (a useful "where does each
     # bus go?" summary for Monaco's compact transit network).
-    assert dag_run_states["notebook_gtfs_pipeline"] == "success"
+    mo.stop(
+        dag_run_states.get("notebook_gtfs_pipeline") != "success",
+        f"Waiting for notebook_gtfs_pipeline (state="
+        f"{dag_run_states.get('notebook_gtfs_pipeline')!r})",
+    )
     gtfs_dir = os.path.expanduser("/workspace/gtfs/parquet")
 
     df_stops = pl.read_parquet(f"{gtfs_dir}/stops.parquet")